@@ -2,25 +2,38 @@
 # -*- coding: utf-8 -*-
 
 import argparse
-import urllib3
+import itertools
+import json
+import sys
+import threading
 
-from cryptodatahub.common.exception import InvalidValue
+from collections import OrderedDict
 
-from cryptoparser.common.exception import InvalidDataLength, InvalidType
+import ipaddress
+import six
 
 from cryptolyzer.common.analyzer import ProtocolHandlerBase
-from cryptolyzer.common.exception import NetworkError, SecurityError
-from cryptolyzer.common.result import AnalyzerResultError
+from cryptolyzer.common.checkpoint import CheckpointJournal
+from cryptolyzer.common.concurrency import (
+    CircuitBreaker,
+    ConnectionLimiter,
+    EliminationEngine,
+    PreConnectPool,
+    RateLimiter,
+    RttEstimator,
+)
+from cryptolyzer.common.result import AnalyzerResultStream
+from cryptolyzer.common.scanner import ScanTarget, TargetResolver, TargetScanner
+from cryptolyzer.common.targets import iter_scan_targets, to_uri
+from cryptolyzer.common.transfer import SocketOptions
+from cryptolyzer.common.utils import ResolverCache
 
 from cryptolyzer import __setup__
 
 
 def get_protocol_handler_analyzer_and_uris(parser, arguments):
-    def to_uri(value, default):
-        if '://' not in value:
-            value = default + '://' + value
-
-        return urllib3.util.parse_url(value)
+    if not arguments.targets and arguments.targets_file is None:
+        parser.error('no targets given')
 
     protocol_handler = ProtocolHandlerBase.from_protocol(arguments.protocol)
     analyzer = protocol_handler.analyzer_from_name(arguments.analyzer)
@@ -41,6 +54,37 @@ def get_protocol_handler_analyzer_and_uris(parser, arguments):
     return protocol_handler, analyzer, targets
 
 
+def positive_int(value):
+    try:
+        int_value = int(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+    if int_value < 1:
+        raise argparse.ArgumentTypeError('invalid positive int value: \'{}\''.format(value))
+
+    return int_value
+
+
+def ip_address(value):
+    try:
+        return six.text_type(ipaddress.ip_address(six.text_type(value)))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def positive_float(value):
+    try:
+        float_value = float(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+    if float_value <= 0:
+        raise argparse.ArgumentTypeError('invalid positive float value: \'{}\''.format(value))
+
+    return float_value
+
+
 def get_argument_parser():
     parser = argparse.ArgumentParser(prog='cryptolyze')
     parser.add_argument('--version', '-v', action='version', version='%(prog)s ' + __setup__.__version__)
@@ -52,10 +96,180 @@ def get_argument_parser():
     )
     parser.add_argument(
         '--output-format',
-        choices=['json', 'markdown'],
+        choices=['json', 'jsonl', 'markdown'],
         default='markdown',
         help='format of the anlysis result (default: %(default)s)'
     )
+    parser.add_argument(
+        '--stream-sub-results',
+        action='store_true',
+        default=False,
+        help='write the results of the sub-analyzers of the all analyzer as soon as they are ready (jsonl only)'
+    )
+    parser.add_argument(
+        '--targets-file',
+        type=argparse.FileType('r'),
+        default=None,
+        help='file of targets, one per line optionally preceded by protocol and analyzer, '
+             'host may be a CIDR range and port a port range, - means the standard input'
+    )
+    parser.add_argument(
+        '--checkpoint',
+        default=None,
+        help='journal file of the started and completed targets, an existing one is not overwritten'
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        default=False,
+        help='skip the targets completed according to the checkpoint journal and continue the in-flight ones'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=positive_int,
+        default=1,
+        help='number of targets analyzed in parallel (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--max-jobs-per-ip',
+        type=positive_int,
+        default=None,
+        help='maximum number of targets with the same IP address analyzed in parallel (default: unlimited)'
+    )
+    parser.add_argument(
+        '--max-connections-per-ip',
+        type=positive_int,
+        default=ConnectionLimiter.DEFAULT_MAX_CONNECTIONS_PER_IP,
+        help='maximum number of simultaneous connections to the same IP address (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--adaptive-connections',
+        action='store_true',
+        default=False,
+        help='adapt the number of simultaneous connections to the same IP address to the load of the server '
+             'up to the maximum'
+    )
+    parser.add_argument(
+        '--max-connection-rate-per-ip',
+        type=positive_float,
+        default=None,
+        help='maximum number of new connections per second to the same IP address (default: unlimited)'
+    )
+    parser.add_argument(
+        '--max-connection-rate-per-network',
+        type=positive_float,
+        default=None,
+        help='maximum number of new connections per second to the same /24 (IPv4) or /64 (IPv6) network '
+             '(default: unlimited)'
+    )
+    parser.add_argument(
+        '--connection-burst',
+        type=positive_int,
+        default=1,
+        help='number of connections can be opened at once within the connection rate limits (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--adaptive-timeout',
+        action='store_true',
+        default=False,
+        help='derive the timeouts from the measured connect and response times of the IP address'
+    )
+    parser.add_argument(
+        '--adaptive-timeout-floor',
+        type=positive_float,
+        default=RttEstimator.DEFAULT_FLOOR,
+        help='minimal adaptive timeout in seconds (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--adaptive-timeout-ceiling',
+        type=positive_float,
+        default=None,
+        help='maximal adaptive timeout in seconds (default: the timeout of the protocol)'
+    )
+    parser.add_argument(
+        '--adaptive-timeout-multiplier',
+        type=positive_float,
+        default=RttEstimator.DEFAULT_MULTIPLIER,
+        help='multiplier of the estimated round-trip time (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--circuit-breaker-threshold',
+        type=positive_int,
+        default=None,
+        help='number of consecutive connection failures or timeouts after which the remaining connections to the '
+             'same IP address fail immediately (default: disabled)'
+    )
+    parser.add_argument(
+        '--circuit-breaker-reset-timeout',
+        type=positive_float,
+        default=CircuitBreaker.DEFAULT_RESET_TIMEOUT,
+        help='seconds after which an open circuit lets a trial connection through (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--pre-connect',
+        type=int,
+        choices=range(PreConnectPool.MAX_SIZE + 1),
+        default=0,
+        help='number of connections opened in advance to the same IP address and port while the current one is '
+             'in use (default: disabled)'
+    )
+    parser.add_argument(
+        '--abortive-close',
+        action='store_true',
+        default=False,
+        help='reset the connections instead of closing them gracefully to avoid sockets in TIME_WAIT state'
+    )
+    parser.add_argument(
+        '--tcp-no-delay',
+        action='store_true',
+        default=False,
+        help='disable the Nagle algorithm on the connections'
+    )
+    parser.add_argument(
+        '--source-address',
+        dest='source_addresses',
+        metavar='SOURCE_ADDRESS',
+        type=ip_address,
+        action='append',
+        default=[],
+        help='local address the connections are bound to, in round-robin if given multiple times'
+    )
+    parser.add_argument(
+        '--partitions',
+        type=positive_int,
+        default=EliminationEngine.DEFAULT_PARTITION_COUNT,
+        help='number of partitions of the checked algorithms enumerated in parallel (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--preference-order',
+        action='store_true',
+        default=False,
+        help='determine the full order of the accepted cipher suites if the server has a preference'
+    )
+    parser.add_argument(
+        '--cross-version-seeding',
+        action='store_true',
+        default=False,
+        help='check the cipher suites accepted by the neighbouring protocol version first'
+    )
+    parser.add_argument(
+        '--resolver-cache-ttl',
+        type=int,
+        default=ResolverCache.DEFAULT_TTL,
+        help='seconds while resolved addresses are cached, zero disables caching (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--resolver-jobs',
+        type=positive_int,
+        default=8,
+        help='number of target names resolved in parallel before the analysis (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--all-addresses',
+        action='store_true',
+        default=False,
+        help='analyze all the resolved IP addresses of the targets in parallel'
+    )
 
     parsers_analyzer = parser.add_subparsers(title='protocol', dest='protocol')
     parsers_analyzer.required = True
@@ -70,30 +284,101 @@ def get_argument_parser():
             parser_plugin = parsers_plugin.add_parser(analyzer_class.get_name(), help=analyzer_class.get_help())
             schemes = [client.get_scheme() for client in analyzer_class.get_clients()]
             parser_plugin.add_argument(
-                'targets', metavar='URI', nargs='+',
+                'targets', metavar='URI', nargs='*',
                 help='[{{{}}}://]f.q.d.n[:port][#ip]'.format(','.join(schemes))
             )
 
     return parser
 
 
+class JsonLinesWriter(object):
+    def __init__(self, stream):
+        self._stream = stream
+        self._lock = threading.Lock()
+
+    def write(self, obj):
+        line = json.dumps(obj, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._stream.write(line)
+            self._stream.flush()
+
+    def write_sub_result(self, target, analyzer_name, result):
+        self.write(OrderedDict([('target', target), ('analyzer', analyzer_name), ('sub_result', result)]))
+
+
+def get_scan_targets(arguments, protocol_handler, analyzer, targets):
+    scan_targets = (ScanTarget(protocol_handler, analyzer, target) for target in targets)
+    if arguments.targets_file is not None:
+        scan_targets = itertools.chain(
+            scan_targets, iter_scan_targets(arguments.targets_file, protocol_handler, analyzer)
+        )
+
+    return scan_targets
+
+
+def write_result(arguments, json_lines_writer, analyzer_result):
+    if arguments.output_format == 'json':
+        print(analyzer_result.as_json())
+    elif arguments.output_format == 'jsonl':
+        json_lines_writer.write(analyzer_result)
+    elif arguments.output_format == 'markdown':
+        print(analyzer_result.as_markdown())
+    else:
+        raise NotImplementedError()
+
+
 def main():
     parser = get_argument_parser()
     arguments = parser.parse_args()
     protocol_handler, analyzer, targets = get_protocol_handler_analyzer_and_uris(parser, arguments)
+    if arguments.stream_sub_results and arguments.output_format != 'jsonl':
+        parser.error('sub-results can be streamed only in jsonl output format')
+    if arguments.resume and arguments.checkpoint is None:
+        parser.error('resume requires a checkpoint journal')
+    if arguments.checkpoint is not None and not arguments.resume and CheckpointJournal.is_started(arguments.checkpoint):
+        parser.error('checkpoint journal already exists, use resume to continue it')
+
+    ConnectionLimiter().max_connections_per_ip = arguments.max_connections_per_ip
+    ConnectionLimiter().adaptive = arguments.adaptive_connections
+    RateLimiter().connections_per_ip = arguments.max_connection_rate_per_ip
+    RateLimiter().connections_per_network = arguments.max_connection_rate_per_network
+    RateLimiter().burst = arguments.connection_burst
+    RttEstimator().enabled = arguments.adaptive_timeout
+    RttEstimator().floor = arguments.adaptive_timeout_floor
+    RttEstimator().ceiling = arguments.adaptive_timeout_ceiling
+    RttEstimator().multiplier = arguments.adaptive_timeout_multiplier
+    CircuitBreaker().threshold = arguments.circuit_breaker_threshold
+    CircuitBreaker().reset_timeout = arguments.circuit_breaker_reset_timeout
+    PreConnectPool().size = arguments.pre_connect
+    SocketOptions().abortive_close = arguments.abortive_close
+    SocketOptions().no_delay = arguments.tcp_no_delay
+    SocketOptions().source_addresses = arguments.source_addresses
+    EliminationEngine().partition_count = arguments.partitions
+    EliminationEngine().preference_order = arguments.preference_order
+    EliminationEngine().cross_version_seeding = arguments.cross_version_seeding
+    ResolverCache().ttl = arguments.resolver_cache_ttl
+    scan_targets = get_scan_targets(arguments, protocol_handler, analyzer, targets)
+    if arguments.checkpoint is not None:
+        checkpoint_journal = CheckpointJournal(arguments.checkpoint, arguments.resume)
+        scan_targets = checkpoint_journal.filter(scan_targets)
+    else:
+        checkpoint_journal = None
+
+    resolver = TargetResolver(arguments.resolver_jobs, arguments.all_addresses)
+    scanner = TargetScanner(arguments.jobs, arguments.max_jobs_per_ip, resolver, arguments.all_addresses)
+    json_lines_writer = JsonLinesWriter(sys.stdout)
+    if arguments.stream_sub_results:
+        AnalyzerResultStream().listener = json_lines_writer.write_sub_result
 
-    for target in targets:
-        try:
-            analyzer_result = protocol_handler.analyze(analyzer, target)
-        except (NetworkError, SecurityError, InvalidDataLength, InvalidType, InvalidValue) as e:
-            analyzer_result = AnalyzerResultError(str(target), str(e))
-
-        if arguments.output_format == 'json':
-            print(analyzer_result.as_json())
-        elif arguments.output_format == 'markdown':
-            print(analyzer_result.as_markdown())
-        else:
-            raise NotImplementedError()
+    try:
+        for scan_target, analyzer_result in scanner.scan_target_results(scan_targets):
+            write_result(arguments, json_lines_writer, analyzer_result)
+            if checkpoint_journal is not None and scan_target is not None:
+                sys.stdout.flush()
+                checkpoint_journal.complete(scan_target)
+    finally:
+        if checkpoint_journal is not None:
+            checkpoint_journal.close()
 
 
 if __name__ == '__main__':
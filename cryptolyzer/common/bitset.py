@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+
+import abc
+
+import attr
+import six
+
+from cryptodatahub.tls.algorithm import TlsNamedCurve
+
+from cryptoparser.common.base import Serializable
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
+
+
+@attr.s(frozen=True)
+@six.add_metaclass(abc.ABCMeta)
+class EnumBitSetBase(Serializable):
+    _MEMBERS_BY_ENUM_CLASS = {}
+    _POSITIONS_BY_ENUM_CLASS = {}
+
+    bits = attr.ib(default=0, validator=attr.validators.instance_of(six.integer_types))
+
+    @classmethod
+    @abc.abstractmethod
+    def get_enum_class(cls):
+        raise NotImplementedError()
+
+    @classmethod
+    def _get_members(cls):
+        enum_class = cls.get_enum_class()
+        if enum_class not in cls._MEMBERS_BY_ENUM_CLASS:
+            members = tuple(enum_class)
+            cls._POSITIONS_BY_ENUM_CLASS[enum_class] = {member: position for position, member in enumerate(members)}
+            cls._MEMBERS_BY_ENUM_CLASS[enum_class] = members
+
+        return cls._MEMBERS_BY_ENUM_CLASS[enum_class]
+
+    @classmethod
+    def _get_positions(cls):
+        cls._get_members()
+        return cls._POSITIONS_BY_ENUM_CLASS[cls.get_enum_class()]
+
+    @classmethod
+    def from_iterable(cls, members):
+        positions = cls._get_positions()
+        bits = 0
+        for member in members:
+            try:
+                bits |= 1 << positions[member]
+            except KeyError as e:
+                six.raise_from(ValueError(member), e)
+
+        return cls(bits)
+
+    @classmethod
+    def from_names(cls, names):
+        enum_class = cls.get_enum_class()
+        members = []
+        for name in names:
+            try:
+                members.append(enum_class[name])
+            except KeyError as e:
+                six.raise_from(ValueError(name), e)
+
+        return cls.from_iterable(members)
+
+    @classmethod
+    def all(cls):
+        return cls((1 << len(cls._get_members())) - 1)
+
+    def __contains__(self, member):
+        position = self._get_positions().get(member)
+        return position is not None and bool((self.bits >> position) & 1)
+
+    def __iter__(self):
+        members = self._get_members()
+        bits = self.bits
+        while bits:
+            lowest_bit = bits & -bits
+            yield members[lowest_bit.bit_length() - 1]
+            bits ^= lowest_bit
+
+    def __len__(self):
+        return bin(self.bits).count('1')
+
+    def __bool__(self):
+        return self.bits != 0
+
+    __nonzero__ = __bool__
+
+    def _check_operand(self, other):
+        if type(other) is not type(self):  # pylint: disable=unidiomatic-typecheck
+            raise TypeError(other)
+
+    def __or__(self, other):
+        self._check_operand(other)
+        return type(self)(self.bits | other.bits)
+
+    def __and__(self, other):
+        self._check_operand(other)
+        return type(self)(self.bits & other.bits)
+
+    def __sub__(self, other):
+        self._check_operand(other)
+        return type(self)(self.bits & ~other.bits)
+
+    def _asdict(self):
+        return list(self)
+
+    def _as_markdown(self, level):
+        return self._markdown_result(list(self), level)
+
+
+class TlsCipherSuiteBitSet(EnumBitSetBase):
+    @classmethod
+    def get_enum_class(cls):
+        return TlsCipherSuite
+
+
+class TlsNamedCurveBitSet(EnumBitSetBase):
+    @classmethod
+    def get_enum_class(cls):
+        return TlsNamedCurve
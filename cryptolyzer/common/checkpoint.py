@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+
+import io
+import itertools
+import json
+import os
+import threading
+
+from collections import OrderedDict
+
+import attr
+import six
+import urllib3
+
+from cryptolyzer.common.analyzer import ProtocolHandlerBase
+from cryptolyzer.common.result import AnalyzerResultError
+from cryptolyzer.common.scanner import ScanTarget
+
+
+@attr.s
+class CheckpointJournal(object):
+    path = attr.ib(validator=attr.validators.instance_of(six.string_types))
+    resume = attr.ib(default=False, validator=attr.validators.instance_of(bool))
+    _file = attr.ib(init=False, default=None)
+    _lock = attr.ib(init=False, default=None)
+    _completed = attr.ib(init=False, default=None)
+    _started = attr.ib(init=False, default=None)
+    _in_flight = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        self._lock = threading.Lock()
+        self._completed = set()
+        self._started = set()
+        self._in_flight = OrderedDict()
+
+        if self.is_started(self.path):
+            if not self.resume:
+                raise ValueError(self.path)
+
+            self._load()
+
+        self._file = io.open(self.path, 'a', encoding='utf-8')  # pylint: disable=consider-using-with
+        if self.resume and not self._is_terminated():
+            # a torn last record must not swallow the first appended one
+            self._file.write(six.u('\n'))
+            self._file.flush()
+
+    @staticmethod
+    def is_started(path):
+        return os.path.exists(path) and os.path.getsize(path) > 0
+
+    def _is_terminated(self):
+        with io.open(self.path, 'rb') as journal_file:
+            journal_file.seek(0, os.SEEK_END)
+            if not journal_file.tell():
+                return True
+
+            journal_file.seek(-1, os.SEEK_END)
+            return journal_file.read(1) == b'\n'
+
+    def _load(self):
+        with io.open(self.path, 'r', encoding='utf-8') as journal_file:
+            for line in journal_file:
+                try:
+                    record = json.loads(line)
+                    key = (record['protocol'], record['analyzer'], record['target'])
+                    event = record['event']
+                except (ValueError, KeyError, TypeError):
+                    continue
+
+                if event == 'started':
+                    self._in_flight[key] = None
+                elif event == 'completed':
+                    self._in_flight.pop(key, None)
+                    self._completed.add(key)
+
+    @staticmethod
+    def _get_key(scan_target):
+        return (
+            scan_target.protocol_handler.get_protocol(),
+            scan_target.analyzer.get_name(),
+            six.text_type(scan_target.uri),
+        )
+
+    def _write(self, event, key):
+        record = OrderedDict([('event', event), ('protocol', key[0]), ('analyzer', key[1]), ('target', key[2])])
+        line = six.text_type(json.dumps(record)) + six.u('\n')
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def _get_in_flight_scan_targets(self):
+        for protocol, analyzer_name, target in list(self._in_flight.keys()):
+            try:
+                protocol_handler = ProtocolHandlerBase.from_protocol(protocol)
+                analyzer = protocol_handler.analyzer_from_name(analyzer_name)
+            except (KeyError, ValueError):
+                continue
+
+            yield ScanTarget(protocol_handler, analyzer, urllib3.util.parse_url(target))
+
+    def filter(self, scan_targets):
+        for scan_target in itertools.chain(self._get_in_flight_scan_targets(), scan_targets):
+            if isinstance(scan_target, AnalyzerResultError):
+                yield scan_target
+                continue
+
+            key = self._get_key(scan_target)
+            with self._lock:
+                if key in self._completed or key in self._started:
+                    continue
+                self._started.add(key)
+
+            self._write('started', key)
+            yield scan_target
+
+    def complete(self, scan_target):
+        key = self._get_key(scan_target)
+        self._write('completed', key)
+        with self._lock:
+            self._started.discard(key)
+            # replayed targets may still come from the scan targets, others are only journaled
+            if key in self._in_flight:
+                del self._in_flight[key]
+                self._completed.add(key)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,732 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import ipaddress
+import itertools
+import threading
+import time
+
+from collections import OrderedDict
+from concurrent import futures
+
+import attr
+import six
+
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
+from cryptolyzer.common.utils import LogSingleton, Singleton
+
+
+@attr.s
+class KeyedSemaphore(object):
+    value = attr.ib(validator=attr.validators.instance_of(six.integer_types))
+    _condition = attr.ib(init=False, default=None)
+    _counters = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        if self.value < 1:
+            raise ValueError(self.value)
+
+        self._condition = threading.Condition()
+        self._counters = {}
+
+    def set_value(self, value):
+        if value < 1:
+            raise ValueError(value)
+
+        with self._condition:
+            self.value = value
+            self._condition.notify_all()
+
+    def _get_limit(self, key):  # pylint: disable=unused-argument
+        return self.value
+
+    def _acquire(self, key, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while self._counters.get(key, 0) >= self._get_limit(key):
+                if deadline is None:
+                    self._condition.wait()
+                    continue
+
+                remaining_time = deadline - time.time()
+                if remaining_time <= 0:
+                    return False
+                self._condition.wait(remaining_time)
+
+            self._counters[key] = self._counters.get(key, 0) + 1
+
+        return True
+
+    def acquire(self, key):
+        self._acquire(key, None)
+
+    def try_acquire(self, key, timeout=0):
+        return self._acquire(key, timeout)
+
+    def release(self, key):
+        with self._condition:
+            self._counters[key] -= 1
+            if not self._counters[key]:
+                del self._counters[key]
+
+            self._condition.notify_all()
+
+    @contextlib.contextmanager
+    def hold(self, key):
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+
+@attr.s
+class CongestionWindow(object):
+    maximum = attr.ib(validator=attr.validators.instance_of(six.integer_types))
+    size = attr.ib(init=False, default=1.0)
+
+    def increase(self):
+        self.size = min(float(self.maximum), self.size + 1.0 / self.size)
+
+    def decrease(self):
+        self.size = max(1.0, self.size / 2)
+
+    @property
+    def limit(self):
+        return min(self.maximum, int(self.size))
+
+
+@attr.s
+class AdaptiveKeyedSemaphore(KeyedSemaphore):
+    adaptive = attr.ib(default=False, validator=attr.validators.instance_of(bool))
+    _windows = attr.ib(init=False, default=None)
+
+    MAX_IDLE_WINDOW_COUNT = 4096
+
+    def __attrs_post_init__(self):
+        super(AdaptiveKeyedSemaphore, self).__attrs_post_init__()
+
+        self._windows = {}
+
+    def _get_window(self, key):
+        window = self._windows.get(key)
+        if window is None:
+            window = CongestionWindow(self.value)
+            self._windows[key] = window
+
+        window.maximum = self.value
+        return window
+
+    def _get_limit(self, key):
+        if not self.adaptive:
+            return self.value
+
+        return self._get_window(key).limit
+
+    def get_window_size(self, key):
+        with self._condition:
+            return self._get_window(key).size
+
+    def increase(self, key):
+        with self._condition:
+            self._get_window(key).increase()
+            self._condition.notify_all()
+
+    def decrease(self, key):
+        with self._condition:
+            self._get_window(key).decrease()
+
+    def reset_windows(self):
+        with self._condition:
+            self._windows.clear()
+            self._condition.notify_all()
+
+    def release(self, key):
+        super(AdaptiveKeyedSemaphore, self).release(key)
+
+        with self._condition:
+            if len(self._windows) > self.MAX_IDLE_WINDOW_COUNT:
+                for idle_key in [idle_key for idle_key in self._windows if idle_key not in self._counters]:
+                    del self._windows[idle_key]
+
+
+@six.add_metaclass(Singleton)
+class ConnectionLimiter(object):
+    DEFAULT_MAX_CONNECTIONS_PER_IP = 8
+    DEFAULT_ACQUIRE_TIMEOUT = 60
+
+    def __init__(self):
+        self._semaphore = AdaptiveKeyedSemaphore(self.DEFAULT_MAX_CONNECTIONS_PER_IP)
+        self.acquire_timeout = self.DEFAULT_ACQUIRE_TIMEOUT
+
+    @property
+    def max_connections_per_ip(self):
+        return self._semaphore.value
+
+    @max_connections_per_ip.setter
+    def max_connections_per_ip(self, value):
+        self._semaphore.set_value(value)
+
+    @property
+    def adaptive(self):
+        return self._semaphore.adaptive
+
+    @adaptive.setter
+    def adaptive(self, value):
+        self._semaphore.adaptive = value
+
+    def acquire(self, ip):
+        if not self._semaphore.try_acquire(six.text_type(ip), self.acquire_timeout):
+            raise NetworkError(NetworkErrorType.NO_CONNECTION)
+
+    def try_acquire(self, ip):
+        return self._semaphore.try_acquire(six.text_type(ip))
+
+    def release(self, ip):
+        self._semaphore.release(six.text_type(ip))
+
+    def get_window_size(self, ip):
+        return self._semaphore.get_window_size(six.text_type(ip))
+
+    def signal_success(self, ip):
+        self._semaphore.increase(six.text_type(ip))
+
+    def signal_overload(self, ip):
+        self._semaphore.decrease(six.text_type(ip))
+
+    def reset(self):
+        self._semaphore.reset_windows()
+
+
+@attr.s
+class TokenBucket(object):
+    rate = attr.ib(validator=attr.validators.instance_of((float, ) + six.integer_types))
+    capacity = attr.ib(validator=attr.validators.instance_of((float, ) + six.integer_types))
+    _tokens = attr.ib(init=False, default=None)
+    _last_time = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        if self.rate <= 0:
+            raise ValueError(self.rate)
+        if self.capacity < 1:
+            raise ValueError(self.capacity)
+
+        self._tokens = float(self.capacity)
+
+    def reserve(self, now):
+        if self._last_time is not None:
+            self._tokens = min(float(self.capacity), self._tokens + (now - self._last_time) * self.rate)
+        self._last_time = now
+
+        self._tokens -= 1
+        if self._tokens >= 0:
+            return 0.0
+
+        return -self._tokens / self.rate
+
+    def is_full(self, now):
+        return self._tokens + (now - self._last_time) * self.rate >= self.capacity
+
+
+@six.add_metaclass(Singleton)
+class RateLimiter(object):
+    MAX_IDLE_KEY_COUNT = 4096
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._blocked_until = {}
+        self.connections_per_ip = None
+        self.connections_per_network = None
+        self.burst = 1
+
+    @staticmethod
+    def get_network(ip):
+        try:
+            ip = ipaddress.ip_address(six.text_type(ip))
+        except ValueError:
+            return six.text_type(ip)
+
+        prefix_length = 24 if ip.version == 4 else 64
+        return six.text_type(ipaddress.ip_network(six.u('{}/{}').format(ip, prefix_length), strict=False))
+
+    def _prune(self, now):
+        if len(self._buckets) + len(self._blocked_until) < self.MAX_IDLE_KEY_COUNT:
+            return
+
+        for key in [key for key, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+        for key in [key for key, blocked_until in self._blocked_until.items() if blocked_until <= now]:
+            del self._blocked_until[key]
+
+    def _reserve(self, key, rate, now):
+        if rate is None:
+            return 0.0
+
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.capacity != self.burst:
+            bucket = TokenBucket(rate, self.burst)
+            self._buckets[key] = bucket
+
+        return bucket.reserve(now)
+
+    def acquire(self, ip):
+        ip = six.text_type(ip)
+        network = self.get_network(ip)
+        with self._lock:
+            now = time.time()
+            self._prune(now)
+            delay = max(
+                self._blocked_until.get(ip, now) - now,
+                self._reserve(ip, self.connections_per_ip, now),
+                self._reserve(network, self.connections_per_network, now),
+            )
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def backoff(self, ip, delay):
+        ip = six.text_type(ip)
+        with self._lock:
+            self._blocked_until[ip] = max(self._blocked_until.get(ip, 0), time.time() + delay)
+
+    def is_backed_off(self, ip):
+        with self._lock:
+            return self._blocked_until.get(six.text_type(ip), 0) > time.time()
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+            self._blocked_until.clear()
+
+
+def _inherit_log_state(func):
+    disabled = LogSingleton().disabled
+
+    def wrapper(*args):
+        LogSingleton().disabled = disabled
+        try:
+            return func(*args)
+        finally:
+            LogSingleton().disabled = False
+
+    return wrapper
+
+
+@six.add_metaclass(Singleton)
+class RttEstimator(object):
+    DEFAULT_FLOOR = 0.5
+    DEFAULT_MULTIPLIER = 4.0
+    MAX_ESTIMATE_COUNT = 65536
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._estimates = OrderedDict()
+        self.enabled = False
+        self.floor = self.DEFAULT_FLOOR
+        self.ceiling = None
+        self.multiplier = self.DEFAULT_MULTIPLIER
+
+    def add_sample(self, ip, rtt):
+        if not self.enabled:
+            return
+
+        ip = six.text_type(ip)
+        with self._lock:
+            estimate = self._estimates.pop(ip, None)
+            if estimate is None:
+                smoothed_rtt, rtt_variation = rtt, rtt / 2
+            else:
+                smoothed_rtt, rtt_variation = estimate
+                rtt_variation = 0.75 * rtt_variation + 0.25 * abs(smoothed_rtt - rtt)
+                smoothed_rtt = 0.875 * smoothed_rtt + 0.125 * rtt
+
+            self._estimates[ip] = (smoothed_rtt, rtt_variation)
+            if len(self._estimates) > self.MAX_ESTIMATE_COUNT:
+                self._estimates.popitem(last=False)
+
+    def get_timeout(self, ip, timeout):
+        if not self.enabled:
+            return timeout
+
+        with self._lock:
+            estimate = self._estimates.get(six.text_type(ip))
+        if estimate is None:
+            return timeout
+
+        smoothed_rtt, rtt_variation = estimate
+        ceiling = timeout if self.ceiling is None else self.ceiling
+        return min(max(self.multiplier * (smoothed_rtt + 4 * rtt_variation), self.floor), ceiling)
+
+    def reset(self):
+        with self._lock:
+            self._estimates.clear()
+
+
+@six.add_metaclass(Singleton)
+class CircuitBreaker(object):
+    DEFAULT_RESET_TIMEOUT = 60.0
+    MAX_CIRCUIT_COUNT = 65536
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._circuits = OrderedDict()
+        self.threshold = None
+        self.reset_timeout = self.DEFAULT_RESET_TIMEOUT
+
+    def allow(self, ip):
+        if self.threshold is None:
+            return True
+
+        ip = six.text_type(ip)
+        now = time.time()
+        with self._lock:
+            failure_count, open_until = self._circuits.get(ip, (0, None))
+            if failure_count < self.threshold:
+                return True
+            if now < open_until:
+                return False
+
+            self._circuits[ip] = (failure_count, now + self.reset_timeout)
+
+        return True
+
+    def is_open(self, ip):
+        if self.threshold is None:
+            return False
+
+        with self._lock:
+            failure_count, open_until = self._circuits.get(six.text_type(ip), (0, None))
+
+        return failure_count >= self.threshold and time.time() < open_until
+
+    def is_interrupted(self, ip, network_error):
+        return network_error.error == NetworkErrorType.CIRCUIT_OPEN or (
+            network_error.error == NetworkErrorType.NO_CONNECTION and self.is_open(ip)
+        )
+
+    def record_success(self, ip):
+        if self.threshold is None:
+            return
+
+        with self._lock:
+            self._circuits.pop(six.text_type(ip), None)
+
+    def record_failure(self, ip):
+        if self.threshold is None:
+            return
+
+        ip = six.text_type(ip)
+        with self._lock:
+            failure_count, open_until = self._circuits.pop(ip, (0, None))
+            failure_count += 1
+            if failure_count >= self.threshold:
+                open_until = time.time() + self.reset_timeout
+                if failure_count == self.threshold:
+                    LogSingleton().log(
+                        level=60,
+                        msg=six.u('Circuit opened for %s after %d consecutive failures') % (ip, failure_count)
+                    )
+
+            self._circuits[ip] = (failure_count, open_until)
+            if len(self._circuits) > self.MAX_CIRCUIT_COUNT:
+                self._circuits.popitem(last=False)
+
+    def reset(self):
+        with self._lock:
+            self._circuits.clear()
+
+
+@six.add_metaclass(Singleton)
+class PreConnectPool(object):
+    DEFAULT_MAX_IDLE_TIME = 2.0
+    MAX_SIZE = 2
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._refilled_keys = set()
+        self._size = 0
+        self.max_idle_time = self.DEFAULT_MAX_IDLE_TIME
+
+    @property
+    def size(self):
+        return self._size
+
+    @size.setter
+    def size(self, value):
+        if value < 0 or value > self.MAX_SIZE:
+            raise ValueError(value)
+
+        self._size = value
+        if not value:
+            self.clear()
+
+    @staticmethod
+    def _close(connection, release):
+        try:
+            connection.close()
+        except (IOError, OSError):
+            pass
+
+        if release is not None:
+            release(connection)
+
+    def _prune(self, now):
+        expired_connections = []
+        for key, connections in list(self._connections.items()):
+            while connections and now - connections[0][0] > self.max_idle_time:
+                expired_connections.append(connections.pop(0)[1:])
+            if not connections:
+                del self._connections[key]
+
+        return expired_connections
+
+    def _is_filled(self, key):
+        return len(self._connections.get(key, [])) >= self._size
+
+    def _refill(self, key, connect, release):
+        try:
+            while True:
+                with self._lock:
+                    if self._is_filled(key):
+                        break
+
+                try:
+                    connection = connect()
+                except (IOError, OSError):
+                    connection = None
+                if connection is None:
+                    break
+
+                with self._lock:
+                    if self._size:
+                        self._connections.setdefault(key, []).append((time.time(), connection, release))
+                        connection = None
+
+                if connection is not None:
+                    self._close(connection, release)
+                    break
+        finally:
+            with self._lock:
+                self._refilled_keys.discard(key)
+
+    def _fill(self, key, connect, release):
+        if key in self._refilled_keys or self._is_filled(key):
+            return
+
+        self._refilled_keys.add(key)
+        thread = threading.Thread(target=self._refill, args=(key, connect, release))
+        thread.daemon = True
+        thread.start()
+
+    def get(self, key, connect, is_alive, release=None):
+        if not self._size:
+            return None
+
+        connection = None
+        connection_release = None
+        with self._lock:
+            closable_connections = self._prune(time.time())
+            connections = self._connections.get(key, [])
+            while connections:
+                _, candidate, candidate_release = connections.pop(0)
+                if is_alive(candidate):
+                    connection, connection_release = candidate, candidate_release
+                    break
+                closable_connections.append((candidate, candidate_release))
+
+            self._fill(key, connect, release)
+
+        for closable_connection, closable_release in closable_connections:
+            self._close(closable_connection, closable_release)
+        # the connection is taken over by the caller, which is already counted
+        if connection_release is not None:
+            connection_release(connection)
+
+        return connection
+
+    def discard(self, key):
+        with self._lock:
+            connections = [(connection, release) for _, connection, release in self._connections.pop(key, [])]
+
+        for connection, release in connections:
+            self._close(connection, release)
+
+    def clear(self):
+        with self._lock:
+            connections = [
+                (connection, release)
+                for connections in self._connections.values()
+                for _, connection, release in connections
+            ]
+            self._connections.clear()
+
+        for connection, release in connections:
+            self._close(connection, release)
+
+
+@attr.s
+class DependencyGraph(object):
+    max_workers = attr.ib(default=None, validator=attr.validators.optional(attr.validators.instance_of(
+        six.integer_types
+    )))
+    _tasks = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        if self.max_workers is not None and self.max_workers < 1:
+            raise ValueError(self.max_workers)
+
+        self._tasks = OrderedDict()
+
+    def add_task(self, name, func, dependencies=()):
+        if name in self._tasks:
+            raise KeyError(name)
+
+        for dependency in dependencies:
+            if dependency not in self._tasks:
+                raise KeyError(dependency)
+
+        self._tasks[name] = (func, tuple(dependencies))
+
+    @staticmethod
+    def _get_ready_tasks(waiting_tasks, results):
+        return [
+            name
+            for name, (_, dependencies) in waiting_tasks.items()
+            if all(dependency in results for dependency in dependencies)
+        ]
+
+    def run(self, on_result=None):
+        results = OrderedDict()
+        if not self._tasks:
+            return results
+
+        executor = futures.ThreadPoolExecutor(max_workers=self.max_workers or len(self._tasks))
+        waiting_tasks = OrderedDict(self._tasks)
+        running_tasks = {}
+
+        try:
+            while waiting_tasks or running_tasks:
+                for name in self._get_ready_tasks(waiting_tasks, results):
+                    func, dependencies = waiting_tasks.pop(name)
+                    future = executor.submit(
+                        _inherit_log_state(func), *[results[dependency] for dependency in dependencies]
+                    )
+                    running_tasks[future] = name
+
+                done, _ = futures.wait(running_tasks, return_when=futures.FIRST_COMPLETED)
+                for future in done:
+                    name = running_tasks.pop(future)
+                    results[name] = future.result()
+                    if on_result is not None:
+                        on_result(name, results[name])
+        finally:
+            for future in running_tasks:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+        return OrderedDict([(name, results[name]) for name in self._tasks])
+
+
+@six.add_metaclass(Singleton)
+class EliminationEngine(object):
+    DEFAULT_PARTITION_COUNT = 1
+
+    def __init__(self):
+        self._partition_count = self.DEFAULT_PARTITION_COUNT
+        self.preference_order = False
+        self.cross_version_seeding = False
+
+    @property
+    def partition_count(self):
+        return self._partition_count
+
+    @partition_count.setter
+    def partition_count(self, value):
+        if value < 1:
+            raise ValueError(value)
+
+        self._partition_count = value
+
+    def _get_partitions(self, candidates):
+        return [
+            candidates[index::self.partition_count]
+            for index in range(min(self.partition_count, len(candidates)))
+        ]
+
+    @staticmethod
+    def _enumerate_partitions(l7_client, enumerate_func, partitions):
+        dependency_graph = DependencyGraph()
+        for index, partition in enumerate(partitions):
+            dependency_graph.add_task(
+                index,
+                lambda partition=partition: enumerate_func(l7_client.clone(), partition)
+            )
+
+        return dependency_graph.run().values()
+
+    def enumerate_chains(self, l7_client, enumerate_func, candidates, reconcile=True):
+        candidates = list(candidates)
+        partitions = self._get_partitions(candidates)
+        if len(partitions) < 2:
+            accepted, remaining = enumerate_func(l7_client, candidates)
+            return [list(accepted)] if accepted else [], remaining
+
+        chains = []
+        remaining = []
+        partition_results = self._enumerate_partitions(l7_client, enumerate_func, partitions)
+        for partition, (partition_accepted, partition_remaining) in zip(partitions, partition_results):
+            if partition_accepted:
+                chains.append(list(partition_accepted))
+            # nothing is known about a partition without any accepted candidate, so all of them are reconciled
+            remaining.extend(partition_remaining if partition_accepted or not reconcile else partition)
+
+        candidate_indices = {candidate: index for index, candidate in enumerate(candidates)}
+        remaining.sort(key=candidate_indices.get)
+        if not remaining or not reconcile:
+            return chains, remaining
+
+        reconciled_accepted, remaining = enumerate_func(l7_client, remaining)
+        if reconciled_accepted:
+            chains.append(list(reconciled_accepted))
+
+        return chains, remaining
+
+    def enumerate(self, l7_client, enumerate_func, candidates, reconcile=True):
+        chains, remaining = self.enumerate_chains(l7_client, enumerate_func, candidates, reconcile)
+
+        return list(itertools.chain.from_iterable(chains)), remaining
+
+    @staticmethod
+    def _merge_two_chains(chain, other_chain, choose):
+        merged_chain = []
+        index, other_index = 0, 0
+        while index < len(chain) and other_index < len(other_chain):
+            chosen = choose(chain[index], other_chain[other_index])
+            if chosen is None:
+                return None
+
+            if chosen == other_chain[other_index]:
+                merged_chain.append(other_chain[other_index])
+                other_index += 1
+            else:
+                merged_chain.append(chain[index])
+                index += 1
+
+        return merged_chain + chain[index:] + other_chain[other_index:]
+
+    @classmethod
+    def merge_chains(cls, chains, choose):
+        chains = [list(chain) for chain in chains if chain]
+        while len(chains) > 1:
+            # merging the shortest chains first minimizes the number of comparisons
+            chains.sort(key=len, reverse=True)
+            chain = chains.pop()
+            merged_chain = cls._merge_two_chains(chain, chains.pop(), choose)
+            if merged_chain is None:
+                return None
+
+            chains.append(merged_chain)
+
+        return chains[0] if chains else []
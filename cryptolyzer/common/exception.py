@@ -26,6 +26,10 @@ class NetworkErrorType(enum.Enum):
         short_description='no address',
         long_description='address of the target cannot be resolved',
     )
+    CIRCUIT_OPEN = ErrorParams(
+        short_description='circuit open',
+        long_description='target is skipped after consecutive connection failures',
+    )
 
 
 @attr.s(frozen=True)
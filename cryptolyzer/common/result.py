@@ -9,6 +9,8 @@ from cryptoparser.httpx.version import HttpVersion
 from cryptoparser.ssh.version import SshProtocolVersion
 from cryptoparser.tls.version import TlsProtocolVersion
 
+from cryptolyzer.common.utils import Singleton
+
 
 @attr.s
 class AnalyzerTarget(Serializable):
@@ -92,6 +94,16 @@ class AnalyzerResultError(AnalyzerResultBase):
     error = attr.ib(validator=attr.validators.instance_of(six.string_types))
 
 
+@six.add_metaclass(Singleton)
+class AnalyzerResultStream(object):
+    def __init__(self):
+        self.listener = None
+
+    def emit(self, target, analyzer_name, result):
+        if self.listener is not None:
+            self.listener(target, analyzer_name, result)
+
+
 @attr.s
 class AnalyzerResultAllBase(AnalyzerResultBase):
     def _as_markdown(self, level):
@@ -103,6 +115,8 @@ class AnalyzerResultAllBase(AnalyzerResultBase):
             result += '{} {}\n\n'.format((level + 1) * '#', name_dict[attr_name])
             if (value is None or isinstance(value, (AnalyzerResultBase, AnalyzerTarget))):
                 result += self._as_markdown_without_target(value, level)
+            elif not all(isinstance(item, AnalyzerResultBase) for item in value):
+                result += self._markdown_result(value, level)[1]
             else:
                 for index, cipher_result in enumerate(value):
                     if index:
@@ -128,3 +142,42 @@ class AnalyzerResultSsh(AnalyzerResultBase):
 @attr.s
 class AnalyzerResultHttp(AnalyzerResultBase):
     pass
+
+
+@attr.s
+class AnalyzerResultAddresses(AnalyzerResultBase):
+    results = attr.ib(
+        validator=attr.validators.instance_of(dict),
+        metadata={'human_readable_name': 'Results by IP Address'},
+    )
+    consistent = attr.ib(init=False)
+    address_groups = attr.ib(init=False, metadata={'human_readable_name': 'IP Addresses with Identical Results'})
+
+    @classmethod
+    def _strip_targets(cls, obj):
+        if isinstance(obj, dict):
+            return [(name, cls._strip_targets(value)) for name, value in obj.items() if name != 'target']
+        if isinstance(obj, list):
+            return [cls._strip_targets(item) for item in obj]
+
+        return obj
+
+    @classmethod
+    def _get_comparable(cls, result):
+        # nested results also have targets, which differ only in the IP address
+        return type(result), cls._strip_targets(
+            Serializable._json_traverse(result, Serializable._json_result)  # pylint: disable=protected-access
+        )
+
+    def __attrs_post_init__(self):
+        comparables = []
+        self.address_groups = []
+        for ip, result in self.results.items():
+            comparable = self._get_comparable(result)
+            if comparable in comparables:
+                self.address_groups[comparables.index(comparable)].append(ip)
+            else:
+                comparables.append(comparable)
+                self.address_groups.append([ip])
+
+        self.consistent = len(self.address_groups) <= 1
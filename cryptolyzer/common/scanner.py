@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import ipaddress
+
+from concurrent import futures
+
+import attr
+import six
+
+from cryptodatahub.common.exception import InvalidValue
+
+from cryptoparser.common.exception import InvalidDataLength, InvalidType
+
+from cryptolyzer.common.concurrency import DependencyGraph, KeyedSemaphore
+from cryptolyzer.common.exception import NetworkError, SecurityError
+from cryptolyzer.common.result import AnalyzerResultAddresses, AnalyzerResultError
+from cryptolyzer.common.transfer import L7TransferBase
+from cryptolyzer.common.utils import resolve_address, resolve_addresses
+
+
+def _iter_parallel_ordered(executor, func, items, max_pending_count):
+    pending = collections.deque()
+
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= max_pending_count:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _iter_parallel(executor, func, items, max_pending_count):
+    pending = set()
+
+    try:
+        for item in items:
+            pending.add(executor.submit(func, item))
+            if len(pending) < max_pending_count:
+                continue
+
+            done, pending = futures.wait(pending, return_when=futures.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+        for future in futures.as_completed(pending):
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _get_ip_from_fragment(uri):
+    if uri.fragment:
+        try:
+            return six.text_type(ipaddress.ip_address(six.text_type(uri.fragment)))
+        except ValueError:
+            pass
+
+    return None
+
+
+def _is_network_analyzer(analyzer):
+    return all(issubclass(client, L7TransferBase) for client in analyzer.get_clients())
+
+
+@attr.s(frozen=True)
+class ScanTarget(object):
+    protocol_handler = attr.ib()
+    analyzer = attr.ib()
+    uri = attr.ib()
+    ip = attr.ib(default=None)
+    result = attr.ib(default=None)
+
+    def get_uri(self):
+        if self.ip is None:
+            return self.uri
+
+        return self.uri._replace(fragment=self.ip)
+
+
+@attr.s
+class TargetResolver(object):
+    jobs = attr.ib(default=1, validator=attr.validators.instance_of(six.integer_types))
+    all_addresses = attr.ib(default=False, validator=attr.validators.instance_of(bool))
+
+    def __attrs_post_init__(self):
+        if self.jobs < 1:
+            raise ValueError(self.jobs)
+
+    def _resolve_target(self, uri):
+        if _get_ip_from_fragment(uri) is not None:
+            return uri
+
+        try:
+            _, ip = resolve_address(uri.host, uri.port or 0)
+        except NetworkError as e:
+            return AnalyzerResultError(str(uri), str(e))
+
+        if self.all_addresses:
+            return uri
+
+        return uri._replace(fragment=ip)
+
+    def _resolve_scan_target(self, scan_target):
+        if isinstance(scan_target, AnalyzerResultError) or not _is_network_analyzer(scan_target.analyzer):
+            return scan_target
+
+        uri = self._resolve_target(scan_target.uri)
+        if isinstance(uri, AnalyzerResultError):
+            return attr.evolve(scan_target, result=uri)
+
+        return attr.evolve(scan_target, ip=_get_ip_from_fragment(uri))
+
+    def _resolve(self, resolve_func, items):
+        if self.jobs == 1:
+            for item in items:
+                yield resolve_func(item)
+            return
+
+        executor = futures.ThreadPoolExecutor(max_workers=self.jobs)
+        try:
+            # pylint: disable=use-yield-from  # Python 2 compatibility
+            for result in _iter_parallel_ordered(executor, resolve_func, items, 2 * self.jobs):
+                yield result
+        finally:
+            executor.shutdown(wait=True)
+
+    def resolve(self, targets):
+        return self._resolve(self._resolve_target, targets)
+
+    def resolve_scan_targets(self, scan_targets):
+        return self._resolve(self._resolve_scan_target, scan_targets)
+
+
+@attr.s
+class TargetScanner(object):
+    jobs = attr.ib(default=1, validator=attr.validators.instance_of(six.integer_types))
+    jobs_per_ip = attr.ib(default=None, validator=attr.validators.optional(attr.validators.instance_of(
+        six.integer_types
+    )))
+    resolver = attr.ib(default=None, validator=attr.validators.optional(attr.validators.instance_of(
+        TargetResolver
+    )))
+    all_addresses = attr.ib(default=False, validator=attr.validators.instance_of(bool))
+    _ip_semaphore = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        if self.jobs < 1:
+            raise ValueError(self.jobs)
+
+        if self.jobs_per_ip is not None:
+            self._ip_semaphore = KeyedSemaphore(self.jobs_per_ip)
+
+    @staticmethod
+    def _get_ip(uri):
+        ip = _get_ip_from_fragment(uri)
+        if ip is not None:
+            return ip
+
+        try:
+            _, ip = resolve_address(uri.host, uri.port or 0)
+        except NetworkError:
+            return uri.host
+
+        return ip
+
+    @staticmethod
+    def _analyze(protocol_handler, analyzer, uri):
+        try:
+            return protocol_handler.analyze(analyzer, uri)
+        except (NetworkError, SecurityError, InvalidDataLength, InvalidType, InvalidValue) as e:
+            return AnalyzerResultError(str(uri), str(e))
+
+    def _scan_address(self, protocol_handler, analyzer, uri):
+        if self._ip_semaphore is None:
+            return self._analyze(protocol_handler, analyzer, uri)
+
+        with self._ip_semaphore.hold(self._get_ip(uri)):
+            return self._analyze(protocol_handler, analyzer, uri)
+
+    def _scan_all_addresses(self, protocol_handler, analyzer, uri):
+        try:
+            addresses = resolve_addresses(uri.host, uri.port or 0)
+        except NetworkError as e:
+            return AnalyzerResultError(str(uri), str(e))
+
+        dependency_graph = DependencyGraph(len(addresses))
+        for _, ip in addresses:
+            dependency_graph.add_task(
+                ip,
+                lambda ip=ip: self._scan_address(protocol_handler, analyzer, uri._replace(fragment=ip))
+            )
+
+        return AnalyzerResultAddresses(str(uri), dependency_graph.run())
+
+    def _get_result(self, scan_target):
+        if scan_target.result is not None:
+            return scan_target.result
+
+        protocol_handler, analyzer, uri = scan_target.protocol_handler, scan_target.analyzer, scan_target.get_uri()
+        if self.all_addresses and _is_network_analyzer(analyzer) and _get_ip_from_fragment(uri) is None:
+            return self._scan_all_addresses(protocol_handler, analyzer, uri)
+
+        return self._scan_address(protocol_handler, analyzer, uri)
+
+    def _scan_target(self, scan_target):
+        if isinstance(scan_target, AnalyzerResultError):
+            return None, scan_target
+
+        return scan_target, self._get_result(scan_target)
+
+    def _scan_parallel(self, scan_targets):
+        executor = futures.ThreadPoolExecutor(max_workers=self.jobs)
+
+        try:
+            # pylint: disable=use-yield-from  # Python 2 compatibility
+            for scan_target_result in _iter_parallel(executor, self._scan_target, scan_targets, 2 * self.jobs):
+                yield scan_target_result
+        finally:
+            executor.shutdown(wait=True)
+
+    def scan_target_results(self, scan_targets):
+        if self.resolver is not None:
+            scan_targets = self.resolver.resolve_scan_targets(scan_targets)
+
+        if self.jobs == 1:
+            return (self._scan_target(scan_target) for scan_target in scan_targets)
+
+        return self._scan_parallel(scan_targets)
+
+    def scan_targets(self, scan_targets):
+        return (result for _, result in self.scan_target_results(scan_targets))
+
+    def scan(self, protocol_handler, analyzer, targets):
+        return self.scan_targets(ScanTarget(protocol_handler, analyzer, target) for target in targets)
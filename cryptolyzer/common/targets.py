@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+
+import ipaddress
+import re
+
+import six
+import urllib3
+
+from cryptolyzer.common.analyzer import ProtocolHandlerBase
+from cryptolyzer.common.result import AnalyzerResultError
+from cryptolyzer.common.scanner import ScanTarget
+
+
+COMMENT_REGEX = re.compile(r'(^|\s)#.*$')
+TARGET_REGEX = re.compile(
+    r'^(?P<scheme>[^:/#?\s]+://)?'
+    r'(?P<host>\[[^\]]+\]|[^:/#?\[\s]+(?:/\d+)?)'
+    r'(?::(?P<port_first>\d+)(?:-(?P<port_last>\d+))?)?'
+    r'(?P<rest>[/?#].*)?$'
+)
+
+
+def to_uri(value, default_scheme):
+    if '://' not in value:
+        value = default_scheme + '://' + value
+
+    return urllib3.util.parse_url(value)
+
+
+def _get_network_hosts(host):
+    bracketed = host.startswith('[')
+    if bracketed:
+        host = host[1:-1]
+    if '/' not in host:
+        return None
+
+    try:
+        network = ipaddress.ip_network(six.text_type(host), strict=False)
+    except ValueError:
+        return None
+
+    if network.num_addresses > 2:
+        addresses = network.hosts()
+    else:
+        addresses = iter(network)
+
+    host_format = '[{}]' if network.version == 6 else '{}'
+    return (host_format.format(address) for address in addresses)
+
+
+def _get_ports(port_first, port_last):
+    if port_last is None:
+        return [port_first]
+
+    port_first, port_last = int(port_first), int(port_last)
+    if port_first > port_last or port_last > 65535:
+        raise ValueError('{}-{}'.format(port_first, port_last))
+
+    return six.moves.range(port_first, port_last + 1)
+
+
+def expand_target(value):
+    match = TARGET_REGEX.match(value)
+    if match is None:
+        yield value
+        return
+
+    host = match.group('host')
+    hosts = _get_network_hosts(host)
+    if hosts is None:
+        if match.group('port_last') is None or '/' in host:
+            yield value
+            return
+        hosts = [host]
+
+    ports = _get_ports(match.group('port_first'), match.group('port_last'))
+    for expanded_host in hosts:
+        for port in ports:
+            yield '{}{}{}{}'.format(
+                match.group('scheme') or '',
+                expanded_host,
+                '' if port is None else ':{}'.format(port),
+                match.group('rest') or '',
+            )
+
+
+def _get_protocol_handler_and_analyzer(protocol, analyzer_name):
+    try:
+        protocol_handler = ProtocolHandlerBase.from_protocol(protocol)
+        analyzer = protocol_handler.analyzer_from_name(analyzer_name)
+    except (KeyError, ValueError):
+        return None, None
+
+    return protocol_handler, analyzer
+
+
+def _iter_line_scan_targets(line, protocol_handler, analyzer):
+    fields = line.split()
+    if len(fields) == 3:
+        protocol_handler, analyzer = _get_protocol_handler_and_analyzer(fields[0], fields[1])
+        if analyzer is None:
+            yield AnalyzerResultError(line, 'unsupported protocol or analyzer: {} {}'.format(fields[0], fields[1]))
+            return
+    elif len(fields) != 1:
+        yield AnalyzerResultError(line, 'invalid target line')
+        return
+
+    supported_schemes = set().union(*[client.get_supported_schemes() for client in analyzer.get_clients()])
+    try:
+        for target in expand_target(fields[-1]):
+            try:
+                uri = to_uri(target, analyzer.get_default_scheme())
+            except urllib3.exceptions.LocationParseError:
+                yield AnalyzerResultError(target, 'invalid target')
+                continue
+
+            if uri.scheme in supported_schemes:
+                yield ScanTarget(protocol_handler, analyzer, uri)
+            else:
+                yield AnalyzerResultError(target, 'unsupported protocol: {}'.format(uri.scheme))
+    except ValueError as e:
+        yield AnalyzerResultError(fields[-1], 'invalid port range: {}'.format(e))
+
+
+def iter_scan_targets(lines, protocol_handler, analyzer):
+    for line in lines:
+        line = COMMENT_REGEX.sub('', line).strip()
+        if not line:
+            continue
+
+        # pylint: disable=use-yield-from  # Python 2 compatibility
+        for scan_target in _iter_line_scan_targets(line, protocol_handler, analyzer):
+            yield scan_target
@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 
 import abc
+import errno
+import itertools
 import socket
 import string
+import struct
+import threading
+import time
 
 import ipaddress
 import attr
@@ -11,12 +16,140 @@ import six
 from cryptoparser.common.exception import NotEnoughData
 from cryptoparser.common.utils import get_leaf_classes
 
-from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError
-from cryptolyzer.common.utils import resolve_address
+from cryptolyzer.common.concurrency import (
+    CircuitBreaker,
+    ConnectionLimiter,
+    PreConnectPool,
+    RateLimiter,
+    RttEstimator,
+)
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
+from cryptolyzer.common.utils import Singleton, resolve_address
+
+
+@six.add_metaclass(Singleton)
+class SocketOptions(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._source_addresses = []
+        self._source_address_cycles = {}
+        self.abortive_close = False
+        self.no_delay = False
+
+    @property
+    def source_addresses(self):
+        return list(self._source_addresses)
+
+    @source_addresses.setter
+    def source_addresses(self, value):
+        source_addresses = [ipaddress.ip_address(six.text_type(address)) for address in value]
+        with self._lock:
+            self._source_addresses = [six.text_type(address) for address in source_addresses]
+            self._source_address_cycles = {
+                version: itertools.cycle([
+                    six.text_type(address) for address in source_addresses if address.version == version
+                ])
+                for version in set(address.version for address in source_addresses)
+            }
+
+    def get_source_address(self, ip):
+        try:
+            version = ipaddress.ip_address(six.text_type(ip)).version
+        except ValueError:
+            return None
+
+        with self._lock:
+            source_address_cycle = self._source_address_cycles.get(version)
+            if source_address_cycle is None:
+                return None
+
+            return (next(source_address_cycle), 0)
+
+    def apply(self, l4_socket):
+        if self.no_delay:
+            l4_socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def apply_before_close(self, l4_socket):
+        if self.abortive_close:
+            l4_socket.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+
+
+@attr.s
+class ReceiveBuffer(object):
+    INITIAL_CAPACITY = 4096
+
+    _data = attr.ib(init=False, default=None)
+    _start = attr.ib(init=False, default=0)
+    _end = attr.ib(init=False, default=0)
+
+    def __attrs_post_init__(self):
+        self._data = bytearray(self.INITIAL_CAPACITY)
+
+    def __len__(self):
+        return self._end - self._start
+
+    @property
+    def view(self):
+        return memoryview(self._data)[self._start:self._end]
+
+    def to_bytearray(self):
+        return self._data[self._start:self._end]
+
+    def find(self, sub, start=0):
+        position = self._data.find(sub, self._start + start, self._end)
+        return position if position < 0 else position - self._start
+
+    def get_writable(self, byte_num):
+        if len(self._data) - self._end < byte_num:
+            length = len(self)
+            capacity = max(len(self._data), self.INITIAL_CAPACITY)
+            while capacity < length + byte_num:
+                capacity *= 2
+
+            data = bytearray(capacity)
+            data[:length] = self.view
+            self._data, self._start, self._end = data, 0, length
+
+        return memoryview(self._data)[self._end:self._end + byte_num]
+
+    def commit(self, byte_num):
+        self._end += byte_num
+
+    def extend(self, data):
+        self.get_writable(len(data))[:] = data
+        self.commit(len(data))
+
+    def consume(self, byte_num=None):
+        if byte_num is None or byte_num >= len(self):
+            self._start, self._end = 0, 0
+        else:
+            self._start += byte_num
+
+
+class TransferStepProcessorBase(object):
+    def process_steps(self, steps):
+        exception = None
+        try:
+            while True:
+                try:
+                    if exception is None:
+                        method_name, args = next(steps)
+                    else:
+                        method_name, args = steps.throw(exception)
+                except StopIteration:
+                    break
+
+                try:
+                    getattr(self, method_name)(*args)
+                    exception = None
+                except NotEnoughData as e:
+                    exception = e
+        finally:
+            steps.close()
 
 
 @attr.s
-class L4TransferBase(object):
+class L4TransferBase(TransferStepProcessorBase):
     address = attr.ib(validator=attr.validators.instance_of(six.string_types))
     port = attr.ib(validator=attr.validators.instance_of(int))
     timeout = attr.ib(default=None, validator=attr.validators.optional(attr.validators.instance_of((int, float))))
@@ -26,14 +159,14 @@ class L4TransferBase(object):
     _socket = attr.ib(
         init=False, default=None, validator=attr.validators.optional(attr.validators.instance_of(socket.socket))
     )
-    _buffer = attr.ib(init=False, default=bytearray(), validator=attr.validators.instance_of(bytearray))
+    _buffer = attr.ib(init=False, default=None)
     _family = attr.ib(init=False)
 
     def __attrs_post_init__(self):
         if self.timeout is None:
             self.timeout = self.get_default_timeout()
         self._socket = None
-        self._buffer = bytearray()
+        self._buffer = ReceiveBuffer()
         self._family, self.ip = resolve_address(self.address, self.port, self.ip)
 
     def _close(self):
@@ -52,18 +185,19 @@ class L4TransferBase(object):
 
     @property
     def buffer(self):
-        return bytearray(self._buffer)
+        return self._buffer.to_bytearray()
 
-    def flush_buffer(self, byte_num=None):
-        if byte_num is None:
-            byte_num = len(self._buffer)
+    @property
+    def buffer_view(self):
+        return self._buffer.view
 
-        self._buffer = self._buffer[byte_num:]
+    def flush_buffer(self, byte_num=None):
+        self._buffer.consume(byte_num)
 
     @property
     def buffer_is_plain_text(self):
         try:
-            return all(c in string.printable for c in self._buffer.decode('utf-8'))
+            return all(c in string.printable for c in self._buffer.view.tobytes().decode('utf-8'))
         except UnicodeDecodeError:
             return False
 
@@ -88,6 +222,8 @@ class L4TransferBase(object):
 
 @attr.s
 class L4TransferTCP(L4TransferBase):
+    READ_AHEAD_BYTE_NUM = 4096
+
     def send(self, sendable_bytes):
         total_sent_byte_num = 0
         while total_sent_byte_num < len(sendable_bytes):
@@ -98,54 +234,205 @@ class L4TransferTCP(L4TransferBase):
 
         return total_sent_byte_num
 
+    def _recv_into(self, buffer_view, flags):
+        return self._socket.recv_into(buffer_view, len(buffer_view), flags)
+
     def receive(self, receivable_byte_num, flags=0):
         total_received_byte_num = 0
         while total_received_byte_num < receivable_byte_num:
             try:
-                actual_received_bytes = self._socket.recv(
-                    min(receivable_byte_num - total_received_byte_num, 1024), flags
+                actual_received_byte_num = self._recv_into(
+                    self._buffer.get_writable(receivable_byte_num - total_received_byte_num), flags
                 )
-                self._buffer += actual_received_bytes
-                total_received_byte_num += len(actual_received_bytes)
+                self._buffer.commit(actual_received_byte_num)
+                total_received_byte_num += actual_received_byte_num
             except socket.error:
-                actual_received_bytes = None
+                actual_received_byte_num = 0
 
-            if not actual_received_bytes:
+            if not actual_received_byte_num:
                 raise NotEnoughData(receivable_byte_num - total_received_byte_num)
 
         return total_received_byte_num
 
-    def receive_until(self, terminator, max_line_length=None):
-        terminator_len = len(terminator)
-        total_received_byte_num = self.receive(terminator_len)
+    def _receive_available(self):
+        try:
+            received_byte_num = self._recv_into(self._buffer.get_writable(self.READ_AHEAD_BYTE_NUM), 0)
+            self._buffer.commit(received_byte_num)
+        except socket.error:
+            received_byte_num = 0
 
+        if not received_byte_num:
+            raise NotEnoughData(1)
+
+        return received_byte_num
+
+    def receive_until(self, terminator, max_line_length=None, offset=0):
+        search_offset = offset
         while True:
-            if self._buffer[-terminator_len:] == terminator:
-                break
+            position = self._buffer.find(terminator, search_offset)
+            if position >= 0:
+                line_length = position + len(terminator)
+                if max_line_length is not None and line_length - offset > max_line_length:
+                    raise StopIteration
 
-            total_received_byte_num += self.receive(1)
-            if max_line_length is not None and total_received_byte_num == max_line_length:
+                return line_length
+
+            if max_line_length is not None and len(self._buffer) - offset >= max_line_length:
                 raise StopIteration
 
-        return total_received_byte_num
+            search_offset = max(offset, len(self._buffer) - len(terminator) + 1)
+            self._receive_available()
 
     def receive_line(self, max_line_length=None):
         return self.receive_until(b'\n', max_line_length - 1 if max_line_length is not None else None)
 
+    def read_line(self, max_line_length=None):
+        line_length = self.receive_line(max_line_length)
+        line = self._buffer.view[:line_length].tobytes()
+        self.flush_buffer(line_length)
+
+        return line
+
     @abc.abstractmethod
     def _init_connection(self):
         raise NotImplementedError()
 
 
+@attr.s
 class L4ClientTCP(L4TransferTCP):
+    _connection_limited = attr.ib(init=False, default=False)
+    _data_received = attr.ib(init=False, default=False)
+    _overloaded = attr.ib(init=False, default=False)
+    _failed = attr.ib(init=False, default=False)
+    _request_time = attr.ib(init=False, default=None)
+
+    def _close(self):
+        try:
+            SocketOptions().apply_before_close(self._socket)
+        except (socket.error, socket.timeout):
+            pass
+
+        try:
+            super(L4ClientTCP, self)._close()
+        finally:
+            self._release_connection()
+
+    def signal_overload(self):
+        self._overloaded = True
+
+    def _release_connection(self):
+        if self._connection_limited:
+            if self._overloaded:
+                ConnectionLimiter().signal_overload(self.ip)
+            elif self._data_received:
+                ConnectionLimiter().signal_success(self.ip)
+
+            if self._data_received:
+                CircuitBreaker().record_success(self.ip)
+            elif self._failed:
+                CircuitBreaker().record_failure(self.ip)
+
+            ConnectionLimiter().release(self.ip)
+            self._connection_limited = False
+
+    def _recv_into(self, buffer_view, flags):
+        try:
+            received_byte_num = super(L4ClientTCP, self)._recv_into(buffer_view, flags)
+        except socket.timeout:
+            # a server may silently ignore unsupported requests, so a read timeout is neither a sign of overload
+            # nor of an unavailable target
+            raise
+        except socket.error:
+            self.signal_overload()
+            raise
+
+        if received_byte_num:
+            self._data_received = True
+            if self._request_time is not None:
+                RttEstimator().add_sample(self.ip, time.time() - self._request_time)
+                self._request_time = None
+
+        return received_byte_num
+
+    def _send(self, sendable_bytes):
+        if self._request_time is None:
+            self._request_time = time.time()
+
+        return super(L4ClientTCP, self)._send(sendable_bytes)
+
+    @staticmethod
+    def _connect(ip, port, timeout):
+        RateLimiter().acquire(ip)
+        connect_time = time.time()
+        l4_socket = socket.create_connection(
+            (str(ip), port), RttEstimator().get_timeout(ip, timeout), SocketOptions().get_source_address(ip)
+        )
+        RttEstimator().add_sample(ip, time.time() - connect_time)
+        SocketOptions().apply(l4_socket)
+
+        return l4_socket
+
+    @staticmethod
+    def _pre_connect(ip, port, timeout):
+        # pooled connections are counted by the connection limiter until they are taken over
+        if CircuitBreaker().is_open(ip) or RateLimiter().is_backed_off(ip) or not ConnectionLimiter().try_acquire(ip):
+            return None
+
+        try:
+            return L4ClientTCP._connect(ip, port, timeout)
+        except (socket.error, socket.timeout):
+            ConnectionLimiter().signal_overload(ip)
+            ConnectionLimiter().release(ip)
+            CircuitBreaker().record_failure(ip)
+            raise
+
+    @staticmethod
+    def _is_alive(l4_socket):
+        try:
+            l4_socket.settimeout(0)
+            return l4_socket.recv(1, socket.MSG_PEEK) != b''
+        except socket.error as e:
+            return e.errno in (errno.EAGAIN, errno.EWOULDBLOCK)
+
     def _init_connection(self):
+        if not CircuitBreaker().allow(self.ip):
+            raise NetworkError(NetworkErrorType.CIRCUIT_OPEN)
+
+        ConnectionLimiter().acquire(self.ip)
+        self._connection_limited = True
+        self._data_received = False
+        self._overloaded = False
+        self._failed = False
+        self._request_time = None
+
+        connected = False
+        pool_key = (six.text_type(self.ip), self.port)
         try:
-            self._socket = socket.create_connection((str(self.ip), self.port), self.timeout)
+            if RateLimiter().is_backed_off(self.ip):
+                # pooled connections were opened before the server asked to slow down
+                PreConnectPool().discard(pool_key)
+                self._socket = None
+            else:
+                self._socket = PreConnectPool().get(
+                    pool_key,
+                    lambda ip=self.ip, port=self.port, timeout=self.timeout: self._pre_connect(ip, port, timeout),
+                    self._is_alive,
+                    lambda connection, ip=self.ip: ConnectionLimiter().release(ip)
+                )
+            if self._socket is None:
+                self._socket = self._connect(self.ip, self.port, self.timeout)
+            self._socket.settimeout(RttEstimator().get_timeout(self.ip, self.timeout))
+            connected = True
         except BaseException as e:  # pylint: disable=broad-except
             if e.__class__.__name__ == 'ConnectionRefusedError' or isinstance(e, (socket.error, socket.timeout)):
+                self._failed = True
+                self.signal_overload()
                 six.raise_from(NetworkError(NetworkErrorType.NO_CONNECTION), e)
 
             raise e
+        finally:
+            if not connected:
+                self._release_connection()
 
     @classmethod
     def get_default_timeout(cls):
@@ -189,7 +476,7 @@ class L4ServerTCP(L4TransferTCP):
 
 
 @attr.s
-class L7TransferBase(object):
+class L7TransferBase(TransferStepProcessorBase):
     address = attr.ib(validator=attr.validators.instance_of(six.string_types))
     port = attr.ib(default=None, validator=attr.validators.optional(attr.validators.instance_of(int)))
     timeout = attr.ib(default=None, validator=attr.validators.optional(attr.validators.instance_of((float, int))))
@@ -210,6 +497,9 @@ class L7TransferBase(object):
         self._family, self.ip = resolve_address(self.address, self.port, self.ip)
         self.l4_transfer = None
 
+    def clone(self):
+        return attr.evolve(self)
+
     def send(self, sendable_bytes):
         return self.l4_transfer.send(sendable_bytes)
 
@@ -223,6 +513,10 @@ class L7TransferBase(object):
     def buffer(self):
         return self.l4_transfer.buffer
 
+    @property
+    def buffer_view(self):
+        return self.l4_transfer.buffer_view
+
     @property
     def buffer_is_plain_text(self):
         return self.l4_transfer.buffer_is_plain_text
@@ -261,7 +555,8 @@ class L7TransferBase(object):
     def init_connection(self):
         try:
             self._init_connection()
-        except (SecurityError, NetworkError):
+        except BaseException:
+            # any escaping error must release the connection slot of the L4 transfer
             self._close_connection()
             raise
 
@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import attr
+import six
+
+from cryptoparser.common.exception import NotEnoughData
+
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
+from cryptolyzer.common.transfer import L4TransferBase, L7TransferBase
+
+
+@attr.s
+class L4ClientTCPAsync(L4TransferBase):
+    READ_AHEAD_BYTE_NUM = 4096
+
+    _reader = attr.ib(init=False, default=None)
+    _writer = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        if self.ip is None:
+            raise ValueError('ip address must be resolved before connecting asynchronously')
+
+        super(L4ClientTCPAsync, self).__attrs_post_init__()
+
+    def _close(self):
+        try:
+            self._writer.close()
+        except OSError:
+            pass
+
+    def close(self):
+        if self._writer is not None:
+            self._close()
+            self._reader = None
+            self._writer = None
+
+    def _send(self, sendable_bytes):
+        self._writer.write(sendable_bytes)
+        return len(sendable_bytes)
+
+    def send(self, sendable_bytes):
+        return self._send(sendable_bytes)
+
+    async def _drain(self):
+        try:
+            await self._writer.drain()
+        except OSError as e:
+            six.raise_from(NetworkError(NetworkErrorType.NO_CONNECTION), e)
+
+    async def receive(self, receivable_byte_num):
+        await self._drain()
+
+        total_received_byte_num = 0
+        while total_received_byte_num < receivable_byte_num:
+            try:
+                actual_received_bytes = await asyncio.wait_for(
+                    self._reader.read(min(receivable_byte_num - total_received_byte_num, 1024)), self.timeout
+                )
+                self._buffer.extend(actual_received_bytes)
+                total_received_byte_num += len(actual_received_bytes)
+            except (asyncio.TimeoutError, OSError):
+                actual_received_bytes = None
+
+            if not actual_received_bytes:
+                raise NotEnoughData(receivable_byte_num - total_received_byte_num)
+
+        return total_received_byte_num
+
+    async def _receive_available(self):
+        await self._drain()
+
+        try:
+            received_bytes = await asyncio.wait_for(self._reader.read(self.READ_AHEAD_BYTE_NUM), self.timeout)
+        except (asyncio.TimeoutError, OSError):
+            received_bytes = None
+
+        if not received_bytes:
+            raise NotEnoughData(1)
+
+        self._buffer.extend(received_bytes)
+        return len(received_bytes)
+
+    async def receive_until(self, terminator, max_line_length=None, offset=0):
+        search_offset = offset
+        while True:
+            position = self._buffer.find(terminator, search_offset)
+            if position >= 0:
+                line_length = position + len(terminator)
+                if max_line_length is not None and line_length - offset > max_line_length:
+                    raise NetworkError(NetworkErrorType.NO_RESPONSE)
+
+                return line_length
+
+            if max_line_length is not None and len(self._buffer) - offset >= max_line_length:
+                raise NetworkError(NetworkErrorType.NO_RESPONSE)
+
+            search_offset = max(offset, len(self._buffer) - len(terminator) + 1)
+            await self._receive_available()
+
+    async def receive_line(self, max_line_length=None):
+        return await self.receive_until(b'\n', max_line_length - 1 if max_line_length is not None else None)
+
+    async def process_steps(self, steps):  # pylint: disable=invalid-overridden-method
+        exception = None
+        try:
+            while True:
+                try:
+                    if exception is None:
+                        method_name, args = next(steps)
+                    else:
+                        method_name, args = steps.throw(exception)
+                except StopIteration:
+                    break
+
+                try:
+                    await getattr(self, method_name)(*args)
+                    exception = None
+                except NotEnoughData as e:
+                    exception = e
+        finally:
+            steps.close()
+
+    async def init_connection(self, _socket=None):  # pylint: disable=invalid-overridden-method
+        self.close()
+
+        await self._init_connection()
+
+    async def _init_connection(self):  # pylint: disable=invalid-overridden-method
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(str(self.ip), self.port), self.timeout
+            )
+        except (asyncio.TimeoutError, OSError) as e:
+            six.raise_from(NetworkError(NetworkErrorType.NO_CONNECTION), e)
+
+    @classmethod
+    def get_default_timeout(cls):
+        return 5
+
+
+@attr.s
+class L7TransferAsyncBase(object):
+    l7_transfer = attr.ib(validator=attr.validators.instance_of(L7TransferBase))
+    l4_transfer = attr.ib(
+        init=False, default=None, validator=attr.validators.optional(attr.validators.instance_of(L4ClientTCPAsync))
+    )
+
+    @property
+    def address(self):
+        return self.l7_transfer.address
+
+    @property
+    def port(self):
+        return self.l7_transfer.port
+
+    @property
+    def timeout(self):
+        return self.l7_transfer.timeout
+
+    @property
+    def ip(self):
+        return self.l7_transfer.ip
+
+    async def init_connection(self):
+        self._close_connection()
+
+        self.l4_transfer = L4ClientTCPAsync(self.address, self.port, self.timeout, self.ip)
+        try:
+            await self.l4_transfer.init_connection()
+        except NetworkError:
+            self._close_connection()
+            raise
+
+    def _close_connection(self):
+        if self.l4_transfer:
+            self.l4_transfer.close()
+            self.l4_transfer = None
+
+    async def process_steps(self, get_steps, *args):
+        await self.init_connection()
+
+        try:
+            await self.l4_transfer.process_steps(get_steps(self.l4_transfer, *args))
+        finally:
+            self._close_connection()
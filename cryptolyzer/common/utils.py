@@ -4,6 +4,10 @@ import ipaddress
 import logging
 import socket
 import sys
+import threading
+import time
+
+from collections import OrderedDict
 
 import six
 
@@ -23,6 +27,8 @@ class Singleton(type):
 @six.add_metaclass(Singleton)
 class LogSingleton(logging.Logger):
     def __init__(self):
+        self._thread_local = threading.local()
+
         super(LogSingleton, self).__init__(__setup__.__name__)
 
         formatter = logging.Formatter(fmt='%(asctime)s %(message)s', datefmt='%Y-%m-%dT%H:%M:%S%z')
@@ -33,6 +39,81 @@ class LogSingleton(logging.Logger):
 
         self.addHandler(handler)
 
+    @property
+    def disabled(self):
+        return getattr(self._thread_local, 'disabled', False)
+
+    @disabled.setter
+    def disabled(self, value):
+        self._thread_local.disabled = value
+
+
+@six.add_metaclass(Singleton)
+class ResolverCache(object):
+    DEFAULT_TTL = 300
+    MAX_ENTRY_COUNT = 65536
+
+    def __init__(self):
+        self.ttl = self.DEFAULT_TTL
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _resolve(address, port):
+        try:
+            addresses = [
+                (addrinfo[0], addrinfo[4][0])
+                for addrinfo in socket.getaddrinfo(address, port, 0, socket.SOCK_STREAM)
+            ]
+        except socket.gaierror as e:
+            six.raise_from(NetworkError(NetworkErrorType.NO_ADDRESS), e)
+        if not addresses:
+            raise NetworkError(NetworkErrorType.NO_ADDRESS)
+
+        return addresses
+
+    def get_addresses(self, address, port):
+        now = time.time()
+        with self._lock:
+            expiry, addresses = self._entries.get(address, (0, None))
+            if expiry > now:
+                return list(addresses)
+
+        addresses = self._resolve(address, port)
+        if self.ttl > 0:
+            with self._lock:
+                self._add_entry(address, now, addresses)
+
+        return list(addresses)
+
+    def _add_entry(self, address, now, addresses):
+        # entries are kept in the order of their expiry as the ttl is the same for all of them
+        self._entries.pop(address, None)
+        self._entries[address] = (now + self.ttl, addresses)
+
+        while self._entries:
+            expiry, _ = next(iter(self._entries.values()))
+            if expiry > now and len(self._entries) <= self.MAX_ENTRY_COUNT:
+                break
+
+            self._entries.popitem(last=False)
+
+    def invalidate(self, address=None):
+        with self._lock:
+            if address is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(address, None)
+
+
+def resolve_addresses(address, port):
+    addresses = []
+    for family, ip in ResolverCache().get_addresses(address, port):
+        if (family, ip) not in addresses:
+            addresses.append((family, ip))
+
+    return addresses
+
 
 def resolve_address(address, port, ip=None):
     if ip:
@@ -41,18 +122,8 @@ def resolve_address(address, port, ip=None):
         except ValueError as e:
             six.raise_from(NetworkError(NetworkErrorType.NO_ADDRESS), e)
 
-    try:
-        addresses = [
-            (addrinfo[0], addrinfo[4][0])
-            for addrinfo in socket.getaddrinfo(address, port, 0, socket.SOCK_STREAM)
-        ]
-    except socket.gaierror as e:
-        six.raise_from(NetworkError(NetworkErrorType.NO_ADDRESS), e)
-    if not addresses:
-        raise NetworkError(NetworkErrorType.NO_ADDRESS)
-
-    if not ip:
-        family = addresses[0][0]
-        ip = addresses[0][1]
+        return family, ip
+
+    family, ip = ResolverCache().get_addresses(address, port)[0]
 
     return family, ip
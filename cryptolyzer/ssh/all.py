@@ -1,13 +1,16 @@
 # -*- coding: utf-8 -*-
 
 import attr
+import six
 
 from cryptodatahub.common.algorithm import KeyExchange
 
 from cryptoparser.ssh.version import SshProtocolVersion, SshVersion
 
 from cryptolyzer.common.analyzer import AnalyzerSshBase
-from cryptolyzer.common.result import AnalyzerResultAllBase, AnalyzerTargetSsh
+from cryptolyzer.common.concurrency import CircuitBreaker
+from cryptolyzer.common.exception import NetworkError
+from cryptolyzer.common.result import AnalyzerResultAllBase, AnalyzerResultStream, AnalyzerTargetSsh
 
 from cryptolyzer.ssh.ciphers import AnalyzerCiphers, AnalyzerResultCiphers
 from cryptolyzer.ssh.dhparams import AnalyzerDHParams, AnalyzerResultDHParams
@@ -33,6 +36,11 @@ class AnalyzerResultAll(AnalyzerResultAllBase):
         validator=attr.validators.optional(attr.validators.instance_of(AnalyzerResultPublicKeys)),
         metadata={'human_readable_name': 'Supported Host Key Types'}
     )
+    interrupted = attr.ib(
+        default=attr.Factory(list),
+        validator=attr.validators.deep_iterable(member_validator=attr.validators.instance_of(six.string_types)),
+        metadata={'human_readable_name': 'Analyzers Interrupted by Unavailable Target'}
+    )
 
 
 class AnalyzerAll(AnalyzerSshBase):
@@ -75,16 +83,46 @@ class AnalyzerAll(AnalyzerSshBase):
         protocol_version = AnalyzerAll.is_dhe_supported(cipher_suite_results)
         return AnalyzerAll._get_result(AnalyzerDHParams, analyzable, protocol_version)
 
-    def analyze(self, analyzable):
-        results = {
-            'target': AnalyzerTargetSsh.from_l7_client(analyzable),
-        }
-
-        results.update(self.get_versions_result(analyzable))
+    @staticmethod
+    def _get_interruptible_result(analyzable, interrupted, analyzer_name, get_result):
+        try:
+            return get_result()
+        except NetworkError as e:
+            if not CircuitBreaker().is_interrupted(analyzable.ip, e):
+                raise e
 
-        ciphers_result = AnalyzerCiphers().analyze(analyzable)
-        results.update({AnalyzerCiphers.get_name(): ciphers_result})
-        results.update(self.get_dhparams_result(analyzable, ciphers_result))
-        results.update({AnalyzerPublicKeys.get_name(): AnalyzerPublicKeys().analyze(analyzable)})
+        interrupted.append(analyzer_name)
+        return {analyzer_name: None}
 
-        return AnalyzerResultAll(**results)
+    def analyze(self, analyzable):
+        target = AnalyzerTargetSsh.from_l7_client(analyzable)
+        results = {}
+        interrupted = []
+
+        def update_results(analyzer_name, get_result):
+            result = self._get_interruptible_result(analyzable, interrupted, analyzer_name, get_result)
+            for name, analyzer_result in result.items():
+                AnalyzerResultStream().emit(target, name, analyzer_result)
+            results.update(result)
+
+        update_results(AnalyzerVersions.get_name(), lambda: self.get_versions_result(analyzable))
+        update_results(
+            AnalyzerCiphers.get_name(),
+            lambda: {AnalyzerCiphers.get_name(): AnalyzerCiphers().analyze(analyzable)}
+        )
+
+        ciphers_result = results[AnalyzerCiphers.get_name()]
+        update_results(
+            AnalyzerDHParams.get_name(),
+            lambda: (
+                {AnalyzerDHParams.get_name(): None}
+                if ciphers_result is None
+                else self.get_dhparams_result(analyzable, ciphers_result)
+            )
+        )
+        update_results(
+            AnalyzerPublicKeys.get_name(),
+            lambda: {AnalyzerPublicKeys.get_name(): AnalyzerPublicKeys().analyze(analyzable)}
+        )
+
+        return AnalyzerResultAll(target=target, interrupted=interrupted, **results)
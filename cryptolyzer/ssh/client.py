@@ -326,7 +326,7 @@ class SshClientHandshake(SshHandshakeBase):
 
         return SshRecordKexDHGroup
 
-    def do_handshake(
+    def get_handshake_steps(
             self,
             transfer,
             protocol_message,
@@ -334,9 +334,13 @@ class SshClientHandshake(SshHandshakeBase):
             gex_params,
             last_message_type,
     ):  # pylint: disable=too-many-arguments
-        self.server_messages = self.do_key_exchange_init(
-            transfer, protocol_message, key_exchange_init_message, last_message_type
-        )
+        self.server_messages = {}
+        # pylint: disable=use-yield-from  # Python 2 compatibility
+        for step in self.get_key_exchange_init_steps(
+                transfer, protocol_message, key_exchange_init_message, last_message_type, self.server_messages
+        ):
+            yield step
+
         if last_message_type in self.server_messages:
             return
 
@@ -344,7 +348,7 @@ class SshClientHandshake(SshHandshakeBase):
 
         while True:
             try:
-                record, parsed_length = record_class.parse_immutable(transfer.buffer)
+                record, parsed_length = record_class.parse_immutable(transfer.buffer_view.tobytes())
                 transfer.flush_buffer(parsed_length)
 
                 if isinstance(record.packet, SshDisconnectMessage):
@@ -370,6 +374,18 @@ class SshClientHandshake(SshHandshakeBase):
                 continue
 
             try:
-                transfer.receive(receivable_byte_num)
+                yield 'receive', (receivable_byte_num, )
             except NotEnoughData as e:
                 six.raise_from(NetworkError(NetworkErrorType.NO_RESPONSE), e)
+
+    def do_handshake(
+            self,
+            transfer,
+            protocol_message,
+            key_exchange_init_message,
+            gex_params,
+            last_message_type,
+    ):  # pylint: disable=too-many-arguments
+        transfer.process_steps(self.get_handshake_steps(
+            transfer, protocol_message, key_exchange_init_message, gex_params, last_message_type
+        ))
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+import attr
+
+from cryptoparser.ssh.subprotocol import SshKeyExchangeInit
+
+from cryptolyzer.common.transfer_async import L7TransferAsyncBase
+from cryptolyzer.ssh.client import (
+    L7ClientSsh,
+    L7ServerSshGexParams,
+    SshClientHandshake,
+    SshKeyExchangeInitAnyAlgorithm,
+    SshProtocolMessageDefault,
+)
+
+
+@attr.s
+class L7ClientSshAsync(L7TransferAsyncBase):
+    l7_transfer = attr.ib(validator=attr.validators.instance_of(L7ClientSsh))
+
+    async def do_handshake(
+            self,
+            protocol_message=SshProtocolMessageDefault(),
+            key_exchange_init_message=SshKeyExchangeInitAnyAlgorithm(),
+            gex_params=L7ServerSshGexParams(),
+            last_message_type=SshKeyExchangeInit.get_message_code(),
+    ):
+        ssh_client = SshClientHandshake()
+        await self.process_steps(
+            ssh_client.get_handshake_steps,
+            protocol_message,
+            key_exchange_init_message,
+            gex_params,
+            last_message_type,
+        )
+
+        return ssh_client.server_messages
@@ -14,22 +14,48 @@ class SshHandshakeBase(object):
     server_messages = attr.ib(init=False, default={})
 
     @staticmethod
-    def exchange_version(transfer, protocol_message):
+    def _get_exchange_version_steps(transfer, protocol_message):
         transfer.send(protocol_message.compose())
 
-        transfer.receive_line(256)
-        parser = ParserText(transfer.buffer)
+        yield 'receive_line', (256, )
+
+    @staticmethod
+    def _parse_protocol_message(transfer):
+        parser = ParserText(transfer.buffer_view.tobytes())
         parser.parse_parsable('protocol_message', SshProtocolMessage)
 
         return parser
 
-    def do_key_exchange_init(self, transfer, protocol_message, key_exchange_init_message, last_handshake_message_type):
-        parser = self.exchange_version(transfer, protocol_message)
-        received_messages = {SshProtocolMessage: parser['protocol_message']}
+    @classmethod
+    def exchange_version(cls, transfer, protocol_message):
+        transfer.process_steps(cls._get_exchange_version_steps(transfer, protocol_message))
+
+        return cls._parse_protocol_message(transfer)
+
+    def get_key_exchange_init_steps(
+            self,
+            transfer,
+            protocol_message,
+            key_exchange_init_message,
+            last_handshake_message_type,
+            received_messages
+    ):  # pylint: disable=too-many-arguments
+        # pylint: disable=use-yield-from  # Python 2 compatibility
+        for step in self._get_exchange_version_steps(transfer, protocol_message):
+            yield step
+
+        parser = self._parse_protocol_message(transfer)
+        received_messages[SshProtocolMessage] = parser['protocol_message']
         if last_handshake_message_type == SshProtocolMessage:
-            return received_messages
+            return
 
         transfer.flush_buffer(parser.parsed_length)
         transfer.send(SshRecordInit(key_exchange_init_message).compose())
 
+    def do_key_exchange_init(self, transfer, protocol_message, key_exchange_init_message, last_handshake_message_type):
+        received_messages = {}
+        transfer.process_steps(self.get_key_exchange_init_steps(
+            transfer, protocol_message, key_exchange_init_message, last_handshake_message_type, received_messages
+        ))
+
         return received_messages
@@ -1,19 +1,25 @@
 # -*- coding: utf-8 -*-
 
-from collections import OrderedDict
-
 import itertools
 
+from collections import OrderedDict
+
 import attr
+import six
 
 from cryptodatahub.common.algorithm import Authentication, KeyExchange
 
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
 from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase, ProtocolHandlerBase
-from cryptolyzer.common.result import AnalyzerResultAllBase, AnalyzerTargetTls
+from cryptolyzer.common.bitset import TlsCipherSuiteBitSet
+from cryptolyzer.common.concurrency import CircuitBreaker, DependencyGraph, EliminationEngine
+from cryptolyzer.common.exception import NetworkError
+from cryptolyzer.common.result import AnalyzerResultAllBase, AnalyzerResultStream, AnalyzerTargetTls
 
 from cryptolyzer.tls.ciphers import AnalyzerCipherSuites, AnalyzerResultCipherSuites
+from cryptolyzer.tls.ciphersuite import get_cipher_suite_set
 from cryptolyzer.tls.curves import AnalyzerCurves, AnalyzerResultCurves
 from cryptolyzer.tls.dhparams import AnalyzerDHParams, AnalyzerResultDHParams
 from cryptolyzer.tls.extensions import AnalyzerExtensions, AnalyzerResultExtensions
@@ -69,6 +75,11 @@ class AnalyzerResultAll(AnalyzerResultAllBase):  # pylint: disable=too-few-publi
         validator=attr.validators.optional(attr.validators.instance_of(AnalyzerResultVulnerabilities)),
         metadata={'human_readable_name': 'Vulnerabilities'}
     )
+    interrupted = attr.ib(
+        default=attr.Factory(list),
+        validator=attr.validators.deep_iterable(member_validator=attr.validators.instance_of(six.string_types)),
+        metadata={'human_readable_name': 'Analyzers Interrupted by Unavailable Target'}
+    )
 
 
 class AnalyzerAll(AnalyzerTlsBase):
@@ -101,9 +112,17 @@ class AnalyzerAll(AnalyzerTlsBase):
 
         return {analyzer_name: analyzer_class().analyze(analyzable, None)}
 
+    @staticmethod
+    def _get_versions(versions_result):
+        result = versions_result[AnalyzerVersions.get_name()]
+        return [] if result is None else result.versions
+
     @staticmethod
     def _is_key_exchange_supported(cipher_suites, key_exchange):
-        return any(map(lambda cipher_suite: cipher_suite.value.key_exchange == key_exchange, cipher_suites))
+        cipher_suite_set = TlsCipherSuiteBitSet.from_iterable(filter(
+            lambda cipher_suite: isinstance(cipher_suite, TlsCipherSuite), cipher_suites
+        ))
+        return bool(cipher_suite_set & get_cipher_suite_set(key_exchanges=[key_exchange]))
 
     @staticmethod
     def _min_tls_version_supported(cipher_suite_results, key_exchange):
@@ -222,36 +241,147 @@ class AnalyzerAll(AnalyzerTlsBase):
 
         return AnalyzerAll._get_result(AnalyzerExtensions, analyzable, protocol_version)
 
-    def analyze(self, analyzable, protocol_version):
-        results = {
-            'target': AnalyzerTargetTls.from_l7_client(analyzable, protocol_version),
-        }
+    @staticmethod
+    def _get_seed_version(protocol_version, versions):
+        # SSL 2.0 cipher kinds and TLS 1.3 cipher suites cannot be seeded by any other version
+        if protocol_version.version == TlsVersion.SSL2 or protocol_version >= TlsProtocolVersion(TlsVersion.TLS1_2):
+            return None
+
+        higher_versions = [
+            version
+            for version in versions
+            if (version.version != TlsVersion.SSL2 and
+                protocol_version < version <= TlsProtocolVersion(TlsVersion.TLS1_2))
+        ]
+        return min(higher_versions) if higher_versions else None
+
+    @staticmethod
+    def get_cipher_suite_results(analyzable, versions):
+        dependency_graph = DependencyGraph()
+        cross_version_seeding = EliminationEngine().cross_version_seeding
+        # seeding versions must be added before the seeded ones
+        for protocol_version in sorted(versions, reverse=True):
+            seed_version = AnalyzerAll._get_seed_version(protocol_version, versions) if cross_version_seeding else None
+            if seed_version is None:
+                dependency_graph.add_task(
+                    protocol_version,
+                    lambda protocol_version=protocol_version: AnalyzerCipherSuites().analyze(
+                        analyzable.clone(), protocol_version
+                    )
+                )
+            else:
+                dependency_graph.add_task(
+                    protocol_version,
+                    lambda seed_result, protocol_version=protocol_version: AnalyzerCipherSuites().analyze_seeded(
+                        analyzable.clone(), protocol_version, seed_result.cipher_suites
+                    ),
+                    (seed_version, )
+                )
+
+        results = dependency_graph.run()
+        return OrderedDict([(protocol_version, results[protocol_version]) for protocol_version in versions])
 
-        results.update(self.get_versions_result(analyzable))
-        versions = results[AnalyzerVersions.get_name()].versions
+    @staticmethod
+    def _add_interruptible_task(
+            analyzable, dependency_graph, interrupted, name, func, dependencies=(), interrupted_result=None
+    ):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        def get_result(*dependency_results):
+            try:
+                return func(*dependency_results)
+            except NetworkError as e:
+                if not CircuitBreaker().is_interrupted(analyzable.ip, e):
+                    raise e
+
+            interrupted.append(name)
+            return {name: None} if interrupted_result is None else interrupted_result
+
+        dependency_graph.add_task(name, get_result, dependencies)
+
+    @staticmethod
+    def _get_dependency_graph(analyzable, interrupted):
+        dependency_graph = DependencyGraph()
+
+        AnalyzerAll._add_interruptible_task(
+            analyzable, dependency_graph, interrupted,
+            AnalyzerVersions.get_name(),
+            lambda: AnalyzerAll.get_versions_result(analyzable.clone()),
+        )
+        AnalyzerAll._add_interruptible_task(
+            analyzable, dependency_graph, interrupted,
+            AnalyzerCipherSuites.get_name(),
+            lambda versions_result: AnalyzerAll.get_cipher_suite_results(
+                analyzable, AnalyzerAll._get_versions(versions_result)
+            ),
+            (AnalyzerVersions.get_name(), ),
+            OrderedDict()
+        )
+
+        for analyzer_class, get_result in (
+                (AnalyzerDHParams, AnalyzerAll.get_dhparams_result),
+                (AnalyzerPublicKeys, AnalyzerAll.get_pubkeys_result),
+                (AnalyzerCurves, AnalyzerAll.get_curves_result),
+        ):
+            AnalyzerAll._add_interruptible_task(
+                analyzable, dependency_graph, interrupted,
+                analyzer_class.get_name(),
+                lambda cipher_suite_results, get_result=get_result: get_result(
+                    analyzable.clone(), cipher_suite_results
+                ),
+                (AnalyzerCipherSuites.get_name(), )
+            )
+
+        for analyzer_class, get_result in (
+                (AnalyzerPublicKeyRequest, AnalyzerAll.get_pubkeyreq_result),
+                (AnalyzerSigAlgos, AnalyzerAll.get_sigalgos_result),
+                (AnalyzerExtensions, AnalyzerAll.get_extensions_result),
+        ):
+            AnalyzerAll._add_interruptible_task(
+                analyzable, dependency_graph, interrupted,
+                analyzer_class.get_name(),
+                lambda versions_result, get_result=get_result: get_result(
+                    analyzable.clone(), AnalyzerAll._get_versions(versions_result)
+                ),
+                (AnalyzerVersions.get_name(), )
+            )
 
-        cipher_suite_results = OrderedDict([
-            (protocol_version, AnalyzerCipherSuites().analyze(analyzable, protocol_version))
-            for protocol_version in versions
-        ])
+        AnalyzerAll._add_interruptible_task(
+            analyzable, dependency_graph, interrupted,
+            AnalyzerSimulations.get_name(),
+            lambda: AnalyzerAll.get_simulations_result(analyzable.clone()),
+        )
 
-        dhparams_result = self.get_dhparams_result(analyzable, cipher_suite_results)
-        dhparams = dhparams_result[AnalyzerDHParams.get_name()]
+        return dependency_graph
+
+    @staticmethod
+    def _emit_result(target, name, result):
+        if name == AnalyzerCipherSuites.get_name():
+            result = {name: list(result.values())}
+
+        for analyzer_name, analyzer_result in result.items():
+            AnalyzerResultStream().emit(target, analyzer_name, analyzer_result)
+
+    def analyze(self, analyzable, protocol_version):
+        target = AnalyzerTargetTls.from_l7_client(analyzable, protocol_version)
+        results = {'target': target}
+        interrupted = []
+
+        graph_results = self._get_dependency_graph(analyzable, interrupted).run(
+            lambda name, result: self._emit_result(target, name, result)
+        )
+        cipher_suite_results = graph_results.pop(AnalyzerCipherSuites.get_name())
+        for result in graph_results.values():
+            results.update(result)
+        versions = self._get_versions(results)
+
+        dhparams = results[AnalyzerDHParams.get_name()]
         if dhparams is not None:
             dhparam = dhparams.dhparam
             groups = dhparams.groups
         else:
             dhparam = None
             groups = []
-        results.update(dhparams_result)
-
-        results.update(self.get_pubkeyreq_result(analyzable, versions))
-        results.update(self.get_pubkeys_result(analyzable, cipher_suite_results))
-        results.update(self.get_curves_result(analyzable, cipher_suite_results))
-        results.update(self.get_sigalgos_result(analyzable, versions))
-        results.update(self.get_simulations_result(analyzable))
-        results.update(self.get_extensions_result(analyzable, versions))
-        results.update({
+
+        vulnerabilities_result = {
             AnalyzerVulnerabilities.get_name():
             AnalyzerResultVulnerabilities.from_results(
                 target=analyzable,
@@ -262,7 +392,9 @@ class AnalyzerAll(AnalyzerTlsBase):
                 dhparam=dhparam,
                 groups=groups,
             )
-        })
+        }
+        self._emit_result(target, AnalyzerVulnerabilities.get_name(), vulnerabilities_result)
+        results.update(vulnerabilities_result)
         results.update({AnalyzerCipherSuites.get_name(): list(cipher_suite_results.values())})
 
-        return AnalyzerResultAll(**results)
+        return AnalyzerResultAll(interrupted=sorted(interrupted), **results)
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 import copy
-import time
+import itertools
 import six
 
 import attr
@@ -11,9 +11,11 @@ from cryptoparser.tls.subprotocol import TlsCipherSuiteVector, TlsHandshakeType,
 from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase
+from cryptolyzer.common.concurrency import EliminationEngine, RateLimiter
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
 from cryptolyzer.common.utils import LogSingleton
+from cryptolyzer.tls.ciphersuite import get_cipher_suites
 from cryptolyzer.tls.client import (
     SslHandshakeClientHelloAnyAlgorithm,
     TlsHandshakeClientHelloSpecalization,
@@ -35,6 +37,9 @@ class AnalyzerResultCipherSuites(AnalyzerResultTls):  # pylint: disable=too-few-
 
 
 class AnalyzerCipherSuites(AnalyzerTlsBase):
+    _INTERNAL_ERROR_BACKOFF_DELAY = 5
+    _INTERNAL_ERROR_RETRY_DELAY = 1
+
     @classmethod
     def get_name(cls):
         return 'ciphers'
@@ -54,7 +59,6 @@ class AnalyzerCipherSuites(AnalyzerTlsBase):
             if retried_internal_error:
                 raise alert
 
-            time.sleep(5)
             raise OverflowError
 
         if alert.description in AnalyzerCipherSuites._ACCEPTABLE_HANDSHAKE_FAILURE_ALERTS:
@@ -101,7 +105,7 @@ class AnalyzerCipherSuites(AnalyzerTlsBase):
         while remaining_cipher_suites:
             try:
                 if retried_internal_error:
-                    time.sleep(1)
+                    RateLimiter().backoff(l7_client.ip, cls._INTERNAL_ERROR_RETRY_DELAY)
 
                 cls._next_accepted_cipher_suites(
                     l7_client, protocol_version, remaining_cipher_suites, accepted_cipher_suites
@@ -119,6 +123,7 @@ class AnalyzerCipherSuites(AnalyzerTlsBase):
                 except StopIteration:
                     break
                 except OverflowError:
+                    RateLimiter().backoff(l7_client.ip, cls._INTERNAL_ERROR_BACKOFF_DELAY)
                     retried_internal_error = True
                     continue
             except NetworkError as e:
@@ -136,13 +141,54 @@ class AnalyzerCipherSuites(AnalyzerTlsBase):
 
     @classmethod
     def _get_accepted_cipher_suites_all(cls, l7_client, protocol_version, checkable_cipher_suites):
-        return cls._get_accepted_cipher_suites(
-            l7_client, protocol_version, checkable_cipher_suites
+        if protocol_version.version == TlsVersion.SSL2:
+            accepted_cipher_suites, remaining_cipher_suites = cls._get_accepted_cipher_suites(
+                l7_client, protocol_version, checkable_cipher_suites
+            )
+            return [accepted_cipher_suites] if accepted_cipher_suites else [], remaining_cipher_suites
+
+        return EliminationEngine().enumerate_chains(
+            l7_client,
+            lambda l7_client, cipher_suites: cls._get_accepted_cipher_suites(
+                l7_client, protocol_version, cipher_suites
+            ),
+            checkable_cipher_suites
+        )
+
+    @classmethod
+    def _get_accepted_cipher_suites_seeded(
+            cls, l7_client, protocol_version, checkable_cipher_suites, seed_cipher_suites
+    ):
+        seed_cipher_suites = [
+            cipher_suite
+            for cipher_suite in seed_cipher_suites
+            if cipher_suite in checkable_cipher_suites
+        ]
+        accepted_seed_cipher_suites = cls._get_accepted_cipher_suites(
+            l7_client, protocol_version, seed_cipher_suites
+        )[0]
+        # cipher suites not accepted by the neighbouring version are rarely accepted, so they are probed together
+        leftover_cipher_suites = [
+            cipher_suite
+            for cipher_suite in checkable_cipher_suites
+            if cipher_suite not in accepted_seed_cipher_suites
+        ]
+        accepted_leftover_cipher_suites, remaining_cipher_suites = cls._get_accepted_cipher_suites(
+            l7_client, protocol_version, leftover_cipher_suites
+        )
+
+        return (
+            [
+                accepted_cipher_suites
+                for accepted_cipher_suites in (accepted_seed_cipher_suites, accepted_leftover_cipher_suites)
+                if accepted_cipher_suites
+            ],
+            remaining_cipher_suites
         )
 
     @classmethod
     def _get_accepted_cipher_suites_fallback(cls, l7_client, protocol_version):
-        accepted_cipher_suites = []
+        accepted_cipher_suite_chains = []
         client_hello_messsages_in_order_of_probability = (
             TlsHandshakeClientHelloAuthenticationRSA(protocol_version, l7_client.address),
             TlsHandshakeClientHelloAuthenticationECDSA(protocol_version, l7_client.address),
@@ -150,13 +196,13 @@ class AnalyzerCipherSuites(AnalyzerTlsBase):
             TlsHandshakeClientHelloAuthenticationGOST(protocol_version, l7_client.address),
         )
         for client_hello in client_hello_messsages_in_order_of_probability:
-            accepted_cipher_suites.extend(
-                cls._get_accepted_cipher_suites(
-                    l7_client, protocol_version, list(client_hello.cipher_suites)
-                )[0]
-            )
+            accepted_cipher_suites = cls._get_accepted_cipher_suites(
+                l7_client, protocol_version, list(client_hello.cipher_suites)
+            )[0]
+            if accepted_cipher_suites:
+                accepted_cipher_suite_chains.append(accepted_cipher_suites)
 
-        return accepted_cipher_suites
+        return accepted_cipher_suite_chains
 
     @classmethod
     def _get_checkable_cipher_suites(cls, protocol_version):
@@ -167,34 +213,123 @@ class AnalyzerCipherSuites(AnalyzerTlsBase):
                 min_version = protocol_version
             else:
                 min_version = TlsProtocolVersion(TlsVersion.TLS1_3_DRAFT_0)
-            checkable_cipher_suites = [
-                cipher_suite
-                for cipher_suite in TlsCipherSuite
-                if TlsProtocolVersion(cipher_suite.value.initial_version) >= min_version
-            ]
+            checkable_cipher_suites = list(get_cipher_suites(min_version=min_version))
 
         return checkable_cipher_suites
 
+    @classmethod
+    def _get_chosen_cipher_suite(cls, l7_client, protocol_version, cipher_suites):
+        accepted_cipher_suites = []
+        try:
+            cls._next_accepted_cipher_suites(l7_client, protocol_version, list(cipher_suites), accepted_cipher_suites)
+        except (StopIteration, TlsAlert, SecurityError):
+            pass
+        except NetworkError as e:
+            if e.error != NetworkErrorType.NO_RESPONSE:
+                raise e
+
+        return accepted_cipher_suites[0] if accepted_cipher_suites else None
+
+    @classmethod
+    def _choose_cipher_suite(cls, l7_client, protocol_version, chosen_cipher_suites, cipher_suites):
+        cipher_suites = tuple(cipher_suites)
+        if cipher_suites not in chosen_cipher_suites:
+            chosen_cipher_suites[cipher_suites] = cls._get_chosen_cipher_suite(
+                l7_client, protocol_version, cipher_suites
+            )
+
+        return chosen_cipher_suites[cipher_suites]
+
+    @classmethod
+    def _is_cipher_suite_preference(
+            cls, l7_client, protocol_version, accepted_cipher_suite_chains, chosen_cipher_suites
+    ):
+        accepted_cipher_suites = list(itertools.chain.from_iterable(accepted_cipher_suite_chains))
+        first_cipher_suite, last_cipher_suite = accepted_cipher_suites[0], accepted_cipher_suites[-1]
+
+        if protocol_version.version == TlsVersion.SSL2:
+            checkable_cipher_suites = [last_cipher_suite, first_cipher_suite]
+            chosen_cipher_suites = cls._get_accepted_cipher_suites(
+                l7_client, protocol_version, checkable_cipher_suites
+            )[0]
+            return chosen_cipher_suites != checkable_cipher_suites
+
+        chosen_cipher_suite = cls._choose_cipher_suite(
+            l7_client, protocol_version, chosen_cipher_suites, (last_cipher_suite, first_cipher_suite)
+        )
+        # accepted cipher suites of a single chain are in the order of the server's preference
+        if len(accepted_cipher_suite_chains) == 1:
+            return chosen_cipher_suite != last_cipher_suite
+
+        # accepted cipher suites of different chains are not in the order of the server's preference,
+        # so the server has a preference if it chooses the same cipher suite independently from the order
+        chosen_cipher_suite_reversed = cls._choose_cipher_suite(
+            l7_client, protocol_version, chosen_cipher_suites, (first_cipher_suite, last_cipher_suite)
+        )
+
+        return chosen_cipher_suite == chosen_cipher_suite_reversed
+
+    @classmethod
+    def _get_cipher_suites_in_preference_order(
+            cls, l7_client, protocol_version, accepted_cipher_suite_chains, chosen_cipher_suites
+    ):
+        def choose(cipher_suite, other_cipher_suite):
+            # choices of both orders are equivalent as the server has a preference
+            reversed_cipher_suites = (other_cipher_suite, cipher_suite)
+            if reversed_cipher_suites in chosen_cipher_suites:
+                return chosen_cipher_suites[reversed_cipher_suites]
+
+            return cls._choose_cipher_suite(
+                l7_client, protocol_version, chosen_cipher_suites, (cipher_suite, other_cipher_suite)
+            )
+
+        return EliminationEngine.merge_chains(accepted_cipher_suite_chains, choose)
+
     def analyze(self, analyzable, protocol_version):
+        return self.analyze_seeded(analyzable, protocol_version, None)
+
+    def analyze_seeded(self, analyzable, protocol_version, seed_cipher_suites):
         checkable_cipher_suites = self._get_checkable_cipher_suites(protocol_version)
         long_cipher_suite_list_intolerance = False
-        accepted_cipher_suites, remaining_cipher_suites = self._get_accepted_cipher_suites_all(
-            analyzable, protocol_version, checkable_cipher_suites
-        )
+        if seed_cipher_suites is None or protocol_version.version == TlsVersion.SSL2:
+            accepted_cipher_suite_chains, remaining_cipher_suites = self._get_accepted_cipher_suites_all(
+                analyzable, protocol_version, checkable_cipher_suites
+            )
+        else:
+            accepted_cipher_suite_chains, remaining_cipher_suites = self._get_accepted_cipher_suites_seeded(
+                analyzable, protocol_version, checkable_cipher_suites, seed_cipher_suites
+            )
         if len(checkable_cipher_suites) == len(remaining_cipher_suites):
-            accepted_cipher_suites = self._get_accepted_cipher_suites_fallback(analyzable, protocol_version)
-            long_cipher_suite_list_intolerance = bool(accepted_cipher_suites)
+            accepted_cipher_suite_chains = self._get_accepted_cipher_suites_fallback(analyzable, protocol_version)
+            long_cipher_suite_list_intolerance = bool(accepted_cipher_suite_chains)
+
+        accepted_cipher_suites = list(itertools.chain.from_iterable(accepted_cipher_suite_chains))
+        cipher_suite_preference = None
         if len(accepted_cipher_suites) > 1:
+            chosen_cipher_suites = {}
             LogSingleton().disabled = True
-            checkable_cipher_suites = [accepted_cipher_suites[-1], accepted_cipher_suites[0]]
-            cipher_suite_preference = self._get_accepted_cipher_suites(
-                analyzable,
-                protocol_version,
-                checkable_cipher_suites
-            )[0] != checkable_cipher_suites
-            LogSingleton().disabled = False
-        else:
-            cipher_suite_preference = None
+            try:
+                cipher_suite_preference = self._is_cipher_suite_preference(
+                    analyzable, protocol_version, accepted_cipher_suite_chains, chosen_cipher_suites
+                )
+                if (cipher_suite_preference and
+                        EliminationEngine().preference_order and
+                        protocol_version.version != TlsVersion.SSL2):
+                    cipher_suites_in_preference_order = self._get_cipher_suites_in_preference_order(
+                        analyzable, protocol_version, accepted_cipher_suite_chains, chosen_cipher_suites
+                    )
+                    # the order cannot be determined if any of the choices is unknown
+                    if cipher_suites_in_preference_order is not None:
+                        accepted_cipher_suites = cipher_suites_in_preference_order
+            finally:
+                LogSingleton().disabled = False
+
+            # order of the chains depends on the partitioning, so it is normalized when the server has no preference
+            if cipher_suite_preference is False and not long_cipher_suite_list_intolerance:
+                checkable_cipher_suite_indices = {
+                    cipher_suite: index for index, cipher_suite in enumerate(checkable_cipher_suites)
+                }
+                accepted_cipher_suites.sort(key=checkable_cipher_suite_indices.get)
 
         return AnalyzerResultCipherSuites(
             AnalyzerTargetTls.from_l7_client(analyzable, protocol_version),
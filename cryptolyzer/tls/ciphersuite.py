@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import collections
+
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
+from cryptoparser.tls.version import TlsProtocolVersion
+
+from cryptolyzer.common.bitset import TlsCipherSuiteBitSet
+
+
+def _get_index(get_key):
+    index = collections.defaultdict(list)
+    for cipher_suite in TlsCipherSuite:
+        index[get_key(cipher_suite.value)].append(cipher_suite)
+
+    return {key: TlsCipherSuiteBitSet.from_iterable(cipher_suites) for key, cipher_suites in index.items()}
+
+
+_CIPHER_SUITES_BY_INITIAL_VERSION = _get_index(lambda params: TlsProtocolVersion(params.initial_version))
+_CIPHER_SUITES_BY_KEY_EXCHANGE = _get_index(lambda params: params.key_exchange)
+_CIPHER_SUITES_BY_AUTHENTICATION = _get_index(lambda params: params.authentication)
+_CIPHER_SUITES_BY_BULK_CIPHER = _get_index(lambda params: params.bulk_cipher)
+_CIPHER_SUITES_BY_BLOCK_CIPHER_MODE = _get_index(lambda params: params.block_cipher_mode)
+_CIPHER_SUITES_BY_EXPORT_GRADE = _get_index(lambda params: bool(params.export_grade))
+
+
+def _get_indexed_cipher_suite_set(index, keys):
+    cipher_suite_set = TlsCipherSuiteBitSet()
+    for key in keys:
+        cipher_suite_set |= index.get(key, TlsCipherSuiteBitSet())
+
+    return cipher_suite_set
+
+
+def get_cipher_suite_set(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        min_version=None,
+        key_exchanges=None,
+        authentications=None,
+        bulk_ciphers=None,
+        block_cipher_modes=None,
+        export_grade=None,
+):
+    cipher_suite_set = TlsCipherSuiteBitSet.all()
+
+    if min_version is not None:
+        cipher_suite_set &= _get_indexed_cipher_suite_set(
+            _CIPHER_SUITES_BY_INITIAL_VERSION,
+            [initial_version for initial_version in _CIPHER_SUITES_BY_INITIAL_VERSION if initial_version >= min_version]
+        )
+    for index, keys in (
+            (_CIPHER_SUITES_BY_KEY_EXCHANGE, key_exchanges),
+            (_CIPHER_SUITES_BY_AUTHENTICATION, authentications),
+            (_CIPHER_SUITES_BY_BULK_CIPHER, bulk_ciphers),
+            (_CIPHER_SUITES_BY_BLOCK_CIPHER_MODE, block_cipher_modes),
+    ):
+        if keys is not None:
+            cipher_suite_set &= _get_indexed_cipher_suite_set(index, keys)
+    if export_grade is not None:
+        cipher_suite_set &= _get_indexed_cipher_suite_set(_CIPHER_SUITES_BY_EXPORT_GRADE, [export_grade])
+
+    return cipher_suite_set
+
+
+def get_cipher_suites(**kwargs):
+    return tuple(get_cipher_suite_set(**kwargs))
+
+
+def merge_cipher_suites(*cipher_suite_groups):
+    cipher_suite_set = TlsCipherSuiteBitSet()
+    for cipher_suites in cipher_suite_groups:
+        cipher_suite_set |= TlsCipherSuiteBitSet.from_iterable(cipher_suites)
+
+    return tuple(cipher_suite_set)
@@ -7,7 +7,10 @@ import ftplib
 import imaplib
 
 import collections
+import copy
 import socket
+import struct
+import threading
 
 import attr
 
@@ -16,11 +19,11 @@ import six
 from cryptodatahub.common.algorithm import Authentication, BlockCipher, BlockCipherMode, KeyExchange, NamedGroupType
 from cryptodatahub.common.exception import InvalidValue
 
-from cryptodatahub.tls.algorithm import TlsSignatureAndHashAlgorithm, TlsECPointFormat
+from cryptodatahub.tls.algorithm import TlsCipherSuiteExtension, TlsSignatureAndHashAlgorithm, TlsECPointFormat
 
 from cryptoparser.common.exception import NotEnoughData, TooMuchData, InvalidType
 
-from cryptoparser.tls.ciphersuite import TlsCipherSuite, SslCipherKind
+from cryptoparser.tls.ciphersuite import SslCipherKind
 from cryptoparser.tls.ldap import (
     LDAPResultCode,
     LDAPExtendedRequestStartTLS,
@@ -57,6 +60,7 @@ from cryptoparser.tls.extension import (
     TlsExtensionSignatureAlgorithms,
     TlsExtensionSignatureAlgorithmsCert,
     TlsExtensionSupportedVersionsClient,
+    TlsExtensionType,
     TlsExtensionsClient,
     TlsKeyShareEntry,
     TlsNamedCurve,
@@ -72,8 +76,10 @@ from cryptolyzer.common.dhparam import (
     int_to_bytes,
 )
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError, SecurityErrorType
+from cryptolyzer.tls.ciphersuite import get_cipher_suites, merge_cipher_suites
 from cryptolyzer.tls.exception import TlsAlert
-from cryptolyzer.common.transfer import L4ClientTCP, L7TransferBase
+from cryptolyzer.common.transfer import L4ClientTCP, L7TransferBase, ReceiveBuffer
+from cryptolyzer.common.utils import Singleton
 
 
 NAMED_CURVE_TO_RFC7919_WELL_KNOWN = {
@@ -219,7 +225,7 @@ class TlsHandshakeClientHelloAnyAlgorithm(  # pylint: disable=too-many-ancestors
         super(TlsHandshakeClientHelloAnyAlgorithm, self).__init__(
             hostname=hostname,
             protocol_versions=protocol_versions,
-            cipher_suites=list(TlsCipherSuite),
+            cipher_suites=list(get_cipher_suites()),
             named_curves=None,
             signature_algorithms=None,
             extensions=[]
@@ -238,16 +244,10 @@ class TlsHandshakeClientHelloAuthenticationBase(  # pylint: disable=too-many-anc
             named_curves,
             signature_algorithms,
     ):  # pylint: disable=too-many-arguments
-        _cipher_suites = [
-            cipher_suite
-            for cipher_suite in TlsCipherSuite
-            if cipher_suite.value.authentication in authentications
-        ]
-
         super(TlsHandshakeClientHelloAuthenticationBase, self).__init__(
             hostname=hostname,
             protocol_versions=[protocol_version, ],
-            cipher_suites=_cipher_suites,
+            cipher_suites=list(get_cipher_suites(authentications=authentications)),
             named_curves=named_curves,
             signature_algorithms=signature_algorithms,
             extensions=[]
@@ -310,18 +310,13 @@ class TlsHandshakeClientHelloAuthenticationRarelyUsed(  # pylint: disable=too-ma
             TlsHandshakeClientHelloSpecalization
         ):
     def __init__(self, protocol_version, hostname):
-        _cipher_suites = [
-            cipher_suite
-            for cipher_suite in TlsCipherSuite
-            if (cipher_suite.value.authentication and
-                cipher_suite.value.authentication in [
-                    Authentication.DSS,
-                    Authentication.KRB5,
-                    Authentication.PSK,
-                    Authentication.SRP,
-                    Authentication.anon,
-                ])
-        ]
+        _cipher_suites = list(get_cipher_suites(authentications=[
+            Authentication.DSS,
+            Authentication.KRB5,
+            Authentication.PSK,
+            Authentication.SRP,
+            Authentication.anon,
+        ]))
 
         super(TlsHandshakeClientHelloAuthenticationRarelyUsed, self).__init__(
             hostname=hostname,
@@ -336,12 +331,10 @@ class TlsHandshakeClientHelloAuthenticationRarelyUsed(  # pylint: disable=too-ma
 class TlsHandshakeClientHelloKeyExchangeDHE(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if (cipher_suite.value.key_exchange in [KeyExchange.DHE, KeyExchange.ADH] or
-            TlsProtocolVersion(cipher_suite.value.initial_version) > TlsProtocolVersion(TlsVersion.TLS1_2))
-    ]
+    CIPHER_SUITES = list(merge_cipher_suites(
+        get_cipher_suites(key_exchanges=[KeyExchange.DHE, KeyExchange.ADH]),
+        get_cipher_suites(min_version=TlsProtocolVersion(TlsVersion.TLS1_3_DRAFT_0)),
+    ))
     _NAMED_CURVES = [
         named_curve
         for named_curve in TlsNamedCurve
@@ -372,12 +365,10 @@ class TlsHandshakeClientHelloKeyExchangeDHE(  # pylint: disable=too-many-ancesto
 class TlsHandshakeClientHelloKeyExchangeECDHx(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if (cipher_suite.value.key_exchange in [KeyExchange.ECDHE, KeyExchange.AECDH] or
-            TlsProtocolVersion(cipher_suite.value.initial_version) > TlsProtocolVersion(TlsVersion.TLS1_2))
-    ]
+    CIPHER_SUITES = list(merge_cipher_suites(
+        get_cipher_suites(key_exchanges=[KeyExchange.ECDHE, KeyExchange.AECDH]),
+        get_cipher_suites(min_version=TlsProtocolVersion(TlsVersion.TLS1_3_DRAFT_0)),
+    ))
     _NAMED_CURVES = [
         named_curve
         for named_curve in TlsNamedCurve
@@ -409,11 +400,7 @@ class TlsHandshakeClientHelloKeyExchangeECDHx(  # pylint: disable=too-many-ances
 class TlsHandshakeClientHelloBlockCipherModeCBC(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if cipher_suite.value.block_cipher_mode == BlockCipherMode.CBC
-    ]
+    CIPHER_SUITES = list(get_cipher_suites(block_cipher_modes=[BlockCipherMode.CBC]))
 
     def __init__(
             self,
@@ -436,16 +423,12 @@ class TlsHandshakeClientHelloBlockCipherModeCBC(  # pylint: disable=too-many-anc
 class TlsHandshakeClientHelloStreamCipherRC4(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if cipher_suite.value.bulk_cipher in (
-            BlockCipher.RC4_40,
-            BlockCipher.RC4_56,
-            BlockCipher.RC4_64,
-            BlockCipher.RC4_128,
-        )
-    ]
+    CIPHER_SUITES = list(get_cipher_suites(bulk_ciphers=[
+        BlockCipher.RC4_40,
+        BlockCipher.RC4_56,
+        BlockCipher.RC4_64,
+        BlockCipher.RC4_128,
+    ]))
 
     def __init__(
             self,
@@ -468,11 +451,11 @@ class TlsHandshakeClientHelloStreamCipherRC4(  # pylint: disable=too-many-ancest
 class TlsHandshakeClientHelloBulkCipherBlockSize64(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if cipher_suite.value.bulk_cipher and cipher_suite.value.bulk_cipher.value.block_size == 64
-    ]
+    CIPHER_SUITES = list(get_cipher_suites(bulk_ciphers=[
+        bulk_cipher
+        for bulk_cipher in BlockCipher
+        if bulk_cipher.value.block_size == 64
+    ]))
 
     def __init__(
             self,
@@ -495,11 +478,7 @@ class TlsHandshakeClientHelloBulkCipherBlockSize64(  # pylint: disable=too-many-
 class TlsHandshakeClientHelloBulkCipherNull(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if cipher_suite.value.bulk_cipher is None
-    ]
+    CIPHER_SUITES = list(get_cipher_suites(bulk_ciphers=[None]))
 
     def __init__(
             self,
@@ -522,11 +501,7 @@ class TlsHandshakeClientHelloBulkCipherNull(  # pylint: disable=too-many-ancesto
 class TlsHandshakeClientHelloKeyExchangeAnonymousDH(  # pylint: disable=too-many-ancestors
             TlsHandshakeClientHelloSpecalization
         ):
-    CIPHER_SUITES = [
-        cipher_suite
-        for cipher_suite in TlsCipherSuite
-        if cipher_suite.value.key_exchange == KeyExchange.ADH
-    ]
+    CIPHER_SUITES = list(get_cipher_suites(key_exchanges=[KeyExchange.ADH]))
 
     def __init__(
             self,
@@ -576,6 +551,10 @@ class L7ClientTlsBase(L7TransferBase):
 
         try:
             l7_client.do_handshake(self, hello_message, record_version, last_handshake_message_type)
+        except TlsAlert as e:
+            if e.description == TlsAlertDescription.INTERNAL_ERROR and isinstance(self.l4_transfer, L4ClientTCP):
+                self.l4_transfer.signal_overload()
+            raise
         finally:
             self._close_connection()
 
@@ -642,9 +621,12 @@ class L7ClientStartTlsBase(L7ClientTlsBase):
         self._tls_inititalized = True
 
     def _close_connection(self):
-        if self._l7_client is not None and not self._tls_inititalized:
-            self._deinit_l7()
-        self.l4_transfer.close()
+        try:
+            if self._l7_client is not None and not self._tls_inititalized:
+                self._deinit_l7()
+        finally:
+            if self.l4_transfer:
+                self.l4_transfer.close()
 
 
 @attr.s
@@ -711,18 +693,15 @@ class L7ClientStartTlsTextBase(L7ClientStartTlsBase):
 
     def _get_capabilities(self):
         self.l4_transfer.send((self._capabilities_command + self._line_sep).encode(self._encoding))
-        self.l4_transfer.receive_line()
+        line = self.l4_transfer.read_line()
 
         capabilities_ok_result = str(self._capabilities_ok_result).encode(self._encoding)
-        if self.l4_transfer.buffer[:len(capabilities_ok_result)] != capabilities_ok_result:
+        if line[:len(capabilities_ok_result)] != capabilities_ok_result:
             raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
-        self.l4_transfer.flush_buffer()
 
         capabilities = collections.OrderedDict()
         while True:
-            self.l4_transfer.receive_line()
-            key_and_value = self.l4_transfer.buffer.decode('ascii').strip()
-            self.l4_transfer.flush_buffer()
+            key_and_value = self.l4_transfer.read_line().decode('ascii').strip()
 
             try:
                 self._update_capabilities(key_and_value, capabilities)
@@ -732,11 +711,7 @@ class L7ClientStartTlsTextBase(L7ClientStartTlsBase):
         return capabilities
 
     def _flush_line(self):
-        self.l4_transfer.receive_line()
-        line = self.l4_transfer.buffer.decode('ascii').strip()
-        self.l4_transfer.flush_buffer()
-
-        return line
+        return self.l4_transfer.read_line().decode('ascii').strip()
 
     def _fill_greeting(self):
         self.greeting = [self._flush_line()]
@@ -753,11 +728,9 @@ class L7ClientStartTlsTextBase(L7ClientStartTlsBase):
             if self._starttls_command in capabilities:
                 self.l4_transfer.send((self._starttls_command + self._line_sep).encode(self._encoding))
 
-                self.l4_transfer.receive_line()
+                line = self.l4_transfer.read_line()
                 starttls_ok_result = str(self._starttls_ok_result).encode(self._encoding)
-                if self.l4_transfer.buffer[:len(starttls_ok_result)] == starttls_ok_result:
-                    self.l4_transfer.flush_buffer()
-                else:
+                if line[:len(starttls_ok_result)] != starttls_ok_result:
                     raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
             else:
                 raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
@@ -1156,31 +1129,33 @@ class ClientXMPP(L7ClientStartTlsBase):
         stream_open_message = ClientXMPP._STREAM_OPEN.format(address).encode("utf-8")
         l4_transfer.send(stream_open_message)
 
-        l4_transfer.receive_until(b'<stream:')
-        l4_transfer.receive_until(b'>')
+        received_length = l4_transfer.receive_until(b'<stream:')
+        received_length = l4_transfer.receive_until(b'>', offset=received_length)
+        stream = l4_transfer.buffer_view[:received_length].tobytes()
 
-        if b'stream:error' in l4_transfer.buffer:
+        if b'stream:error' in stream:
             raise SecurityError(SecurityErrorType.UNPARSABLE_MESSAGE)
 
-        if b'stream:features' not in l4_transfer.buffer:
-            l4_transfer.receive_until(b'</stream:features>')
+        if b'stream:features' not in stream:
+            received_length = l4_transfer.receive_until(b'</stream:features>', offset=received_length)
+            stream = l4_transfer.buffer_view[:received_length].tobytes()
 
-        if b'<starttls xmlns=\'urn:ietf:params:xml:ns:xmpp-tls\'>' not in l4_transfer.buffer:
+        if b'<starttls xmlns=\'urn:ietf:params:xml:ns:xmpp-tls\'>' not in stream:
             raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
 
-        l4_transfer.flush_buffer()
+        l4_transfer.flush_buffer(received_length)
 
         l4_transfer.send(ClientXMPP._STARTTLS)
-        l4_transfer.receive_until(b'>')
+        received_length = l4_transfer.receive_until(b'>')
+        response = l4_transfer.buffer_view[:received_length].tobytes()
+        l4_transfer.flush_buffer(received_length)
 
-        if b'stream:error' in l4_transfer.buffer:
+        if b'stream:error' in response:
             raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
 
-        if l4_transfer.buffer != b'<proceed xmlns=\'urn:ietf:params:xml:ns:xmpp-tls\'/>':
+        if response != b'<proceed xmlns=\'urn:ietf:params:xml:ns:xmpp-tls\'/>':
             raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
 
-        l4_transfer.flush_buffer()
-
     def _init_l7(self):
         self._l7_client = L7ClientTls(self.address, self.port, self.timeout)
         self._l7_client.init_connection()
@@ -1293,9 +1268,7 @@ class ClientSieve(L7ClientStartTlsBase):
         capabilities = collections.OrderedDict()
 
         while True:
-            self.l4_transfer.receive_line()
-            key_and_value = self.l4_transfer.buffer.decode('ascii').strip().split(' ', 1)
-            self.l4_transfer.flush_buffer()
+            key_and_value = self.l4_transfer.read_line().decode('ascii').strip().split(' ', 1)
 
             key = key_and_value[0].strip('"')
             if key == 'OK':
@@ -1320,10 +1293,7 @@ class ClientSieve(L7ClientStartTlsBase):
             if 'STARTTLS' in capabilities:
                 self.l4_transfer.send(b'STARTTLS\r\n')
 
-                self.l4_transfer.receive_line()
-                if self.l4_transfer.buffer[:2] == b'OK':
-                    self.l4_transfer.flush_buffer()
-                else:
+                if self.l4_transfer.read_line()[:2] != b'OK':
                     raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
             else:
                 raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
@@ -1355,6 +1325,201 @@ class TlsClient(object):
         raise NotImplementedError()
 
 
+@attr.s
+class TlsRecordFramer(object):
+    HANDSHAKE_HEADER_SIZE = 4
+
+    _header = attr.ib(init=False, default=None)
+    _content_type = attr.ib(init=False, default=None)
+    _fragment_buffer = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        self._fragment_buffer = ReceiveBuffer()
+
+    @property
+    def has_pending_data(self):
+        return len(self._fragment_buffer) > 0
+
+    def pop_record(self, transfer):
+        buffer_view = transfer.buffer_view
+        if self._header is None:
+            self._header = TlsRecord.parse_header(buffer_view[:TlsRecord.HEADER_SIZE])
+
+        record_size = TlsRecord.HEADER_SIZE + self._header['fragment_length']
+        if len(buffer_view) < record_size:
+            raise NotEnoughData(record_size - len(buffer_view))
+
+        content_type = self._header['content_type']
+        fragment = buffer_view[TlsRecord.HEADER_SIZE:record_size]
+        if self._content_type != content_type:
+            if self.has_pending_data:
+                raise InvalidType()
+            self._content_type = content_type
+        self._fragment_buffer.extend(fragment)
+
+        self._header = None
+        transfer.flush_buffer(record_size)
+
+        return content_type
+
+    def _get_message_size(self, fragment_view):
+        if self._content_type != TlsContentType.HANDSHAKE:
+            return len(fragment_view)
+
+        if len(fragment_view) < self.HANDSHAKE_HEADER_SIZE:
+            return None
+
+        message_size = self.HANDSHAKE_HEADER_SIZE + struct.unpack('!I', b'\x00' + fragment_view[1:4].tobytes())[0]
+        if len(fragment_view) < message_size:
+            return None
+
+        return message_size
+
+    def pop_messages(self):
+        subprotocol_parser = TlsSubprotocolMessageParser(self._content_type)
+
+        while self.has_pending_data:
+            fragment_view = self._fragment_buffer.view
+            message_size = self._get_message_size(fragment_view)
+            if message_size is None:
+                break
+
+            try:
+                message, parsed_length = subprotocol_parser.parse(fragment_view[:message_size].tobytes())
+            except NotEnoughData:
+                break
+
+            self._fragment_buffer.consume(parsed_length)
+            yield message
+
+
+@attr.s
+class TlsClientHelloTemplate(object):
+    PATCHED_EXTENSION_TYPES = (TlsExtensionType.SERVER_NAME, TlsExtensionType.SUPPORTED_GROUPS)
+
+    hello_message = attr.ib(validator=attr.validators.instance_of(TlsHandshakeClientHello))
+    _protocol_version_bytes = attr.ib(init=False, default=None)
+    _session_id_bytes = attr.ib(init=False, default=None)
+    _compression_methods_bytes = attr.ib(init=False, default=None)
+    _extension_parts = attr.ib(init=False, default=None)
+
+    def __attrs_post_init__(self):
+        self.hello_message = copy.deepcopy(self.hello_message)
+        self._protocol_version_bytes = self.hello_message.protocol_version.compose()
+        self._session_id_bytes = self.hello_message.session_id.compose()
+        self._compression_methods_bytes = self.hello_message.compression_methods.compose()
+        self._extension_parts = [
+            None if extension.extension_type in self.PATCHED_EXTENSION_TYPES else extension.compose()
+            for extension in self.hello_message.extensions
+        ]
+
+    @staticmethod
+    def get_shape(hello_message):
+        return tuple(extension.extension_type for extension in hello_message.extensions)
+
+    def matches(self, hello_message):
+        return (
+            hello_message.protocol_version == self.hello_message.protocol_version and
+            hello_message.session_id == self.hello_message.session_id and
+            hello_message.compression_methods == self.hello_message.compression_methods and
+            all(
+                extension_part is None or extension == template_extension
+                for extension, template_extension, extension_part in zip(
+                    hello_message.extensions, self.hello_message.extensions, self._extension_parts
+                )
+            )
+        )
+
+    @staticmethod
+    def _compose_patched_extension(extension):
+        if extension.extension_type == TlsExtensionType.SERVER_NAME:
+            host_name_bytes = six.ensure_binary(extension.host_name, 'idna')
+            return struct.pack(
+                '!HHHBH', extension.extension_type.value.code, len(host_name_bytes) + 5,
+                len(host_name_bytes) + 3, extension.name_type, len(host_name_bytes)
+            ) + host_name_bytes
+
+        named_curve_codes = [named_curve.value.code for named_curve in extension.elliptic_curves]
+        return struct.pack(
+            '!HHH{}H'.format(len(named_curve_codes)), extension.extension_type.value.code,
+            2 * len(named_curve_codes) + 2, 2 * len(named_curve_codes), *named_curve_codes
+        )
+
+    def _compose_extensions(self, extensions):
+        if not extensions:
+            return b''
+
+        extension_bytes = bytearray().join(
+            self._compose_patched_extension(extension) if extension_part is None else extension_part
+            for extension, extension_part in zip(extensions, self._extension_parts)
+        )
+
+        return struct.pack('!H', len(extension_bytes)) + extension_bytes
+
+    @staticmethod
+    def _compose_cipher_suites(hello_message):
+        cipher_suites = list(hello_message.cipher_suites)
+        if hello_message.fallback_scsv:
+            cipher_suites.append(TlsCipherSuiteExtension.FALLBACK_SCSV)
+        if hello_message.empty_renegotiation_info_scsv:
+            cipher_suites.append(TlsCipherSuiteExtension.EMPTY_RENEGOTIATION_INFO_SCSV)
+
+        return struct.pack(
+            '!H{}H'.format(len(cipher_suites)),
+            2 * len(cipher_suites), *[cipher_suite.value.code for cipher_suite in cipher_suites]
+        )
+
+    def compose_record(self, hello_message, record_version):
+        payload_bytes = bytearray().join([
+            self._protocol_version_bytes,
+            hello_message.random.compose(),
+            self._session_id_bytes,
+            self._compose_cipher_suites(hello_message),
+            self._compression_methods_bytes,
+            self._compose_extensions(hello_message.extensions),
+        ])
+        handshake_header_bytes = struct.pack('!I', (TlsHandshakeType.CLIENT_HELLO << 24) | len(payload_bytes))
+        record_header_bytes = bytearray().join([
+            struct.pack('!B', TlsContentType.HANDSHAKE),
+            record_version.compose(),
+            struct.pack('!H', len(handshake_header_bytes) + len(payload_bytes)),
+        ])
+
+        return bytes(record_header_bytes + handshake_header_bytes + payload_bytes)
+
+
+@six.add_metaclass(Singleton)
+class TlsClientHelloTemplateCache(object):
+    MAX_TEMPLATE_NUM_PER_SHAPE = 16
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._templates = {}
+
+    def get(self, hello_message):
+        shape = TlsClientHelloTemplate.get_shape(hello_message)
+        with self._lock:
+            for template in self._templates.get(shape, ()):
+                if template.matches(hello_message):
+                    return template
+
+        template = TlsClientHelloTemplate(hello_message)
+        with self._lock:
+            templates = self._templates.setdefault(shape, [])
+            templates.append(template)
+            if len(templates) > self.MAX_TEMPLATE_NUM_PER_SHAPE:
+                del templates[0]
+
+        return template
+
+    def compose_record(self, hello_message, record_version):
+        return self.get(hello_message).compose_record(hello_message, record_version)
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+
+
 class TlsClientHandshake(TlsClient):
     def _process_handshake_message(self, protocol_version, message, last_handshake_message_type):
         handshake_type = message.get_handshake_type()
@@ -1395,13 +1560,16 @@ class TlsClientHandshake(TlsClient):
 
     @classmethod
     def _send_hello(cls, transfer, hello_message, record_version):
-        tls_record_bytes = TlsRecord(hello_message.compose(), record_version, TlsContentType.HANDSHAKE).compose()
+        if isinstance(hello_message, TlsHandshakeClientHello):
+            tls_record_bytes = TlsClientHelloTemplateCache().compose_record(hello_message, record_version)
+        else:
+            tls_record_bytes = TlsRecord(hello_message.compose(), record_version, TlsContentType.HANDSHAKE).compose()
         try:
             transfer.send(tls_record_bytes)
         except socket.timeout as e:
             six.raise_from(NetworkError(NetworkErrorType.NO_CONNECTION), e)
 
-    def do_handshake(
+    def get_handshake_steps(
             self,
             transfer,
             hello_message,
@@ -1411,31 +1579,19 @@ class TlsClientHandshake(TlsClient):
         self.server_messages = {}
         self._send_hello(transfer, hello_message, record_version)
 
-        record_buffer = bytearray()
+        record_framer = TlsRecordFramer()
+        receivable_byte_num = 0
         while True:
             try:
                 while True:
-                    record, parsed_length = TlsRecord.parse_immutable(transfer.buffer)
-                    record_buffer += record.fragment
-                    transfer.flush_buffer(parsed_length)
-
-                    if not transfer.buffer:
-                        break
-
-                subprotocol_parser = TlsSubprotocolMessageParser(record.content_type)
-
-                while record_buffer:
-                    message, parsed_length = subprotocol_parser.parse(record_buffer)
-                    record_buffer = record_buffer[parsed_length:]
-
-                    if record.content_type == TlsContentType.HANDSHAKE:
-                        self._process_handshake_message(
-                            hello_message.protocol_version, message, last_handshake_message_type
-                        )
-                    else:
-                        self._process_non_handshake_message(record.content_type, message)
-
-                receivable_byte_num = 0
+                    content_type = record_framer.pop_record(transfer)
+                    for message in record_framer.pop_messages():
+                        if content_type == TlsContentType.HANDSHAKE:
+                            self._process_handshake_message(
+                                hello_message.protocol_version, message, last_handshake_message_type
+                            )
+                        else:
+                            self._process_non_handshake_message(content_type, message)
             except NotEnoughData as e:
                 receivable_byte_num = e.bytes_needed
             except (InvalidType, InvalidValue):
@@ -1444,13 +1600,24 @@ class TlsClientHandshake(TlsClient):
                 return
 
             try:
-                transfer.receive(receivable_byte_num)
+                yield 'receive', (receivable_byte_num, )
             except NotEnoughData as e:
-                if transfer.buffer or record_buffer:
+                if transfer.buffer_view or record_framer.has_pending_data:
                     six.raise_from(NetworkError(NetworkErrorType.NO_CONNECTION), e)
 
                 six.raise_from(NetworkError(NetworkErrorType.NO_RESPONSE), e)
 
+    def do_handshake(
+            self,
+            transfer,
+            hello_message,
+            record_version=TlsProtocolVersion(TlsVersion.SSL3),
+            last_handshake_message_type=TlsHandshakeType.SERVER_HELLO_DONE
+    ):
+        transfer.process_steps(self.get_handshake_steps(
+            transfer, hello_message, record_version, last_handshake_message_type
+        ))
+
 
 @attr.s
 class SslError(ValueError):
@@ -1465,7 +1632,7 @@ class SslHandshakeClientHelloAnyAlgorithm(SslHandshakeClientHello):
 
 
 class SslClientHandshake(TlsClient):
-    def do_handshake(
+    def get_handshake_steps(  # pylint: disable=unused-argument
             self,
             transfer,
             hello_message=None,
@@ -1478,7 +1645,7 @@ class SslClientHandshake(TlsClient):
         self.server_messages = {}
         while True:
             try:
-                record = SslRecord.parse_exact_size(transfer.buffer)
+                record = SslRecord.parse_exact_size(transfer.buffer_view.tobytes())
                 transfer.flush_buffer()
                 if record.message.get_message_type() == SslMessageType.ERROR:
                     raise SslError(record.message.error_type)
@@ -1495,11 +1662,11 @@ class SslClientHandshake(TlsClient):
                 self.raise_response_error(transfer)
 
             try:
-                transfer.receive(receivable_byte_num)
+                yield 'receive', (receivable_byte_num, )
             except NotEnoughData as e:
-                if transfer.buffer:
+                if transfer.buffer_view:
                     try:
-                        tls_record, parsed_length = TlsRecord.parse_immutable(transfer.buffer)
+                        tls_record, parsed_length = TlsRecord.parse_immutable(transfer.buffer_view.tobytes())
                         transfer.flush_buffer(parsed_length)
                     except (InvalidType, InvalidValue, NotEnoughData, TooMuchData):
                         self.raise_response_error(transfer)
@@ -1517,3 +1684,14 @@ class SslClientHandshake(TlsClient):
                         six.raise_from(NetworkError(NetworkErrorType.NO_CONNECTION), e)
                 else:
                     six.raise_from(NetworkError(NetworkErrorType.NO_RESPONSE), e)
+
+    def do_handshake(
+            self,
+            transfer,
+            hello_message=None,
+            record_version=TlsVersion.SSL2,
+            last_handshake_message_type=SslMessageType.SERVER_HELLO
+    ):
+        transfer.process_steps(self.get_handshake_steps(
+            transfer, hello_message, record_version, last_handshake_message_type
+        ))
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import attr
+
+from cryptoparser.tls.subprotocol import SslMessageType, TlsHandshakeType
+from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
+
+from cryptolyzer.common.transfer_async import L7TransferAsyncBase
+from cryptolyzer.tls.client import L7ClientStartTlsBase, L7ClientTlsBase, SslClientHandshake, TlsClientHandshake
+
+
+@attr.s
+class L7ClientTlsAsync(L7TransferAsyncBase):
+    l7_transfer = attr.ib(validator=attr.validators.instance_of(L7ClientTlsBase))
+
+    def __attrs_post_init__(self):
+        if isinstance(self.l7_transfer, L7ClientStartTlsBase):
+            raise ValueError('STARTTLS is not supported in asynchronous mode: {}'.format(self.l7_transfer.get_scheme()))
+
+    async def _do_handshake(
+            self,
+            l7_client,
+            hello_message,
+            record_version,
+            last_handshake_message_type
+    ):
+        await self.process_steps(
+            l7_client.get_handshake_steps, hello_message, record_version, last_handshake_message_type
+        )
+
+        return l7_client.server_messages
+
+    async def do_ssl_handshake(self, hello_message, last_handshake_message_type=SslMessageType.SERVER_HELLO):
+        return await self._do_handshake(
+            SslClientHandshake(),
+            hello_message,
+            TlsVersion.SSL2,
+            last_handshake_message_type
+        )
+
+    async def do_tls_handshake(
+            self,
+            hello_message,
+            record_version=TlsProtocolVersion(TlsVersion.TLS1),
+            last_handshake_message_type=TlsHandshakeType.SERVER_HELLO
+    ):
+        return await self._do_handshake(
+            TlsClientHandshake(),
+            hello_message,
+            record_version,
+            last_handshake_message_type
+        )
@@ -14,6 +14,7 @@ from cryptoparser.tls.extension import (
 from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase
+from cryptolyzer.common.concurrency import EliminationEngine
 from cryptolyzer.common.dhparam import parse_ecdh_params
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
@@ -106,45 +107,78 @@ class AnalyzerCurves(AnalyzerTlsBase):
         # cannot be reached as exception has been raised, just a pylint bug workaround
         raise NotImplementedError()
 
-    def analyze(self, analyzable, protocol_version):
-        supported_curves = OrderedDict()
-        checkable_curves = None
-        extension_supported = True
+    @staticmethod
+    def _get_supported_curves(analyzable, protocol_version, checkable_curves, ignored_curves):
+        supported_curves = []
+        remaining_curves = list(checkable_curves)
 
-        while True:
+        while remaining_curves:
             client_hello = TlsHandshakeClientHelloKeyExchangeECDHx(
-                protocol_version, analyzable.address, named_curves=checkable_curves,
+                protocol_version, analyzable.address, named_curves=list(remaining_curves),
             )
             try:
-                server_key_exchange = self._get_server_key_exchange(
-                    analyzable, client_hello, protocol_version, checkable_curves, extension_supported
+                server_key_exchange = AnalyzerCurves._get_server_key_exchange(
+                    analyzable, client_hello, protocol_version, remaining_curves, True
                 )
-            except StopIteration as e:
-                extension_supported = e.args[0]
+            except StopIteration:
                 break
 
             if server_key_exchange is None:
                 break
 
-            if checkable_curves is None:
-                # initial curve list comes from the generated client hello
-                checkable_curves = client_hello.extensions.get_item_by_type(
-                    TlsExtensionType.SUPPORTED_GROUPS
-                ).elliptic_curves
-
-            supported_curve = self.get_supported_curve(protocol_version, server_key_exchange)
-
-            try:
-                checkable_curves.remove(supported_curve)
-            except ValueError:
-                # choosen curve is an already checked one
-                extension_supported = False
+            supported_curve = AnalyzerCurves.get_supported_curve(protocol_version, server_key_exchange)
+            if supported_curve not in remaining_curves:
+                # choosen curve is not an offered one
+                ignored_curves.append(supported_curve)
                 break
 
+            remaining_curves.remove(supported_curve)
             LogSingleton().log(level=60, msg=six.u('Server offers elliptic-curve %s') % (
                 supported_curve.value.named_group.name,
             ))
-            supported_curves.update([(supported_curve.name, supported_curve), ])
+            supported_curves.append(supported_curve)
+
+        return supported_curves, remaining_curves
+
+    def analyze(self, analyzable, protocol_version):
+        supported_curves = OrderedDict()
+        extension_supported = True
+
+        client_hello = TlsHandshakeClientHelloKeyExchangeECDHx(protocol_version, analyzable.address)
+        try:
+            server_key_exchange = self._get_server_key_exchange(
+                analyzable, client_hello, protocol_version, None, extension_supported
+            )
+        except StopIteration as e:
+            extension_supported = e.args[0]
+            server_key_exchange = None
+
+        if server_key_exchange is not None:
+            # initial curve list comes from the generated client hello
+            checkable_curves = list(client_hello.extensions.get_item_by_type(
+                TlsExtensionType.SUPPORTED_GROUPS
+            ).elliptic_curves)
+            supported_curve = self.get_supported_curve(protocol_version, server_key_exchange)
+
+            if supported_curve in checkable_curves:
+                checkable_curves.remove(supported_curve)
+                LogSingleton().log(level=60, msg=six.u('Server offers elliptic-curve %s') % (
+                    supported_curve.value.named_group.name,
+                ))
+                supported_curves.update([(supported_curve.name, supported_curve), ])
+
+                ignored_curves = []
+                accepted_curves, _ = EliminationEngine().enumerate(
+                    analyzable,
+                    lambda l7_client, curves: self._get_supported_curves(
+                        l7_client, protocol_version, curves, ignored_curves
+                    ),
+                    checkable_curves
+                )
+                supported_curves.update([(curve.name, curve) for curve in accepted_curves])
+                extension_supported = not ignored_curves
+            else:
+                extension_supported = False
 
         return AnalyzerResultCurves(
             AnalyzerTargetTls.from_l7_client(analyzable, protocol_version),
@@ -7,13 +7,12 @@ import six
 
 from cryptodatahub.tls.algorithm import TlsNamedCurve
 
-from cryptoparser.common.exception import NotEnoughData
-
 from cryptoparser.tls.extension import TlsExtensionType, TlsExtensionKeyShareClient
 from cryptoparser.tls.subprotocol import TlsExtensionsClient, TlsHandshakeType, TlsAlertDescription
 from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase
+from cryptolyzer.common.concurrency import EliminationEngine
 from cryptolyzer.common.dhparam import (
     parse_tls_dh_params,
     DHParameter,
@@ -125,99 +124,141 @@ class AnalyzerDHParams(AnalyzerTlsBase):
         return dh_public_key
 
     @staticmethod
-    def _remove_selected_group_among_supported_ones(client_hello, selected_group):
-        try:
-            elliptic_curves_extension = client_hello.extensions.get_item_by_type(
-                TlsExtensionType.SUPPORTED_GROUPS
+    def _log_dhparam(dhparam, protocol_version):
+        if dhparam.well_known:
+            LogSingleton().log(level=60, msg=six.u('Server offers well-known DH public parameter %s (%s)') % (
+                dhparam.well_known.value.name, protocol_version,
+            ))
+        else:
+            LogSingleton().log(
+                level=60,
+                msg=six.u('Server offers custom DH public parameter with size %d-bit (%s)') % (
+                    dhparam.key_size, protocol_version,
+                )
             )
-        except KeyError:
-            return False
 
-        elliptic_curves = elliptic_curves_extension.elliptic_curves
-        for elliptic_curve in elliptic_curves:
-            if elliptic_curve == selected_group:
-                try:
-                    elliptic_curves.remove(elliptic_curve)
-                except NotEnoughData:
-                    client_hello.extensions.remove(elliptic_curves_extension)
-                    return False
+    @staticmethod
+    def _get_dhparam_tls_1_x(analyzable, protocol_version, named_groups):
+        client_hello = TlsHandshakeClientHelloKeyExchangeDHE(
+            protocol_version, analyzable.address, named_curves=list(named_groups)
+        )
+        server_messages = AnalyzerDHParams._get_server_messages(analyzable, False, client_hello)
+        dh_public_key = AnalyzerDHParams._get_public_key_tls_1_x(server_messages)
 
-        return True
+        return DHParameter(dh_public_key.public_numbers.parameter_numbers, dh_public_key.key_size)
 
     @staticmethod
-    def _analyze_tls_1_x(analyzable, client_hello):
-        dhparam = None
+    def _get_named_groups_tls_1_x(analyzable, protocol_version, checkable_groups, dhparams):
         named_groups = []
-        has_extenstion = True
-        while True:
+        remaining_groups = list(checkable_groups)
+
+        while remaining_groups:
             try:
-                server_messages = AnalyzerDHParams._get_server_messages(analyzable, False, client_hello)
-                dh_public_key = AnalyzerDHParams._get_public_key_tls_1_x(server_messages)
-                _dhparam = DHParameter(dh_public_key.public_numbers.parameter_numbers, dh_public_key.key_size)
+                dhparam = AnalyzerDHParams._get_dhparam_tls_1_x(analyzable, protocol_version, remaining_groups)
             except StopIteration:
                 break
 
-            is_rfc7919_dhparam = (_dhparam.well_known and
-                                  _dhparam.well_known in RFC7919_WELL_KNOWN_TO_NAMED_CURVE)
-            if is_rfc7919_dhparam:
-                named_group = RFC7919_WELL_KNOWN_TO_NAMED_CURVE[_dhparam.well_known]
-
-                # no supported group extension, but FFDHE parameter is used
-                if not has_extenstion or named_group in named_groups:
-                    dhparam = _dhparam
-                    named_groups = []
-                    LogSingleton().log(level=60, msg=six.u('Server offers well-known DH public parameter %s (%s)') % (
-                        dhparam.well_known.value.name, client_hello.protocol_version,
-                    ))
-                    break
-
-                has_extenstion = AnalyzerDHParams._remove_selected_group_among_supported_ones(client_hello, named_group)
-                named_groups.append(named_group)
-                LogSingleton().log(level=60, msg=six.u('Server offers FFDHE public parameter with size %d-bit (%s)') % (
-                    named_group.value.named_group.value.size, client_hello.protocol_version,
-                ))
-            else:
-                # no extension support, so only one DH parameter is possible
-                dhparam = _dhparam
-                if dhparam.well_known:
-                    LogSingleton().log(level=60, msg=six.u('Server offers well-known DH public parameter %s (%s)') % (
-                        dhparam.well_known.value.name, client_hello.protocol_version,
-                    ))
-                else:
-                    LogSingleton().log(
-                        level=60,
-                        msg=six.u('Server offers custom DH public parameter with size %d-bit (%s)') % (
-                            dhparam.key_size, client_hello.protocol_version,
-                        )
-                    )
+            named_group = RFC7919_WELL_KNOWN_TO_NAMED_CURVE.get(dhparam.well_known)
+            if named_group not in remaining_groups:
+                # choosen parameter is not negotiated by the offered groups
+                dhparams.append(dhparam)
                 break
 
+            remaining_groups.remove(named_group)
+            named_groups.append(named_group)
+            LogSingleton().log(level=60, msg=six.u('Server offers FFDHE public parameter with size %d-bit (%s)') % (
+                named_group.value.named_group.value.size, protocol_version,
+            ))
+
+        return named_groups, remaining_groups
+
+    @staticmethod
+    def _analyze_tls_1_x(analyzable, client_hello):
+        protocol_version = client_hello.protocol_version
+        try:
+            checkable_groups = client_hello.extensions.get_item_by_type(
+                TlsExtensionType.SUPPORTED_GROUPS
+            ).elliptic_curves
+        except KeyError:
+            checkable_groups = []
+
+        dhparams = []
+        # groups not accepted by a partition were rejected, or a parameter was used without negotiation,
+        # so there is nothing to reconcile
+        named_groups, remaining_groups = EliminationEngine().enumerate(
+            analyzable,
+            lambda l7_client, groups: AnalyzerDHParams._get_named_groups_tls_1_x(
+                l7_client, protocol_version, groups, dhparams
+            ),
+            checkable_groups,
+            reconcile=False
+        )
+
+        negotiated_without_extension = False
+        if not dhparams and not remaining_groups:
+            # all the offered groups are supported, parameter is checked without supported groups extension
+            try:
+                dhparams.append(AnalyzerDHParams._get_dhparam_tls_1_x(analyzable, protocol_version, []))
+                negotiated_without_extension = True
+            except StopIteration:
+                pass
+
+        if not dhparams:
+            return None, named_groups
+
+        dhparam = dhparams[0]
+        named_group = RFC7919_WELL_KNOWN_TO_NAMED_CURVE.get(dhparam.well_known)
+        if named_group is not None and (negotiated_without_extension or named_group in named_groups):
+            # FFDHE parameter is used, but not negotiated by the supported groups extension
+            named_groups = []
+
+        AnalyzerDHParams._log_dhparam(dhparam, protocol_version)
+
         return dhparam, named_groups
 
     @staticmethod
-    def _analyze_tls_1_3(analyzable, client_hello, protocol_version):
+    def _get_named_groups_tls_1_3(analyzable, protocol_version, checkable_groups):
         named_groups = []
-        extensions = [
-            extension
-            for extension in client_hello.extensions
-            if extension.extension_type != TlsExtensionType.KEY_SHARE
-        ]
-        client_hello.extensions = TlsExtensionsClient(extensions + [TlsExtensionKeyShareClient([])])
-
-        has_extenstion = True
-        while has_extenstion:
+        remaining_groups = list(checkable_groups)
+
+        while remaining_groups:
+            client_hello = TlsHandshakeClientHelloKeyExchangeDHE(
+                protocol_version, analyzable.address, named_curves=list(remaining_groups)
+            )
+            extensions = [
+                extension
+                for extension in client_hello.extensions
+                if extension.extension_type != TlsExtensionType.KEY_SHARE
+            ]
+            client_hello.extensions = TlsExtensionsClient(extensions + [TlsExtensionKeyShareClient([])])
+
             try:
                 server_messages = AnalyzerDHParams._get_server_messages(analyzable, True, client_hello)
                 named_group = AnalyzerDHParams._get_selected_group_tls_1_3(server_messages)
             except StopIteration:
                 break
 
+            if named_group not in remaining_groups:
+                break
+
+            remaining_groups.remove(named_group)
             named_groups.append(named_group)
-            has_extenstion = AnalyzerDHParams._remove_selected_group_among_supported_ones(client_hello, named_group)
             LogSingleton().log(level=60, msg=six.u('Server offers FFDHE public parameter with size %d-bit (%s)') % (
                 named_group.value.named_group.value.size, protocol_version,
             ))
 
+        return named_groups, remaining_groups
+
+    @staticmethod
+    def _analyze_tls_1_3(analyzable, client_hello, protocol_version):
+        named_groups, _ = EliminationEngine().enumerate(
+            analyzable,
+            lambda l7_client, groups: AnalyzerDHParams._get_named_groups_tls_1_3(
+                l7_client, protocol_version, groups
+            ),
+            client_hello.extensions.get_item_by_type(TlsExtensionType.SUPPORTED_GROUPS).elliptic_curves
+        )
+
         return named_groups
 
     def analyze(self, analyzable, protocol_version):
@@ -24,7 +24,7 @@ from cryptoparser.tls.subprotocol import (
 from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase
-from cryptolyzer.common.exception import NetworkError
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
 from cryptolyzer.common.utils import LogSingleton
 from cryptolyzer.tls.client import (
@@ -105,7 +105,9 @@ class AnalyzerExtensions(AnalyzerTlsBase):
                     extension.extension_type == TlsExtensionType.APPLICATION_LAYER_PROTOCOL_NEGOTIATION,
                     server_messages[TlsHandshakeType.SERVER_HELLO].extensions
                 ))
-            except (TlsAlert, NetworkError):
+            except (TlsAlert, NetworkError) as e:
+                if isinstance(e, NetworkError) and e.error == NetworkErrorType.CIRCUIT_OPEN:
+                    raise e
                 break
 
             if not alpn_extensions:
@@ -142,6 +144,8 @@ class AnalyzerExtensions(AnalyzerTlsBase):
                 client_hello, last_handshake_message_type=TlsHandshakeType.SERVER_HELLO
             )
         except (TlsAlert, NetworkError) as e:
+            if isinstance(e, NetworkError) and e.error == NetworkErrorType.CIRCUIT_OPEN:
+                raise e
             six.raise_from(KeyError, e)
 
         return server_messages
@@ -190,7 +194,9 @@ class AnalyzerExtensions(AnalyzerTlsBase):
 
             try:
                 server_messages = analyzable.do_tls_handshake(client_hello)
-            except (TlsAlert, NetworkError):
+            except (TlsAlert, NetworkError) as e:
+                if isinstance(e, NetworkError) and e.error == NetworkErrorType.CIRCUIT_OPEN:
+                    raise e
                 break
 
             supported_compression_method = server_messages[TlsHandshakeType.SERVER_HELLO].compression_method
@@ -212,7 +218,9 @@ class AnalyzerExtensions(AnalyzerTlsBase):
         client_hello = cls._get_client_hello(analyzable, protocol_version)
         try:
             server_messages = analyzable.do_tls_handshake(client_hello)
-        except (TlsAlert, NetworkError):
+        except (TlsAlert, NetworkError) as e:
+            if isinstance(e, NetworkError) and e.error == NetworkErrorType.CIRCUIT_OPEN:
+                raise e
             return None
 
         clock_skew = (
@@ -257,7 +265,9 @@ class AnalyzerExtensions(AnalyzerTlsBase):
         client_hello.session_id = TlsSessionIdVector(list(range(32)))
         try:
             server_messages = analyzable.do_tls_handshake(client_hello)
-        except (TlsAlert, NetworkError):
+        except (TlsAlert, NetworkError) as e:
+            if isinstance(e, NetworkError) and e.error == NetworkErrorType.CIRCUIT_OPEN:
+                raise e
             session_cache_supported = False
 
         if session_cache_supported is None:
@@ -55,6 +55,7 @@ from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
 from cryptolyzer.__setup__ import __title__, __version__
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError, SecurityErrorType
 from cryptolyzer.common.application import L7ServerBase, L7ServerHandshakeBase, L7ServerConfigurationBase
+from cryptolyzer.tls.ciphersuite import get_cipher_suites
 
 
 @attr.s
@@ -65,7 +66,7 @@ class TlsServerConfiguration(L7ServerConfigurationBase):
         validator=attr.validators.deep_iterable(attr.validators.instance_of(TlsProtocolVersion))
     )
     cipher_suites = attr.ib(
-        default=list(filter(lambda cipher_suite: cipher_suite.value.bulk_cipher == BlockCipher.RC2, TlsCipherSuite)),
+        default=list(get_cipher_suites(bulk_ciphers=[BlockCipher.RC2])),
         validator=attr.validators.deep_iterable(attr.validators.instance_of(TlsCipherSuite))
     )
     fallback_to_ssl = attr.ib(default=False, validator=attr.validators.instance_of(bool))
@@ -508,17 +509,15 @@ class L7ServerStartTlsTextBase(L7ServerStartTlsBase):
         if greeting:
             self.l4_transfer.send(greeting)
 
-        self.l4_transfer.receive_line()
+        line = self.l4_transfer.read_line()
         capabilities_request_prefix = self._get_capabilities_request_prefix()
-        if capabilities_request_prefix and self.l4_transfer.buffer.startswith(capabilities_request_prefix):
-            self.l4_transfer.flush_buffer()
+        if capabilities_request_prefix and line.startswith(capabilities_request_prefix):
             self.l4_transfer.send(self._get_capabilities_response())
-            self.l4_transfer.receive_line()
+            line = self.l4_transfer.read_line()
 
         starttls_request_prefix = self._get_starttls_request_prefix()
-        if not self.l4_transfer.buffer.startswith(starttls_request_prefix):
+        if not line.startswith(starttls_request_prefix):
             raise SecurityError(SecurityErrorType.UNSUPPORTED_SECURITY)
-        self.l4_transfer.flush_buffer()
 
         self.l4_transfer.send(self._get_starttls_response())
 
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 
+import itertools
+
 import six
 
 import attr
@@ -10,6 +12,7 @@ from cryptoparser.tls.extension import TlsExtensionSignatureAlgorithms, TlsSigna
 from cryptoparser.tls.subprotocol import TlsAlertDescription, TlsHandshakeType
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase
+from cryptolyzer.common.concurrency import DependencyGraph, EliminationEngine
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
 from cryptolyzer.common.utils import LogSingleton
@@ -74,7 +77,7 @@ class AnalyzerSigAlgos(AnalyzerTlsBase):
         return supported_algorithms
 
     def analyze(self, analyzable, protocol_version):
-        supported_algorithms = []
+        dependency_graph = DependencyGraph(EliminationEngine().partition_count)
         for client_hello_class in [
                     TlsHandshakeClientHelloAuthenticationRSA,
                     TlsHandshakeClientHelloAuthenticationECDSA,
@@ -85,10 +88,13 @@ class AnalyzerSigAlgos(AnalyzerTlsBase):
                 protocol_version=protocol_version,
                 hostname=analyzable.address,
             )
-            supported_algorithms.extend(
-                self._analyze_algorithms(analyzable, client_hello)
+            dependency_graph.add_task(
+                client_hello_class,
+                lambda client_hello=client_hello: self._analyze_algorithms(analyzable.clone(), client_hello)
             )
 
+        supported_algorithms = list(itertools.chain.from_iterable(dependency_graph.run().values()))
+
         return AnalyzerResultSigAlgos(
             AnalyzerTargetTls.from_l7_client(analyzable, protocol_version),
             supported_algorithms
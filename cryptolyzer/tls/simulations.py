@@ -47,7 +47,7 @@ from cryptolyzer.common.dhparam import (
     WellKnownDHParams,
     parse_tls_dh_params,
 )
-from cryptolyzer.common.exception import ErrorParams, NetworkError, SecurityError, SecurityErrorType
+from cryptolyzer.common.exception import ErrorParams, NetworkError, NetworkErrorType, SecurityError, SecurityErrorType
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
 from cryptolyzer.common.utils import LogSingleton
 
@@ -306,6 +306,8 @@ class AnalyzerSimulations(AnalyzerTlsBase):
             try:
                 simulation_result = self._simulate_tls_client(analyzable, client_hello)
             except (NetworkError, SecurityError) as e:
+                if isinstance(e, NetworkError) and e.error == NetworkErrorType.CIRCUIT_OPEN:
+                    raise e
                 failed_clients.append((tls_client.value.meta, e.error.value))
                 LogSingleton().log(
                     level=60,
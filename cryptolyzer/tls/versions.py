@@ -4,7 +4,6 @@ import six
 
 import attr
 
-from cryptoparser.tls.ciphersuite import TlsCipherSuite
 from cryptoparser.tls.extension import TlsExtensionType, TlsExtensionKeyShareClient
 from cryptoparser.tls.subprotocol import TlsExtensionsClient, TlsHandshakeType, TlsAlertDescription
 from cryptoparser.tls.subprotocol import SslMessageType, SslErrorType
@@ -14,6 +13,7 @@ from cryptolyzer.common.analyzer import AnalyzerTlsBase
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType, SecurityError
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
 from cryptolyzer.common.utils import LogSingleton
+from cryptolyzer.tls.ciphersuite import get_cipher_suites
 from cryptolyzer.tls.client import (
     SslError,
     SslHandshakeClientHelloAnyAlgorithm,
@@ -62,8 +62,9 @@ class AnalyzerVersions(AnalyzerTlsBase):
         except SslError as e:
             if e.error != SslErrorType.NO_CIPHER_ERROR:
                 raise e
-        except NetworkError:
-            pass
+        except NetworkError as e:
+            if e.error == NetworkErrorType.CIRCUIT_OPEN:
+                raise e
         except SecurityError:
             pass
         else:
@@ -162,7 +163,7 @@ class AnalyzerVersions(AnalyzerTlsBase):
             client_hello = TlsHandshakeClientHelloSpecalization(
                 analyzable.address,
                 checkable_protocols,
-                TlsCipherSuite,
+                get_cipher_suites(),
                 named_curves=None,
                 signature_algorithms=None,
                 extensions=[],
@@ -185,6 +186,8 @@ class AnalyzerVersions(AnalyzerTlsBase):
                     alerts_unsupported_tls_version = exc.args[0]
                     break
             except NetworkError as e:
+                if e.error == NetworkErrorType.CIRCUIT_OPEN:
+                    raise e
                 if e.error != NetworkErrorType.NO_RESPONSE:
                     #  handled in case of early TLS versions
                     pass  # pragma: no cover
@@ -4,14 +4,19 @@ import itertools
 
 import attr
 
+from cryptodatahub.common.algorithm import KeyExchange
+from cryptodatahub.tls.algorithm import TlsNamedCurve
 
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
 from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
 
 from cryptolyzer.common.analyzer import AnalyzerTlsBase
+from cryptolyzer.common.bitset import TlsCipherSuiteBitSet, TlsNamedCurveBitSet
 from cryptolyzer.common.result import AnalyzerResultTls, AnalyzerTargetTls
 from cryptolyzer.common.utils import LogSingleton
 
 from cryptolyzer.tls.ciphers import AnalyzerCipherSuites
+from cryptolyzer.tls.ciphersuite import get_cipher_suite_set
 from cryptolyzer.tls.client import (
     TlsHandshakeClientHelloBlockCipherModeCBC,
     TlsHandshakeClientHelloBulkCipherBlockSize64,
@@ -25,6 +30,27 @@ from cryptolyzer.tls.versions import AnalyzerVersions
 
 @attr.s
 class AnalyzerResultVulnerabilityCiphers(object):  # pylint: disable=too-many-instance-attributes
+    _RC4_CIPHER_SUITES = TlsCipherSuiteBitSet.from_iterable(TlsHandshakeClientHelloStreamCipherRC4.CIPHER_SUITES)
+    _NULL_ENCRYPTION_CIPHER_SUITES = TlsCipherSuiteBitSet.from_iterable(
+        TlsHandshakeClientHelloBulkCipherNull.CIPHER_SUITES
+    )
+    _ANONYMOUS_DH_CIPHER_SUITES = TlsCipherSuiteBitSet.from_iterable(
+        TlsHandshakeClientHelloKeyExchangeAnonymousDH.CIPHER_SUITES
+    )
+    _EXPORT_RSA_CIPHER_SUITES = TlsCipherSuiteBitSet.from_iterable(
+        TlsHandshakeClientHelloKeyExchangeAnonymousDH.CIPHER_SUITES
+    )
+    _SWEET32_CIPHER_SUITES = TlsCipherSuiteBitSet.from_iterable(
+        TlsHandshakeClientHelloBulkCipherBlockSize64.CIPHER_SUITES
+    )
+    _LUCKY13_CIPHER_SUITES = TlsCipherSuiteBitSet.from_iterable(TlsHandshakeClientHelloBlockCipherModeCBC.CIPHER_SUITES)
+    _FORWARD_SECRET_CIPHER_SUITES = get_cipher_suite_set(key_exchanges=[
+        key_exchange
+        for key_exchange in KeyExchange
+        if key_exchange.value.forward_secret
+    ])
+    _EXPORT_GRADE_CIPHER_SUITES = get_cipher_suite_set(export_grade=True)
+
     lucky13 = attr.ib(
         validator=attr.validators.instance_of(bool),
         metadata={'human_readable_name': 'Lucky Thirteen attack'},
@@ -60,42 +86,19 @@ class AnalyzerResultVulnerabilityCiphers(object):  # pylint: disable=too-many-in
 
     @staticmethod
     def from_cipher_suites(cipher_suites):
-        rc4_cipher_suites = set(TlsHandshakeClientHelloStreamCipherRC4.CIPHER_SUITES)
-        rc4 = bool(rc4_cipher_suites & set(cipher_suites))
-
-        null_encryption_cipher_suites = set(TlsHandshakeClientHelloBulkCipherNull.CIPHER_SUITES)
-        null_encryption = bool(null_encryption_cipher_suites & set(cipher_suites))
-
-        anonymous_dh_cipher_suites = set(TlsHandshakeClientHelloKeyExchangeAnonymousDH.CIPHER_SUITES)
-        anonymous_dh = bool(anonymous_dh_cipher_suites & set(cipher_suites))
-
-        export_rsa_cipher_suites = set(TlsHandshakeClientHelloKeyExchangeAnonymousDH.CIPHER_SUITES)
-        freak = bool(export_rsa_cipher_suites & set(cipher_suites))
-
-        sweet32_cipher_suites = set(TlsHandshakeClientHelloBulkCipherBlockSize64.CIPHER_SUITES)
-        sweet32 = bool(sweet32_cipher_suites & set(cipher_suites))
-
-        lucky13_cipher_suites = set(TlsHandshakeClientHelloBlockCipherModeCBC.CIPHER_SUITES)
-        lucky13 = bool(lucky13_cipher_suites & set(cipher_suites))
-
-        non_forward_secret = any(map(
-            lambda cipher_suite: (
-                cipher_suite.value.key_exchange is not None and
-                cipher_suite.value.key_exchange.value.forward_secret
-            ), cipher_suites
+        cipher_suites = TlsCipherSuiteBitSet.from_iterable(filter(
+            lambda cipher_suite: isinstance(cipher_suite, TlsCipherSuite), cipher_suites
         ))
 
-        export_grade = any(map(lambda cipher_suite: cipher_suite.value.export_grade, cipher_suites))
-
         return AnalyzerResultVulnerabilityCiphers(
-            rc4=rc4,
-            null_encryption=null_encryption,
-            anonymous_dh=anonymous_dh,
-            freak=freak,
-            sweet32=sweet32,
-            lucky13=lucky13,
-            non_forward_secret=non_forward_secret,
-            export_grade=export_grade,
+            rc4=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._RC4_CIPHER_SUITES),
+            null_encryption=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._NULL_ENCRYPTION_CIPHER_SUITES),
+            anonymous_dh=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._ANONYMOUS_DH_CIPHER_SUITES),
+            freak=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._EXPORT_RSA_CIPHER_SUITES),
+            sweet32=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._SWEET32_CIPHER_SUITES),
+            lucky13=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._LUCKY13_CIPHER_SUITES),
+            non_forward_secret=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._FORWARD_SECRET_CIPHER_SUITES),
+            export_grade=bool(cipher_suites & AnalyzerResultVulnerabilityCiphers._EXPORT_GRADE_CIPHER_SUITES),
         )
 
 
@@ -130,6 +133,12 @@ class AnalyzerResultVulnerabilityVersions(object):  # pylint: disable=too-few-pu
 
 @attr.s
 class AnalyzerResultVulnerabilityDHParams(object):
+    _LARGE_GROUPS = TlsNamedCurveBitSet.from_iterable(
+        named_curve
+        for named_curve in TlsNamedCurve
+        if named_curve.value.named_group is not None and named_curve.value.named_group.value.size > 4096
+    )
+
     logjam = attr.ib(
         validator=attr.validators.instance_of(bool),
         metadata={'human_readable_name': 'Logjam attack'},
@@ -143,7 +152,7 @@ class AnalyzerResultVulnerabilityDHParams(object):
     def from_dhparam(dhparam, groups):
         logjam = dhparam is not None and dhparam.key_size <= 1024
         dheat = ((dhparam is not None and dhparam.key_size > 4096) or
-                 (max([group.value.named_group.value.size for group in groups] + [0]) > 4096))
+                 bool(TlsNamedCurveBitSet.from_iterable(groups) & AnalyzerResultVulnerabilityDHParams._LARGE_GROUPS))
 
         return AnalyzerResultVulnerabilityDHParams(
             logjam=logjam,
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from cryptodatahub.tls.algorithm import TlsNamedCurve
+
+from cryptoparser.common.base import Serializable
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
+
+from cryptolyzer.common.bitset import TlsCipherSuiteBitSet, TlsNamedCurveBitSet
+
+
+class TestEnumBitSet(unittest.TestCase):
+    def test_members(self):
+        cipher_suites = [TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA, TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA]
+        cipher_suite_set = TlsCipherSuiteBitSet.from_iterable(cipher_suites)
+
+        self.assertEqual(len(cipher_suite_set), 2)
+        self.assertIn(TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA, cipher_suite_set)
+        self.assertNotIn(TlsCipherSuite.TLS_RSA_WITH_NULL_MD5, cipher_suite_set)
+        self.assertNotIn(TlsNamedCurve.SECP256R1, cipher_suite_set)
+        self.assertEqual(list(cipher_suite_set), sorted(cipher_suites, key=list(TlsCipherSuite).index))
+
+        self.assertFalse(TlsCipherSuiteBitSet())
+        self.assertEqual(list(TlsNamedCurveBitSet.all()), list(TlsNamedCurve))
+        with self.assertRaises(ValueError):
+            TlsCipherSuiteBitSet.from_iterable([TlsNamedCurve.SECP256R1])
+
+    def test_operators(self):
+        rsa_set = TlsCipherSuiteBitSet.from_iterable([
+            TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA, TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA
+        ])
+        aes_128_set = TlsCipherSuiteBitSet.from_iterable([
+            TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA, TlsCipherSuite.TLS_DHE_RSA_WITH_AES_128_CBC_SHA
+        ])
+
+        self.assertEqual(list(rsa_set & aes_128_set), [TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA])
+        self.assertEqual(list(rsa_set - aes_128_set), [TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA])
+        self.assertEqual(len(rsa_set | aes_128_set), 3)
+        with self.assertRaises(TypeError):
+            rsa_set | TlsNamedCurveBitSet()  # pylint: disable=expression-not-assigned
+
+    def test_serialization(self):
+        named_curve_set = TlsNamedCurveBitSet.from_iterable([TlsNamedCurve.X25519, TlsNamedCurve.SECP256R1])
+        names = Serializable._json_traverse(  # pylint: disable=protected-access
+            named_curve_set, Serializable._json_result  # pylint: disable=protected-access
+        )
+
+        self.assertEqual(sorted(names), ['SECP256R1', 'X25519'])
+        self.assertEqual(TlsNamedCurveBitSet.from_names(names), named_curve_set)
+        with self.assertRaises(ValueError):
+            TlsNamedCurveBitSet.from_names(['UNKNOWN'])
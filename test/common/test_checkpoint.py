@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import six
+import urllib3
+
+from cryptolyzer.common.analyzer import ProtocolHandlerBase
+from cryptolyzer.common.checkpoint import CheckpointJournal
+from cryptolyzer.common.result import AnalyzerResultError
+from cryptolyzer.common.scanner import ScanTarget
+
+
+class TestCheckpointJournal(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'journal')
+        self.protocol_handler = ProtocolHandlerBase.from_protocol('tls')
+        self.analyzer = self.protocol_handler.analyzer_from_name('versions')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _get_scan_targets(self, hosts):
+        return [
+            ScanTarget(self.protocol_handler, self.analyzer, urllib3.util.parse_url('tls://{}'.format(host)))
+            for host in hosts
+        ]
+
+    @staticmethod
+    def _get_hosts(scan_targets):
+        return [scan_target.uri.host for scan_target in scan_targets]
+
+    def test_resume(self):
+        error = AnalyzerResultError('invalid line', 'invalid target line')
+        checkpoint_journal = CheckpointJournal(self.path)
+        filtered = checkpoint_journal.filter(self._get_scan_targets(['a', 'b', 'c', 'b']) + [error])
+        scan_target_a = next(filtered)
+        scan_target_b = next(filtered)
+        checkpoint_journal.complete(scan_target_a)
+        self.assertEqual(list(filtered)[1:], [error])
+        checkpoint_journal.close()
+
+        with io.open(self.path, 'a', encoding='utf-8') as journal_file:
+            journal_file.write(six.u('{"event": "comple'))
+
+        checkpoint_journal = CheckpointJournal(self.path, resume=True)
+        filtered = list(checkpoint_journal.filter(self._get_scan_targets(['a', 'b', 'c', 'd'])))
+        self.assertEqual(self._get_hosts(filtered), ['b', 'c', 'd'])
+        self.assertEqual(filtered[0].uri, scan_target_b.uri)
+        for scan_target in filtered:
+            checkpoint_journal.complete(scan_target)
+        checkpoint_journal.close()
+
+        checkpoint_journal = CheckpointJournal(self.path, resume=True)
+        self.assertEqual(list(checkpoint_journal.filter(self._get_scan_targets(['a', 'b', 'c', 'd']))), [])
+        checkpoint_journal.close()
+
+        with self.assertRaises(ValueError):
+            CheckpointJournal(self.path)
+
+        os.remove(self.path)
+        checkpoint_journal = CheckpointJournal(self.path)
+        self.assertEqual(self._get_hosts(checkpoint_journal.filter(self._get_scan_targets(['a']))), ['a'])
+        checkpoint_journal.close()
+
+    def test_completed_not_kept(self):
+        checkpoint_journal = CheckpointJournal(self.path)
+        for scan_target in checkpoint_journal.filter(self._get_scan_targets(['a', 'b'])):
+            checkpoint_journal.complete(scan_target)
+        self.assertEqual(checkpoint_journal._started, set())  # pylint: disable=protected-access
+        self.assertEqual(checkpoint_journal._completed, set())  # pylint: disable=protected-access
+        checkpoint_journal.close()
+
+    def test_replayed_not_repeated(self):
+        checkpoint_journal = CheckpointJournal(self.path)
+        next(checkpoint_journal.filter(self._get_scan_targets(['a'])))
+        checkpoint_journal.close()
+
+        checkpoint_journal = CheckpointJournal(self.path, resume=True)
+        filtered = checkpoint_journal.filter(self._get_scan_targets(['b', 'a']))
+        checkpoint_journal.complete(next(filtered))
+        self.assertEqual(self._get_hosts(filtered), ['b'])
+        checkpoint_journal.close()
+
+    def test_torn_record(self):
+        checkpoint_journal = CheckpointJournal(self.path)
+        scan_target = next(checkpoint_journal.filter(self._get_scan_targets(['a'])))
+        checkpoint_journal.close()
+
+        with io.open(self.path, 'a', encoding='utf-8') as journal_file:
+            journal_file.write(six.u('{"event": "comple'))
+
+        checkpoint_journal = CheckpointJournal(self.path, resume=True)
+        checkpoint_journal.complete(scan_target)
+        checkpoint_journal.close()
+
+        checkpoint_journal = CheckpointJournal(self.path, resume=True)
+        self.assertEqual(list(checkpoint_journal.filter(self._get_scan_targets(['a']))), [])
+        checkpoint_journal.close()
@@ -0,0 +1,500 @@
+# -*- coding: utf-8 -*-
+
+import threading
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from cryptolyzer.common.concurrency import (
+    AdaptiveKeyedSemaphore,
+    CircuitBreaker,
+    CongestionWindow,
+    DependencyGraph,
+    EliminationEngine,
+    PreConnectPool,
+    RateLimiter,
+    RttEstimator,
+    TokenBucket,
+)
+from cryptolyzer.common.utils import LogSingleton
+
+
+class TestDependencyGraph(unittest.TestCase):
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            DependencyGraph(0)
+
+        dependency_graph = DependencyGraph()
+        with self.assertRaises(KeyError):
+            dependency_graph.add_task('task', lambda result: result, ('unknown', ))
+
+        dependency_graph.add_task('task', lambda: None)
+        with self.assertRaises(KeyError):
+            dependency_graph.add_task('task', lambda: None)
+
+    def test_error_propagated(self):
+        dependency_graph = DependencyGraph()
+        dependency_graph.add_task('root', lambda: 1)
+        dependency_graph.add_task('failing', lambda root: 1 / 0, ('root', ))
+        dependency_graph.add_task('leaf', lambda failing: failing, ('failing', ))
+
+        with self.assertRaises(ZeroDivisionError):
+            dependency_graph.run()
+
+    def test_empty(self):
+        self.assertEqual(DependencyGraph().run(), {})
+
+    def test_run(self):
+        lock = threading.Lock()
+        running = []
+        max_running = []
+
+        def task(name, *args):
+            with lock:
+                running.append(name)
+                max_running.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(name)
+
+            return name + ''.join(args)
+
+        dependency_graph = DependencyGraph()
+        dependency_graph.add_task('a', lambda: task('a'))
+        dependency_graph.add_task('b', lambda a: task('b', a), ('a', ))
+        dependency_graph.add_task('c', lambda a: task('c', a), ('a', ))
+        dependency_graph.add_task('d', lambda b, c: task('d', b, c), ('b', 'c'))
+        dependency_graph.add_task('e', lambda: task('e'))
+
+        completed = []
+        results = dependency_graph.run(lambda name, result: completed.append((name, result)))
+        self.assertEqual(list(results.keys()), ['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(results['d'], 'dbaca')
+        self.assertGreater(max(max_running), 1)
+        self.assertEqual(sorted(completed), sorted(results.items()))
+        self.assertLess(completed.index(('a', 'a')), completed.index(('d', 'dbaca')))
+
+    def test_log_state_inherited(self):
+        dependency_graph = DependencyGraph()
+        dependency_graph.add_task('disabled', lambda: LogSingleton().disabled)
+
+        LogSingleton().disabled = True
+        try:
+            self.assertEqual(dependency_graph.run(), {'disabled': True})
+        finally:
+            LogSingleton().disabled = False
+
+        self.assertEqual(dependency_graph.run(), {'disabled': False})
+
+
+class EliminationServer(object):
+    def __init__(self, supported):
+        self.supported = supported
+        self.lock = threading.Lock()
+        self.clients = set()
+        self.handshake_count = 0
+
+    def clone(self):
+        with self.lock:
+            self.clients.add(threading.current_thread().ident)
+        return self
+
+    def enumerate(self, l7_client, candidates):  # pylint: disable=unused-argument
+        accepted = []
+        remaining = list(candidates)
+        while remaining:
+            with self.lock:
+                self.handshake_count += 1
+
+            chosen = [candidate for candidate in self.supported if candidate in remaining]
+            if not chosen:
+                break
+
+            remaining.remove(chosen[0])
+            accepted.append(chosen[0])
+
+        return accepted, remaining
+
+    def choose(self, *candidates):
+        with self.lock:
+            self.handshake_count += 1
+
+        return next((candidate for candidate in self.supported if candidate in candidates), None)
+
+
+class TestEliminationEngine(unittest.TestCase):
+    def tearDown(self):
+        EliminationEngine().partition_count = EliminationEngine.DEFAULT_PARTITION_COUNT
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            EliminationEngine().partition_count = 0
+
+    def test_sequential(self):
+        server = EliminationServer([5, 3, 1])
+        self.assertEqual(
+            EliminationEngine().enumerate(server, server.enumerate, range(8)),
+            ([5, 3, 1], [0, 2, 4, 6, 7])
+        )
+        self.assertEqual(server.handshake_count, 4)
+        self.assertEqual(server.clients, set())
+
+    def test_partitioned(self):
+        EliminationEngine().partition_count = 3
+
+        server = EliminationServer([5, 3, 1])
+        accepted, remaining = EliminationEngine().enumerate(server, server.enumerate, range(8))
+        self.assertEqual(sorted(accepted), [1, 3, 5])
+        self.assertEqual(remaining, [0, 2, 4, 6, 7])
+        self.assertEqual(server.handshake_count, 3 + 3 + 1)
+
+        server = EliminationServer([])
+        self.assertEqual(EliminationEngine().enumerate(server, server.enumerate, range(8)), ([], list(range(8))))
+
+        server = EliminationServer([1])
+        self.assertEqual(EliminationEngine().enumerate(server, server.enumerate, [1]), ([1], []))
+        self.assertEqual(server.handshake_count, 1)
+
+    def test_reconciliation(self):
+        EliminationEngine().partition_count = 2
+
+        def enumerate_func(l7_client, candidates):  # pylint: disable=unused-argument
+            # candidate 0 is accepted only when it is offered together with candidate 1
+            if 0 in candidates and 1 in candidates:
+                return [0], [candidate for candidate in candidates if candidate != 0]
+
+            return [], candidates
+
+        self.assertEqual(
+            EliminationEngine().enumerate(EliminationServer([]), enumerate_func, range(4)),
+            ([0], [1, 2, 3])
+        )
+
+    def test_merge_chains(self):
+        EliminationEngine().partition_count = 3
+
+        server = EliminationServer([7, 0, 5, 3, 6, 1])
+        chains, remaining = EliminationEngine().enumerate_chains(server, server.enumerate, range(8))
+        self.assertEqual(chains, [[0, 3, 6], [7, 1], [5]])
+        self.assertEqual(remaining, [2, 4])
+
+        server.handshake_count = 0
+        self.assertEqual(EliminationEngine.merge_chains(chains, server.choose), server.supported)
+        self.assertLessEqual(server.handshake_count, (1 + 2 - 1) + (3 + 3 - 1))
+
+        self.assertEqual(EliminationEngine.merge_chains([[1, 2]], server.choose), [1, 2])
+        self.assertEqual(EliminationEngine.merge_chains([], server.choose), [])
+        self.assertEqual(EliminationEngine.merge_chains([[1, 2], [3]], lambda *candidates: None), None)
+
+
+class TestCongestionWindow(unittest.TestCase):
+    def test_aimd(self):
+        window = CongestionWindow(3)
+        self.assertEqual(window.limit, 1)
+
+        window.increase()
+        self.assertEqual(window.limit, 2)
+        window.increase()
+        self.assertEqual(window.size, 2.5)
+        for _ in range(3):
+            window.increase()
+        self.assertEqual(window.limit, 3)
+        self.assertEqual(window.size, 3.0)
+
+        window.decrease()
+        self.assertEqual(window.size, 1.5)
+        window.decrease()
+        self.assertEqual(window.size, 1.0)
+
+
+class TestAdaptiveKeyedSemaphore(unittest.TestCase):
+    def test_adaptive(self):
+        semaphore = AdaptiveKeyedSemaphore(2, adaptive=True)
+        semaphore.acquire('key')
+
+        acquired = []
+        thread = threading.Thread(target=lambda: acquired.append(semaphore.acquire('key')))
+        thread.start()
+        thread.join(0.1)
+        self.assertEqual(acquired, [])
+
+        semaphore.increase('key')
+        thread.join()
+        self.assertEqual(acquired, [None])
+        self.assertEqual(semaphore.get_window_size('key'), 2.0)
+
+        semaphore.release('key')
+        semaphore.release('key')
+
+    def test_reset_windows(self):
+        semaphore = AdaptiveKeyedSemaphore(2, adaptive=True)
+        semaphore.increase('key')
+        self.assertEqual(semaphore.get_window_size('key'), 2.0)
+
+        semaphore.reset_windows()
+        self.assertEqual(semaphore.get_window_size('key'), 1.0)
+
+    @staticmethod
+    def test_not_adaptive():
+        semaphore = AdaptiveKeyedSemaphore(2)
+        semaphore.acquire('key')
+        semaphore.acquire('key')
+        semaphore.release('key')
+        semaphore.release('key')
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0, 1)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, 0)
+
+    def test_reserve(self):
+        bucket = TokenBucket(2, 2)
+        self.assertEqual(bucket.reserve(10.0), 0.0)
+        self.assertEqual(bucket.reserve(10.0), 0.0)
+        self.assertEqual(bucket.reserve(10.0), 0.5)
+        self.assertEqual(bucket.reserve(10.0), 1.0)
+        self.assertFalse(bucket.is_full(11.0))
+        self.assertEqual(bucket.reserve(12.0), 0.0)
+        self.assertTrue(bucket.is_full(20.0))
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.sleeps = []
+        self.time_patcher = mock.patch.object(time, 'time', return_value=100.0)
+        self.sleep_patcher = mock.patch.object(time, 'sleep', side_effect=self.sleeps.append)
+        self.time_patcher.start()
+        self.sleep_patcher.start()
+
+    def tearDown(self):
+        self.sleep_patcher.stop()
+        self.time_patcher.stop()
+        RateLimiter().connections_per_ip = None
+        RateLimiter().connections_per_network = None
+        RateLimiter().burst = 1
+        RateLimiter().reset()
+
+    def test_get_network(self):
+        self.assertEqual(RateLimiter.get_network('192.0.2.1'), '192.0.2.0/24')
+        self.assertEqual(RateLimiter.get_network('2001:db8::1'), '2001:db8::/64')
+        self.assertEqual(RateLimiter.get_network('localhost'), 'localhost')
+
+    def test_unlimited(self):
+        for _ in range(3):
+            RateLimiter().acquire('192.0.2.1')
+        self.assertEqual(self.sleeps, [])
+
+    def test_per_ip(self):
+        RateLimiter().connections_per_ip = 2
+        RateLimiter().acquire('192.0.2.1')
+        RateLimiter().acquire('192.0.2.2')
+        RateLimiter().acquire('192.0.2.1')
+        self.assertEqual(self.sleeps, [0.5])
+
+    def test_per_network(self):
+        RateLimiter().connections_per_network = 1
+        RateLimiter().burst = 2
+        RateLimiter().acquire('192.0.2.1')
+        RateLimiter().acquire('192.0.2.2')
+        RateLimiter().acquire('192.0.2.3')
+        RateLimiter().acquire('198.51.100.1')
+        self.assertEqual(self.sleeps, [1.0])
+
+    def test_backoff(self):
+        RateLimiter().backoff('192.0.2.1', 5)
+        RateLimiter().backoff('192.0.2.1', 1)
+        self.assertTrue(RateLimiter().is_backed_off('192.0.2.1'))
+        self.assertFalse(RateLimiter().is_backed_off('192.0.2.2'))
+        RateLimiter().acquire('192.0.2.2')
+        RateLimiter().acquire('192.0.2.1')
+        self.assertEqual(self.sleeps, [5.0])
+
+        with mock.patch.object(time, 'time', return_value=105.0):
+            self.assertFalse(RateLimiter().is_backed_off('192.0.2.1'))
+
+
+class TestRttEstimator(unittest.TestCase):
+    def tearDown(self):
+        RttEstimator().enabled = False
+        RttEstimator().floor = RttEstimator.DEFAULT_FLOOR
+        RttEstimator().ceiling = None
+        RttEstimator().reset()
+
+    def test_disabled(self):
+        RttEstimator().add_sample('192.0.2.1', 0.1)
+        self.assertEqual(RttEstimator().get_timeout('192.0.2.1', 5), 5)
+
+    def test_timeout(self):
+        RttEstimator().enabled = True
+        self.assertEqual(RttEstimator().get_timeout('192.0.2.1', 5), 5)
+
+        RttEstimator().add_sample('192.0.2.1', 0.1)
+        self.assertAlmostEqual(RttEstimator().get_timeout('192.0.2.1', 5), 4 * (0.1 + 4 * 0.05))
+        RttEstimator().add_sample('192.0.2.1', 0.1)
+        self.assertAlmostEqual(RttEstimator().get_timeout('192.0.2.1', 5), 4 * (0.1 + 4 * 0.0375))
+        self.assertEqual(RttEstimator().get_timeout('192.0.2.2', 5), 5)
+
+        RttEstimator().add_sample('192.0.2.3', 0.01)
+        self.assertEqual(RttEstimator().get_timeout('192.0.2.3', 5), RttEstimator.DEFAULT_FLOOR)
+
+        RttEstimator().add_sample('192.0.2.4', 2)
+        self.assertEqual(RttEstimator().get_timeout('192.0.2.4', 5), 5)
+        RttEstimator().ceiling = 10
+        self.assertEqual(RttEstimator().get_timeout('192.0.2.4', 5), 10)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def tearDown(self):
+        CircuitBreaker().threshold = None
+        CircuitBreaker().reset_timeout = CircuitBreaker.DEFAULT_RESET_TIMEOUT
+        CircuitBreaker().reset()
+
+    def test_disabled(self):
+        for _ in range(3):
+            CircuitBreaker().record_failure('192.0.2.1')
+        self.assertFalse(CircuitBreaker().is_open('192.0.2.1'))
+        self.assertTrue(CircuitBreaker().allow('192.0.2.1'))
+
+    def test_open(self):
+        CircuitBreaker().threshold = 2
+        CircuitBreaker().record_failure('192.0.2.1')
+        CircuitBreaker().record_success('192.0.2.1')
+        CircuitBreaker().record_failure('192.0.2.1')
+        self.assertTrue(CircuitBreaker().allow('192.0.2.1'))
+
+        CircuitBreaker().record_failure('192.0.2.1')
+        self.assertTrue(CircuitBreaker().is_open('192.0.2.1'))
+        self.assertFalse(CircuitBreaker().allow('192.0.2.1'))
+        self.assertTrue(CircuitBreaker().allow('192.0.2.2'))
+
+    def test_half_open(self):
+        CircuitBreaker().threshold = 1
+        CircuitBreaker().reset_timeout = 0.1
+        CircuitBreaker().record_failure('192.0.2.1')
+        self.assertFalse(CircuitBreaker().allow('192.0.2.1'))
+
+        time.sleep(0.1)
+        self.assertTrue(CircuitBreaker().allow('192.0.2.1'))
+        self.assertFalse(CircuitBreaker().allow('192.0.2.1'))
+
+        CircuitBreaker().record_success('192.0.2.1')
+        self.assertFalse(CircuitBreaker().is_open('192.0.2.1'))
+        self.assertTrue(CircuitBreaker().allow('192.0.2.1'))
+
+
+class TestPreConnectPool(unittest.TestCase):
+    def tearDown(self):
+        PreConnectPool().size = 0
+        PreConnectPool().max_idle_time = PreConnectPool.DEFAULT_MAX_IDLE_TIME
+        for _ in range(100):
+            if not PreConnectPool()._refilled_keys:  # pylint: disable=protected-access
+                break
+            time.sleep(0.01)
+
+    @staticmethod
+    def _wait_for_connections(connect, call_count):
+        for _ in range(100):
+            if connect.call_count == call_count:
+                break
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            PreConnectPool().size = PreConnectPool.MAX_SIZE + 1
+
+    def test_disabled(self):
+        connect = mock.Mock()
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: True), None)
+        self.assertEqual(connect.call_count, 0)
+
+    def test_get(self):
+        PreConnectPool().size = 2
+        connections = [mock.Mock() for _ in range(5)]
+        connect = mock.Mock(side_effect=connections)
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: True), None)
+        self._wait_for_connections(connect, 2)
+
+        connection = PreConnectPool().get('key', connect, lambda connection: True)
+        self.assertIn(connection, connections[:2])
+        self._wait_for_connections(connect, 3)
+        self.assertEqual(connect.call_count, 3)
+
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: False), None)
+        self._wait_for_connections(connect, 5)
+        connection.close.assert_not_called()
+        self.assertEqual(sum(pooled.close.call_count for pooled in connections[:3]), 2)
+
+    def test_expired(self):
+        PreConnectPool().size = 1
+        PreConnectPool().max_idle_time = 0
+        connection = mock.Mock()
+        connect = mock.Mock(side_effect=[connection, OSError()])
+        PreConnectPool().get('key', connect, lambda connection: True)
+        self._wait_for_connections(connect, 1)
+
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: True), None)
+        connection.close.assert_called_once_with()
+
+    def test_release(self):
+        PreConnectPool().size = 2
+        connections = [mock.Mock() for _ in range(2)]
+        connect = mock.Mock(side_effect=connections + [None])
+        release = mock.Mock()
+        PreConnectPool().get('key', connect, lambda connection: True, release)
+        self._wait_for_connections(connect, 2)
+        self.assertEqual(release.call_count, 0)
+
+        connection = PreConnectPool().get('key', connect, lambda connection: True, release)
+        release.assert_called_once_with(connection)
+
+        PreConnectPool().clear()
+        self.assertEqual(release.call_count, 2)
+
+    def test_discard(self):
+        PreConnectPool().size = 1
+        connection = mock.Mock()
+        connect = mock.Mock(side_effect=[connection, None])
+        release = mock.Mock()
+        PreConnectPool().get('key', connect, lambda connection: True, release)
+        self._wait_for_connections(connect, 1)
+
+        PreConnectPool().discard('key')
+        connection.close.assert_called_once_with()
+        release.assert_called_once_with(connection)
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: True), None)
+
+    def test_refill_sequential(self):
+        PreConnectPool().size = 2
+        running = []
+        max_running = []
+
+        def connect():
+            running.append(None)
+            max_running.append(len(running))
+            time.sleep(0.01)
+            running.pop()
+            return mock.Mock()
+
+        connect = mock.Mock(side_effect=connect)
+        PreConnectPool().get('key', connect, lambda connection: True)
+        self._wait_for_connections(connect, 2)
+        self.assertEqual(max(max_running), 1)
+
+    def test_refill_error(self):
+        PreConnectPool().size = 1
+        connection = mock.Mock()
+        connect = mock.Mock(side_effect=[OSError(), connection, None])
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: True), None)
+        self._wait_for_connections(connect, 1)
+
+        self.assertEqual(PreConnectPool().get('key', connect, lambda connection: True), None)
+        self._wait_for_connections(connect, 2)
+        self.assertIs(PreConnectPool().get('key', connect, lambda connection: True), connection)
@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+
+import socket
+import threading
+import time
+import unittest
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+import urllib3
+
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
+from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
+
+from cryptolyzer.common.analyzer import ProtocolHandlerBase
+from cryptolyzer.common.concurrency import KeyedSemaphore
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
+from cryptolyzer.common.result import AnalyzerResultAddresses, AnalyzerResultError, AnalyzerTargetTls
+from cryptolyzer.common.scanner import TargetResolver, TargetScanner
+from cryptolyzer.common.utils import ResolverCache
+from cryptolyzer.tls.all import AnalyzerResultAll
+from cryptolyzer.tls.ciphers import AnalyzerResultCipherSuites
+
+
+class AnalyzeCounter(object):
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = {}
+        self.max_running = {}
+        self.max_running_total = 0
+
+    def analyze(self, analyzer, uri):  # pylint: disable=unused-argument
+        with self.lock:
+            self.running[uri.fragment] = self.running.get(uri.fragment, 0) + 1
+            self.max_running[uri.fragment] = max(self.max_running.get(uri.fragment, 0), self.running[uri.fragment])
+            self.max_running_total = max(self.max_running_total, sum(self.running.values()))
+
+        time.sleep(0.05)
+
+        with self.lock:
+            self.running[uri.fragment] -= 1
+
+        return str(uri)
+
+
+class TestKeyedSemaphore(unittest.TestCase):
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            KeyedSemaphore(0)
+
+    def test_hold(self):
+        semaphore = KeyedSemaphore(1)
+        with semaphore.hold('key'):
+            acquired = []
+            thread = threading.Thread(target=lambda: acquired.append(semaphore.acquire('key')))
+            thread.start()
+            thread.join(0.1)
+            self.assertEqual(acquired, [])
+
+            with semaphore.hold('other key'):
+                pass
+
+        thread.join()
+        self.assertEqual(acquired, [None])
+        semaphore.release('key')
+
+
+def getaddrinfo_mock(host, port, *args):  # pylint: disable=unused-argument
+    if host.startswith('unresolvable'):
+        raise socket.gaierror()
+
+    return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.{}'.format(len(host)), port))]
+
+
+class TestTargetResolver(unittest.TestCase):
+    def setUp(self):
+        ResolverCache().invalidate()
+
+    def tearDown(self):
+        ResolverCache().invalidate()
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            TargetResolver(0)
+
+    @mock.patch.object(socket, 'getaddrinfo', side_effect=getaddrinfo_mock)
+    def test_resolve(self, _):
+        targets = [
+            urllib3.util.parse_url(uri)
+            for uri in ['tls://a.com', 'tls://unresolvable.com', 'tls://bb.com:4433', 'tls://c.com#127.1.1.1']
+        ]
+        for resolver in (TargetResolver(), TargetResolver(4)):
+            results = list(resolver.resolve(targets))
+            errors = [result for result in results if isinstance(result, AnalyzerResultError)]
+            self.assertEqual([error.target for error in errors], ['tls://unresolvable.com'])
+            self.assertEqual(
+                [str(result) for result in results if result not in errors],
+                ['tls://a.com#127.0.0.5', 'tls://bb.com:4433#127.0.0.6', 'tls://c.com#127.1.1.1']
+            )
+
+    def test_resolve_in_order(self):
+        def getaddrinfo_slow_first(host, port, *args):
+            time.sleep(0.1 if host == 'h0.com' else 0)
+            return getaddrinfo_mock(host, port, *args)
+
+        targets = [urllib3.util.parse_url('tls://h{}.com'.format(index)) for index in range(10)]
+        with mock.patch.object(socket, 'getaddrinfo', side_effect=getaddrinfo_slow_first):
+            results = list(TargetResolver(4).resolve(targets))
+
+        self.assertEqual([result.host for result in results], [target.host for target in targets])
+
+
+class TestTargetScanner(unittest.TestCase):
+    def setUp(self):
+        self.protocol_handler = ProtocolHandlerBase.from_protocol('tls')
+        self.analyzer = self.protocol_handler.analyzer_from_name('versions')
+
+    @staticmethod
+    def _get_targets(ip_addresses):
+        return [
+            urllib3.util.parse_url('tls://localhost:{}#{}'.format(index, ip_address))
+            for index, ip_address in enumerate(ip_addresses)
+        ]
+
+    def _scan(self, scanner, targets, analyze_counter):
+        with mock.patch.object(type(self.protocol_handler), 'analyze', side_effect=analyze_counter.analyze):
+            return list(scanner.scan(self.protocol_handler, self.analyzer, targets))
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            TargetScanner(0)
+
+        targets = self._get_targets(['127.0.0.1', '127.0.0.2'])
+        with mock.patch.object(
+                type(self.protocol_handler), 'analyze', side_effect=NetworkError(NetworkErrorType.NO_ADDRESS)
+        ):
+            results = list(TargetScanner(2).scan(self.protocol_handler, self.analyzer, targets))
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all(isinstance(result, AnalyzerResultError) for result in results))
+        self.assertEqual(
+            set(result.target for result in results),
+            set(str(target) for target in targets)
+        )
+
+    def test_sequential(self):
+        targets = self._get_targets(['127.0.0.1', '127.0.0.2', '127.0.0.3'])
+        analyze_counter = AnalyzeCounter()
+        results = self._scan(TargetScanner(), targets, analyze_counter)
+
+        self.assertEqual(results, list(map(str, targets)))
+        self.assertEqual(analyze_counter.max_running_total, 1)
+
+    def test_parallel(self):
+        targets = self._get_targets(['127.0.0.1', '127.0.0.2', '127.0.0.3', '127.0.0.4'] * 2)
+        analyze_counter = AnalyzeCounter()
+        results = self._scan(TargetScanner(jobs=4), targets, analyze_counter)
+
+        self.assertEqual(sorted(results), sorted(map(str, targets)))
+        self.assertGreater(analyze_counter.max_running_total, 1)
+        self.assertLessEqual(analyze_counter.max_running_total, 4)
+
+    @mock.patch.object(socket, 'getaddrinfo', side_effect=getaddrinfo_mock)
+    def test_resolver(self, _):
+        targets = [urllib3.util.parse_url(uri) for uri in ['tls://a.com', 'tls://unresolvable.com']]
+        analyze_counter = AnalyzeCounter()
+        results = self._scan(TargetScanner(jobs=2, resolver=TargetResolver(2)), targets, analyze_counter)
+
+        self.assertIn('tls://a.com#127.0.0.5', results)
+        self.assertEqual(
+            [result.target for result in results if isinstance(result, AnalyzerResultError)],
+            ['tls://unresolvable.com']
+        )
+        ResolverCache().invalidate()
+
+    @mock.patch.object(socket, 'getaddrinfo', return_value=[
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 443)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.2', 443)),
+        (socket.AF_INET6, socket.SOCK_STREAM, 6, '', ('::1', 443, 0, 0)),
+        (socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 443)),
+    ])
+    def test_all_addresses(self, _):
+        def analyze(analyzer, uri):  # pylint: disable=unused-argument
+            return AnalyzerResultError(uri.host, 'odd' if uri.fragment == '127.0.0.2' else 'even')
+
+        targets = [urllib3.util.parse_url(uri) for uri in ['tls://a.com', 'tls://b.com#127.0.0.3']]
+        scanner = TargetScanner(jobs=2, resolver=TargetResolver(2, all_addresses=True), all_addresses=True)
+        with mock.patch.object(type(self.protocol_handler), 'analyze', side_effect=analyze):
+            results = {result.target: result for result in scanner.scan(self.protocol_handler, self.analyzer, targets)}
+        ResolverCache().invalidate()
+
+        self.assertEqual(results['b.com'], AnalyzerResultError('b.com', 'even'))
+
+        result = results['tls://a.com']
+        self.assertIsInstance(result, AnalyzerResultAddresses)
+        self.assertEqual(list(result.results.keys()), ['127.0.0.1', '127.0.0.2', '::1'])
+        self.assertFalse(result.consistent)
+        self.assertEqual(result.address_groups, [['127.0.0.1', '::1'], ['127.0.0.2']])
+        self.assertIn('127.0.0.2', result.as_json())
+        self.assertIn('127.0.0.2', result.as_markdown())
+
+    def test_jobs_per_ip(self):
+        targets = self._get_targets(['127.0.0.1'] * 4 + ['127.0.0.2'] * 4)
+        analyze_counter = AnalyzeCounter()
+        results = self._scan(TargetScanner(jobs=8, jobs_per_ip=2), targets, analyze_counter)
+
+        self.assertEqual(sorted(results), sorted(map(str, targets)))
+        self.assertEqual(analyze_counter.max_running, {'127.0.0.1': 2, '127.0.0.2': 2})
+
+
+class TestAnalyzerResultAddresses(unittest.TestCase):
+    @staticmethod
+    def _get_result(ip, cipher_suite):
+        target = AnalyzerTargetTls('tls', 'a.com', ip, 443, TlsProtocolVersion(TlsVersion.TLS1_2))
+        return AnalyzerResultAll(
+            target, None, [AnalyzerResultCipherSuites(target, [cipher_suite], None, False)],
+            None, None, None, None, None, None, None, None
+        )
+
+    def test_nested_targets(self):
+        result = AnalyzerResultAddresses('a.com', {
+            '1.1.1.1': self._get_result('1.1.1.1', TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA),
+            '2.2.2.2': self._get_result('2.2.2.2', TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA),
+            '3.3.3.3': self._get_result('3.3.3.3', TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA),
+        })
+        self.assertFalse(result.consistent)
+        self.assertEqual(result.address_groups, [['1.1.1.1', '2.2.2.2'], ['3.3.3.3']])
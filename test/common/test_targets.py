@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from cryptolyzer.common.analyzer import ProtocolHandlerBase
+from cryptolyzer.common.result import AnalyzerResultError
+from cryptolyzer.common.scanner import ScanTarget
+from cryptolyzer.common.targets import expand_target, iter_scan_targets
+
+
+class TestExpandTarget(unittest.TestCase):
+    def test_no_expansion(self):
+        for target in [
+                'example.com',
+                'tls://example.com:443#127.0.0.1',
+                'https://example.com/path/10',
+                'example.com/24',
+                '[::1]:443',
+        ]:
+            self.assertEqual(list(expand_target(target)), [target])
+
+    def test_error(self):
+        with self.assertRaises(ValueError):
+            list(expand_target('example.com:444-443'))
+        with self.assertRaises(ValueError):
+            list(expand_target('example.com:65535-65536'))
+
+    def test_network(self):
+        self.assertEqual(list(expand_target('192.0.2.0/30')), ['192.0.2.1', '192.0.2.2'])
+        self.assertEqual(list(expand_target('tls://192.0.2.1/32:443#x')), ['tls://192.0.2.1:443#x'])
+        self.assertEqual(list(expand_target('[2001:db8::/127]')), ['[2001:db8::]', '[2001:db8::1]'])
+
+    def test_port_range(self):
+        self.assertEqual(
+            list(expand_target('smtp://example.com:25-26')),
+            ['smtp://example.com:25', 'smtp://example.com:26']
+        )
+        self.assertEqual(
+            list(expand_target('192.0.2.0/31:1-2')),
+            ['192.0.2.0:1', '192.0.2.0:2', '192.0.2.1:1', '192.0.2.1:2']
+        )
+
+    def test_lazy(self):
+        targets = expand_target('10.0.0.0/8:1-65535')
+        self.assertEqual(next(targets), '10.0.0.1:1')
+        self.assertEqual(next(targets), '10.0.0.1:2')
+
+
+class TestIterScanTargets(unittest.TestCase):
+    def test_lines(self):
+        protocol_handler = ProtocolHandlerBase.from_protocol('tls')
+        analyzer = protocol_handler.analyzer_from_name('versions')
+        lines = [
+            '# comment\n',
+            '\n',
+            'example.com#127.0.0.1  # inline comment\n',
+            'ssh versions example.com:22-23\n',
+            'tls unknown example.com\n',
+            'too many fields here and there\n',
+            'unsupported://example.com\n',
+            'example.com:2-1\n',
+        ]
+
+        results = list(iter_scan_targets(iter(lines), protocol_handler, analyzer))
+        scan_targets = [result for result in results if isinstance(result, ScanTarget)]
+        self.assertEqual(
+            [(scan_target.protocol_handler.get_protocol(), str(scan_target.uri)) for scan_target in scan_targets],
+            [('tls', 'tls://example.com#127.0.0.1'), ('ssh', 'ssh://example.com:22'), ('ssh', 'ssh://example.com:23')]
+        )
+        self.assertEqual(scan_targets[0].analyzer, analyzer)
+
+        errors = [result for result in results if isinstance(result, AnalyzerResultError)]
+        self.assertEqual(
+            [error.target for error in errors],
+            [
+                'tls unknown example.com',
+                'too many fields here and there',
+                'unsupported://example.com',
+                'example.com:2-1',
+            ]
+        )
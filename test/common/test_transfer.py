@@ -2,6 +2,8 @@
 
 import select
 import socket
+import threading
+import time
 import unittest
 
 from test.common.classes import TestThreadedServer
@@ -13,8 +15,49 @@ try:
 except ImportError:
     import mock
 
+from cryptoparser.common.exception import NotEnoughData
+
+from cryptolyzer.common.concurrency import (
+    CircuitBreaker,
+    ConnectionLimiter,
+    PreConnectPool,
+    RateLimiter,
+    RttEstimator,
+)
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType
-from cryptolyzer.common.transfer import L4ClientTCP, L4ServerTCP
+from cryptolyzer.common.transfer import L4ClientTCP, L4ServerTCP, ReceiveBuffer, SocketOptions
+
+
+class TestReceiveBuffer(unittest.TestCase):
+    def test_consume(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer.extend(b'abcdef')
+        self.assertEqual(receive_buffer.view, b'abcdef')
+        self.assertEqual(receive_buffer.find(b'ef'), 4)
+        self.assertEqual(receive_buffer.find(b'abcdefg'), -1)
+
+        receive_buffer.consume(2)
+        self.assertEqual(len(receive_buffer), 4)
+        self.assertEqual(receive_buffer.find(b'ef'), 2)
+        self.assertEqual(receive_buffer.find(b'cd', 1), -1)
+        self.assertEqual(receive_buffer.to_bytearray(), bytearray(b'cdef'))
+
+        receive_buffer.consume()
+        self.assertEqual(len(receive_buffer), 0)
+        self.assertEqual(receive_buffer.view, b'')
+
+    def test_grow(self):
+        receive_buffer = ReceiveBuffer()
+        receive_buffer.extend(b'x' * (ReceiveBuffer.INITIAL_CAPACITY - 1))
+        receive_buffer.consume(ReceiveBuffer.INITIAL_CAPACITY - 2)
+        view = receive_buffer.view
+
+        writable = receive_buffer.get_writable(ReceiveBuffer.INITIAL_CAPACITY * 2)
+        self.assertEqual(len(writable), ReceiveBuffer.INITIAL_CAPACITY * 2)
+        writable[:3] = b'abc'
+        receive_buffer.commit(3)
+        self.assertEqual(receive_buffer.view, b'xabc')
+        self.assertEqual(view, b'x')
 
 
 class TestL4ClientTCP(unittest.TestCase):
@@ -59,6 +102,310 @@ class TestL4ClientTCP(unittest.TestCase):
                 self.assertRaises(NotImplementedError):
             self._create_client_and_receive_text('badssl.com', 443, 1)
 
+    def test_connection_limit(self):
+        l4_server = L4ServerTCP('localhost', 0, backlog=2)
+        l4_server.init_connection()
+        connected_clients = []
+
+        def connect():
+            l4_client = L4ClientTCP('localhost', l4_server.bind_port, ip=l4_server.ip)
+            l4_client.init_connection()
+            connected_clients.append(l4_client)
+
+        ConnectionLimiter().max_connections_per_ip = 1
+        try:
+            with mock.patch.object(socket, 'create_connection', side_effect=socket.error), \
+                    self.assertRaises(NetworkError):
+                connect()
+
+            connect()
+            ConnectionLimiter().acquire_timeout = 0.1
+            with self.assertRaises(NetworkError) as context_manager:
+                connect()
+            self.assertEqual(context_manager.exception.error, NetworkErrorType.NO_CONNECTION)
+            ConnectionLimiter().acquire_timeout = ConnectionLimiter.DEFAULT_ACQUIRE_TIMEOUT
+
+            thread = threading.Thread(target=connect)
+            thread.start()
+            thread.join(0.2)
+            self.assertEqual(len(connected_clients), 1)
+
+            connected_clients[0].close()
+            thread.join()
+            self.assertEqual(len(connected_clients), 2)
+            connected_clients[1].close()
+        finally:
+            ConnectionLimiter().max_connections_per_ip = ConnectionLimiter.DEFAULT_MAX_CONNECTIONS_PER_IP
+            ConnectionLimiter().acquire_timeout = ConnectionLimiter.DEFAULT_ACQUIRE_TIMEOUT
+            l4_server.close()
+
+    def test_adaptive_connection_limit(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(4)
+        port = server_socket.getsockname()[1]
+
+        server_socket.settimeout(5)
+
+        def serve():
+            for _ in range(3):
+                try:
+                    client_socket, _ = server_socket.accept()
+                except socket.timeout:
+                    return
+                client_socket.sendall(b'x')
+                client_socket.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+
+        ConnectionLimiter().reset()
+        ConnectionLimiter().adaptive = True
+        try:
+            for expected_window_size in (2.0, 2.5):
+                l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+                l4_client.init_connection()
+                l4_client.receive(1)
+                l4_client.close()
+                self.assertEqual(ConnectionLimiter().get_window_size('127.0.0.1'), expected_window_size)
+
+            l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+            l4_client.init_connection()
+            with mock.patch.object(socket.socket, 'recv_into', side_effect=socket.timeout), \
+                    self.assertRaises(NotEnoughData):
+                l4_client.receive(1)
+            l4_client.close()
+            self.assertEqual(ConnectionLimiter().get_window_size('127.0.0.1'), 2.5)
+
+            with mock.patch.object(socket, 'create_connection', side_effect=socket.error), \
+                    self.assertRaises(NetworkError):
+                L4ClientTCP('localhost', port, ip='127.0.0.1').init_connection()
+            self.assertEqual(ConnectionLimiter().get_window_size('127.0.0.1'), 1.25)
+        finally:
+            ConnectionLimiter().adaptive = False
+            ConnectionLimiter().reset()
+            thread.join()
+            server_socket.close()
+
+    def test_adaptive_timeout(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(1)
+
+        def serve():
+            client_socket, _ = server_socket.accept()
+            client_socket.sendall(client_socket.recv(4))
+            client_socket.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+
+        RttEstimator().enabled = True
+        try:
+            l4_client = L4ClientTCP('localhost', server_socket.getsockname()[1], ip='127.0.0.1')
+            l4_client.init_connection()
+            l4_socket = l4_client._socket  # pylint: disable=protected-access
+            self.assertEqual(l4_socket.gettimeout(), RttEstimator.DEFAULT_FLOOR)
+            l4_client.send(b'ping')
+            l4_client.receive(4)
+            l4_client.close()
+            self.assertLess(RttEstimator().get_timeout('127.0.0.1', 5), 5)
+        finally:
+            RttEstimator().enabled = False
+            RttEstimator().reset()
+            thread.join()
+            server_socket.close()
+
+    def test_circuit_breaker(self):
+        CircuitBreaker().threshold = 2
+        try:
+            with mock.patch.object(socket, 'create_connection', side_effect=socket.timeout) as create_connection:
+                for _ in range(2):
+                    with self.assertRaises(NetworkError) as context_manager:
+                        L4ClientTCP('localhost', 443, ip='127.0.0.1').init_connection()
+                    self.assertEqual(context_manager.exception.error, NetworkErrorType.NO_CONNECTION)
+
+                with self.assertRaises(NetworkError) as context_manager:
+                    L4ClientTCP('localhost', 443, ip='127.0.0.1').init_connection()
+                self.assertEqual(context_manager.exception.error, NetworkErrorType.CIRCUIT_OPEN)
+                self.assertEqual(create_connection.call_count, 2)
+        finally:
+            CircuitBreaker().threshold = None
+            CircuitBreaker().reset()
+
+    def test_circuit_breaker_read_timeout(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(2)
+        port = server_socket.getsockname()[1]
+
+        CircuitBreaker().threshold = 1
+        try:
+            for _ in range(2):
+                l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+                l4_client.init_connection()
+                with mock.patch.object(socket.socket, 'recv_into', side_effect=socket.timeout), \
+                        self.assertRaises(NotEnoughData):
+                    l4_client.receive(1)
+                l4_client.close()
+        finally:
+            CircuitBreaker().threshold = None
+            CircuitBreaker().reset()
+            server_socket.close()
+
+    def test_pre_connect(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(4)
+        port = server_socket.getsockname()[1]
+
+        created_sockets = []
+
+        def create_connection(*args):
+            created_sockets.append(real_create_connection(*args))
+            return created_sockets[-1]
+
+        real_create_connection = socket.create_connection
+        PreConnectPool().size = 1
+        try:
+            with mock.patch.object(socket, 'create_connection', side_effect=create_connection):
+                l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+                l4_client.init_connection()
+                l4_client.close()
+                for _ in range(100):
+                    if len(created_sockets) == 2:
+                        break
+                    time.sleep(0.01)
+                time.sleep(0.05)
+
+                l4_client.init_connection()
+                self.assertIs(l4_client._socket, created_sockets[1])  # pylint: disable=protected-access
+                l4_client.close()
+        finally:
+            PreConnectPool().size = 0
+            server_socket.close()
+
+    def test_pre_connect_backoff(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(4)
+        port = server_socket.getsockname()[1]
+
+        created_sockets = []
+
+        def create_connection(*args):
+            created_sockets.append(real_create_connection(*args))
+            return created_sockets[-1]
+
+        real_create_connection = socket.create_connection
+        PreConnectPool().size = 1
+        try:
+            with mock.patch.object(socket, 'create_connection', side_effect=create_connection):
+                l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+                l4_client.init_connection()
+                l4_client.close()
+                for _ in range(100):
+                    if len(created_sockets) == 2:
+                        break
+                    time.sleep(0.01)
+                time.sleep(0.05)
+
+                RateLimiter().backoff('127.0.0.1', 0.1)
+                l4_client.init_connection()
+                self.assertEqual(created_sockets[1].fileno(), -1)
+                self.assertIs(l4_client._socket, created_sockets[2])  # pylint: disable=protected-access
+                time.sleep(0.1)
+                self.assertEqual(len(created_sockets), 3)
+                l4_client.close()
+        finally:
+            PreConnectPool().size = 0
+            RateLimiter().reset()
+            server_socket.close()
+
+    def test_pre_connect_connection_limit(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(4)
+        port = server_socket.getsockname()[1]
+
+        ConnectionLimiter().max_connections_per_ip = 1
+        PreConnectPool().size = 1
+        try:
+            with mock.patch.object(
+                    socket, 'create_connection', side_effect=socket.create_connection
+            ) as create_connection:
+                l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+                l4_client.init_connection()
+                time.sleep(0.1)
+                self.assertEqual(create_connection.call_count, 1)
+                l4_client.close()
+        finally:
+            ConnectionLimiter().max_connections_per_ip = ConnectionLimiter.DEFAULT_MAX_CONNECTIONS_PER_IP
+            PreConnectPool().size = 0
+            server_socket.close()
+
+    def test_socket_options(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(2)
+        port = server_socket.getsockname()[1]
+
+        SocketOptions().abortive_close = True
+        SocketOptions().no_delay = True
+        SocketOptions().source_addresses = ['127.0.0.1', '::1']
+        try:
+            self.assertEqual(SocketOptions().get_source_address('192.0.2.1'), ('127.0.0.1', 0))
+            self.assertEqual(SocketOptions().get_source_address('2001:db8::1'), ('::1', 0))
+
+            l4_client = L4ClientTCP('localhost', port, ip='127.0.0.1')
+            l4_client.init_connection()
+            l4_socket = l4_client._socket  # pylint: disable=protected-access
+            self.assertTrue(l4_socket.getsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY))
+            self.assertEqual(l4_socket.getsockname()[0], '127.0.0.1')
+            with mock.patch.object(socket.socket, 'close') as close:
+                l4_client.close()
+            self.assertTrue(l4_socket.getsockopt(socket.SOL_SOCKET, socket.SO_LINGER))
+            close.assert_called_once_with()
+            l4_socket.close()
+        finally:
+            SocketOptions().abortive_close = False
+            SocketOptions().no_delay = False
+            SocketOptions().source_addresses = []
+            server_socket.close()
+
+    def test_read_line(self):
+        server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server_socket.bind(('127.0.0.1', 0))
+        server_socket.listen(1)
+
+        def serve():
+            client_socket, _ = server_socket.accept()
+            client_socket.sendall(b'250-first\r\n250-second\r\n250 third\r\n' + b'x' * 8)
+            client_socket.recv(1)
+            client_socket.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+
+        try:
+            l4_client = L4ClientTCP('localhost', server_socket.getsockname()[1], ip='127.0.0.1')
+            l4_client.init_connection()
+            time.sleep(0.1)
+            with mock.patch.object(
+                L4ClientTCP, '_recv_into', side_effect=l4_client._recv_into  # pylint: disable=protected-access
+            ) as recv_into:
+                self.assertEqual(l4_client.read_line(), b'250-first\r\n')
+                self.assertEqual(l4_client.read_line(), b'250-second\r\n')
+                self.assertEqual(l4_client.read_line(), b'250 third\r\n')
+                with self.assertRaises(StopIteration):
+                    l4_client.read_line(8)
+            self.assertEqual(recv_into.call_count, 1)
+            self.assertEqual(l4_client.buffer, b'x' * 8)
+            l4_client.close()
+        finally:
+            thread.join()
+            server_socket.close()
+
     def test_receive(self):
         address = 'smtp.gmail.com'
         _, result = self._create_client_and_receive_text(address, 587, 4 + len(address))
@@ -71,9 +418,9 @@ class TestL4ClientTCP(unittest.TestCase):
         l4_client.init_connection()
         with self.assertRaises(StopIteration):
             l4_client.receive_until(terminator=b'\r\n', max_line_length=3)
-        self.assertEqual(b'220', l4_client.buffer)
-        l4_client.receive_until(terminator=b'\r\n')
-        self.assertEqual(l4_client.buffer[-2:], b'\r\n')
+        self.assertTrue(l4_client.buffer.startswith(b'220'))
+        line_length = l4_client.receive_until(terminator=b'\r\n')
+        self.assertEqual(l4_client.buffer[line_length - 2:line_length], b'\r\n')
         self.assertTrue(l4_client.buffer.decode('ascii').startswith('220 ' + address))
 
         l4_client.close()
@@ -2,9 +2,15 @@
 
 import unittest
 import socket
+import threading
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
 
 from cryptolyzer.common.exception import NetworkError, NetworkErrorType
-from cryptolyzer.common.utils import resolve_address
+from cryptolyzer.common.utils import LogSingleton, ResolverCache, resolve_address
 
 
 class TestResolveAddress(unittest.TestCase):
@@ -26,3 +32,110 @@ class TestResolveAddress(unittest.TestCase):
         family, ip = resolve_address('one.one.one.one', 0, '2606:4700:4700::1111')
         self.assertEqual(family, socket.AF_INET6)
         self.assertEqual(ip, '2606:4700:4700::1111')
+
+    @mock.patch.object(socket, 'getaddrinfo')
+    def test_resolve_ip_given(self, getaddrinfo):
+        self.assertEqual(resolve_address('unresolvable.address', 0, '127.0.0.1'), (socket.AF_INET, '127.0.0.1'))
+        self.assertEqual(getaddrinfo.call_count, 0)
+
+
+ADDRINFO_LOCALHOST = [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('127.0.0.1', 443))]
+
+
+class TestResolverCache(unittest.TestCase):
+    def setUp(self):
+        ResolverCache().invalidate()
+
+    def tearDown(self):
+        ResolverCache().ttl = ResolverCache.DEFAULT_TTL
+        ResolverCache().invalidate()
+
+    @mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST)
+    def test_cached(self, getaddrinfo):
+        self.assertEqual(resolve_address('cached.host', 443), (socket.AF_INET, '127.0.0.1'))
+        self.assertEqual(resolve_address('cached.host', 443), (socket.AF_INET, '127.0.0.1'))
+        self.assertEqual(getaddrinfo.call_count, 1)
+
+        resolve_address('cached.host', 444)
+        self.assertEqual(getaddrinfo.call_count, 1)
+
+    @mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST)
+    def test_expiry(self, getaddrinfo):
+        with mock.patch('time.time', return_value=1000):
+            resolve_address('cached.host', 443)
+        with mock.patch('time.time', return_value=1000 + ResolverCache.DEFAULT_TTL - 1):
+            resolve_address('cached.host', 443)
+        self.assertEqual(getaddrinfo.call_count, 1)
+
+        with mock.patch('time.time', return_value=1000 + ResolverCache.DEFAULT_TTL):
+            resolve_address('cached.host', 443)
+        self.assertEqual(getaddrinfo.call_count, 2)
+
+    @mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST)
+    def test_expired_evicted(self, getaddrinfo):
+        with mock.patch('time.time', return_value=1000):
+            resolve_address('expired.host', 443)
+        with mock.patch('time.time', return_value=1000 + ResolverCache.DEFAULT_TTL):
+            resolve_address('cached.host', 443)
+        self.assertEqual(list(ResolverCache()._entries), ['cached.host'])  # pylint: disable=protected-access
+
+        with mock.patch('time.time', return_value=1000 + ResolverCache.DEFAULT_TTL + 1):
+            resolve_address('cached.host', 443)
+        self.assertEqual(getaddrinfo.call_count, 2)
+
+    @mock.patch.object(ResolverCache, 'MAX_ENTRY_COUNT', 2)
+    @mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST)
+    def test_max_entry_count(self, getaddrinfo):
+        for address in ('first.host', 'second.host', 'first.host', 'third.host'):
+            resolve_address(address, 443)
+        self.assertEqual(getaddrinfo.call_count, 3)
+        self.assertEqual(
+            list(ResolverCache()._entries), ['second.host', 'third.host']  # pylint: disable=protected-access
+        )
+
+    @mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST)
+    def test_invalidate(self, getaddrinfo):
+        resolve_address('cached.host', 443)
+        resolve_address('other.host', 443)
+
+        ResolverCache().invalidate('cached.host')
+        resolve_address('cached.host', 443)
+        resolve_address('other.host', 443)
+        self.assertEqual(getaddrinfo.call_count, 3)
+
+        ResolverCache().invalidate()
+        resolve_address('other.host', 443)
+        self.assertEqual(getaddrinfo.call_count, 4)
+
+    @mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST)
+    def test_disabled(self, getaddrinfo):
+        ResolverCache().ttl = 0
+        resolve_address('cached.host', 443)
+        resolve_address('cached.host', 443)
+        self.assertEqual(getaddrinfo.call_count, 2)
+
+    def test_error_not_cached(self):
+        with mock.patch.object(socket, 'getaddrinfo', return_value=[]):
+            with self.assertRaises(NetworkError) as context_manager:
+                resolve_address('cached.host', 443)
+            self.assertEqual(context_manager.exception.error, NetworkErrorType.NO_ADDRESS)
+
+        with mock.patch.object(socket, 'getaddrinfo', return_value=ADDRINFO_LOCALHOST):
+            self.assertEqual(resolve_address('cached.host', 443), (socket.AF_INET, '127.0.0.1'))
+
+
+class TestLogSingleton(unittest.TestCase):
+    def test_disabled_per_thread(self):
+        disabled_in_thread = []
+
+        LogSingleton().disabled = True
+        try:
+            thread = threading.Thread(target=lambda: disabled_in_thread.append(LogSingleton().disabled))
+            thread.start()
+            thread.join()
+            self.assertTrue(LogSingleton().disabled)
+        finally:
+            LogSingleton().disabled = False
+
+        self.assertEqual(disabled_in_thread, [False])
+        self.assertFalse(LogSingleton().disabled)
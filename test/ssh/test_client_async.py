@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from cryptoparser.ssh.subprotocol import SshKeyExchangeInit, SshProtocolMessage
+
+from cryptolyzer.ssh.client import L7ClientSsh
+from cryptolyzer.ssh.server import L7ServerSsh
+
+from .classes import L7ServerSshTest
+
+try:
+    import asyncio
+
+    from cryptolyzer.ssh.client_async import L7ClientSshAsync
+except (ImportError, SyntaxError):
+    asyncio = None
+
+
+@unittest.skipIf(asyncio is None, 'asyncio transport requires Python 3.5 or later')
+class TestL7ClientSshAsync(unittest.TestCase):
+    def test_handshake(self):
+        threaded_server = L7ServerSshTest(L7ServerSsh('localhost', 0, timeout=0.2))
+        threaded_server.wait_for_server_listen()
+
+        l7_client = L7ClientSshAsync(L7ClientSsh('localhost', threaded_server.l7_server.l4_transfer.bind_port))
+        loop = asyncio.new_event_loop()
+        try:
+            server_messages = loop.run_until_complete(l7_client.do_handshake())
+        finally:
+            loop.close()
+
+        self.assertEqual(set(server_messages.keys()), set([SshProtocolMessage, SshKeyExchangeInit]))
+
+        threaded_server.join()
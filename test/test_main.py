@@ -5,8 +5,10 @@ try:
 except ImportError:
     from mock import patch
 
+import json
 import sys
 import os
+import tempfile
 
 from test.common.classes import TestMainBase
 
@@ -35,7 +37,7 @@ from cryptolyzer.__main__ import main, get_argument_parser, get_protocol_handler
 from cryptolyzer.ja3.generate import AnalyzerGenerate
 
 
-class TestMain(TestMainBase):
+class TestMain(TestMainBase):  # pylint: disable=too-many-public-methods
     def setUp(self):
         self.main_func = main
 
@@ -72,6 +74,87 @@ class TestMain(TestMainBase):
             'address of the target cannot be resolved'
         )
 
+    def test_runtime_error_parallel(self):
+        with patch.object(sys, 'stdout', new_callable=six.StringIO) as stdout, \
+                patch.object(sys, 'argv', [
+                    'cryptolyzer', '--jobs', '2', 'tls', 'versions', 'unresolvable1.hostname', 'unresolvable2.hostname'
+                ]):
+
+            main()
+            self.assertEqual(
+                stdout.getvalue().count('* Error: address of the target cannot be resolved'),
+                2
+            )
+
+        self._test_argument_error(
+            ['cryptolyzer', '--jobs', '0', 'tls', 'versions', 'localhost'],
+            'error: argument --jobs/-j: invalid positive int value: \'0\''
+        )
+
+    def test_source_address(self):
+        self._test_argument_error(
+            ['cryptolyzer', '--source-address', 'localhost', 'tls', 'versions', 'localhost'],
+            'error: argument --source-address: \'localhost\' does not appear to be an IPv4 or IPv6 address'
+        )
+
+    def test_output_format_jsonl(self):
+        self._test_argument_error(
+            ['cryptolyzer', '--stream-sub-results', 'tls', 'all', 'localhost'],
+            'error: sub-results can be streamed only in jsonl output format'
+        )
+
+        with patch.object(sys, 'stdout', new_callable=six.StringIO) as stdout, \
+                patch.object(sys, 'argv', [
+                    'cryptolyzer', '--output-format', 'jsonl', '--stream-sub-results',
+                    'tls', 'all', 'unresolvable1.hostname', 'unresolvable2.hostname'
+                ]):
+            main()
+
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        for line in lines:
+            self.assertEqual(json.loads(line)['error'], 'address of the target cannot be resolved')
+
+    def test_checkpoint(self):
+        self._test_argument_error(
+            ['cryptolyzer', '--resume', 'tls', 'versions', 'localhost'],
+            'error: resume requires a checkpoint journal'
+        )
+
+        with tempfile.NamedTemporaryFile('w', suffix='.journal') as checkpoint_file:
+            for resume, expected_error_count in (([], 2), (['--resume'], 0)):
+                with patch.object(sys, 'stdout', new_callable=six.StringIO) as stdout, \
+                        patch.object(sys, 'argv', ['cryptolyzer', '--checkpoint', checkpoint_file.name] + resume + [
+                            'tls', 'versions', 'unresolvable1.hostname', 'unresolvable2.hostname'
+                        ]):
+                    main()
+
+                self.assertEqual(
+                    stdout.getvalue().count('* Error: address of the target cannot be resolved'),
+                    expected_error_count
+                )
+
+            self._test_argument_error(
+                ['cryptolyzer', '--checkpoint', checkpoint_file.name, 'tls', 'versions', 'localhost'],
+                'error: checkpoint journal already exists, use resume to continue it'
+            )
+
+    def test_targets_file(self):
+        self._test_argument_error(['cryptolyzer', 'tls', 'versions'], 'error: no targets given')
+
+        with tempfile.NamedTemporaryFile('w', suffix='.txt') as targets_file:
+            targets_file.write('# comment\nunresolvable1.hostname\ntls versions unresolvable2.hostname:1-2\n')
+            targets_file.flush()
+
+            with patch.object(sys, 'stdout', new_callable=six.StringIO) as stdout, \
+                    patch.object(sys, 'argv', [
+                        'cryptolyzer', '--targets-file', targets_file.name,
+                        'tls', 'versions', 'unresolvable0.hostname'
+                    ]):
+                main()
+
+        self.assertEqual(stdout.getvalue().count('* Error: address of the target cannot be resolved'), 4)
+
     def test_analyzer_uris_non_ip(self):
         self._get_test_analyzer_result_json('tls', 'versions', 'dns.google#non-ip-address')
 
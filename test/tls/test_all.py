@@ -9,14 +9,22 @@ from collections import OrderedDict
 
 from cryptoparser.tls.ciphersuite import TlsCipherSuite
 from cryptoparser.tls.extension import TlsNamedCurve
+from cryptoparser.tls.subprotocol import TlsAlertDescription
 from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
-from cryptolyzer.common.result import AnalyzerTargetTls
+from cryptolyzer.common.concurrency import CircuitBreaker, EliminationEngine
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
+from cryptolyzer.common.result import AnalyzerResultStream, AnalyzerTargetTls
 from cryptolyzer.common.dhparam import WellKnownDHParams
 
 from cryptolyzer.tls.all import AnalyzerAll
-from cryptolyzer.tls.ciphers import AnalyzerResultCipherSuites
+from cryptolyzer.tls.ciphers import AnalyzerCipherSuites, AnalyzerResultCipherSuites
 from cryptolyzer.tls.client import L7ClientTlsBase
+from cryptolyzer.tls.exception import TlsAlert
+from cryptolyzer.tls.extensions import AnalyzerExtensions
+from cryptolyzer.tls.pubkeyreq import AnalyzerPublicKeyRequest
+from cryptolyzer.tls.simulations import AnalyzerSimulations
+from cryptolyzer.tls.versions import AnalyzerResultVersions, AnalyzerVersions
 
 from .classes import TestTlsCases
 
@@ -117,6 +125,138 @@ class TestTlsAll(TestTlsCases.TestTlsBase):
             ),
         ])), TlsProtocolVersion(TlsVersion.TLS1_1))
 
+    def test_cipher_suite_results(self):
+        l7_client = L7ClientTlsBase.from_scheme('tls', 'localhost', 443, ip='127.0.0.1')
+        versions = [
+            TlsProtocolVersion(TlsVersion.TLS1),
+            TlsProtocolVersion(TlsVersion.TLS1_1),
+            TlsProtocolVersion(TlsVersion.TLS1_2),
+        ]
+        with mock.patch.object(
+                AnalyzerCipherSuites, 'analyze',
+                side_effect=lambda analyzable, protocol_version: protocol_version
+        ) as analyze:
+            cipher_suite_results = AnalyzerAll.get_cipher_suite_results(l7_client, versions)
+
+        self.assertEqual(list(cipher_suite_results.keys()), versions)
+        self.assertEqual(list(cipher_suite_results.values()), versions)
+        self.assertFalse(any(call_args[0][0] is l7_client for call_args in analyze.call_args_list))
+
+    def test_cipher_suite_results_seeded(self):
+        l7_client = L7ClientTlsBase.from_scheme('tls', 'localhost', 443, ip='127.0.0.1')
+        server_cipher_suites = OrderedDict([
+            (TlsProtocolVersion(TlsVersion.TLS1), [
+                TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA256,
+                TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA256,
+                TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA,
+            ]),
+            (TlsProtocolVersion(TlsVersion.TLS1_1), [
+                TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA256,
+                TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA256,
+            ]),
+            (TlsProtocolVersion(TlsVersion.TLS1_2), [
+                TlsCipherSuite.TLS_ECDHE_RSA_WITH_AES_128_GCM_SHA256,
+                TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA256,
+                TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA256,
+            ]),
+        ])
+
+        def next_accepted_cipher_suites(  # pylint: disable=unused-argument
+                l7_client, protocol_version, remaining_cipher_suites, accepted_cipher_suites):
+            for cipher_suite in server_cipher_suites[protocol_version]:
+                if cipher_suite in remaining_cipher_suites:
+                    remaining_cipher_suites.remove(cipher_suite)
+                    accepted_cipher_suites.append(cipher_suite)
+                    return
+
+            raise TlsAlert(TlsAlertDescription.HANDSHAKE_FAILURE)
+
+        EliminationEngine().cross_version_seeding = True
+        try:
+            with mock.patch.object(
+                    AnalyzerCipherSuites, '_next_accepted_cipher_suites',
+                    side_effect=next_accepted_cipher_suites
+            ), mock.patch.object(
+                    AnalyzerCipherSuites, 'analyze_seeded', autospec=True,
+                    side_effect=AnalyzerCipherSuites.analyze_seeded
+            ) as analyze_seeded:
+                cipher_suite_results = AnalyzerAll.get_cipher_suite_results(
+                    l7_client, list(server_cipher_suites.keys())
+                )
+        finally:
+            EliminationEngine().cross_version_seeding = False
+
+        self.assertEqual(list(cipher_suite_results.keys()), list(server_cipher_suites.keys()))
+        for protocol_version, cipher_suite_result in cipher_suite_results.items():
+            self.assertEqual(cipher_suite_result.cipher_suites, server_cipher_suites[protocol_version])
+        self.assertEqual(
+            [call_args[0][3] for call_args in analyze_seeded.call_args_list],
+            [None, server_cipher_suites[TlsProtocolVersion(TlsVersion.TLS1_2)],
+             server_cipher_suites[TlsProtocolVersion(TlsVersion.TLS1_1)]]
+        )
+
+    def test_emit_result(self):
+        target = AnalyzerTargetTls('tls', 'one.one.one.one', '1.1.1.1', 443, None)
+        emitted = []
+        AnalyzerResultStream().listener = lambda *args: emitted.append(args)
+        try:
+            AnalyzerAll._emit_result(  # pylint: disable=protected-access
+                target, AnalyzerCipherSuites.get_name(), OrderedDict([('tls1', 1), ('tls1_1', 2)])
+            )
+            AnalyzerAll._emit_result(target, 'versions', {'versions': 3})  # pylint: disable=protected-access
+        finally:
+            AnalyzerResultStream().listener = None
+
+        self.assertEqual(emitted, [(target, AnalyzerCipherSuites.get_name(), [1, 2]), (target, 'versions', 3)])
+
+    def test_interrupted(self):
+        l7_client = L7ClientTlsBase.from_scheme('tls', 'localhost', 443, ip='127.0.0.1')
+        with mock.patch.object(
+            AnalyzerAll, 'get_versions_result', side_effect=NetworkError(NetworkErrorType.CIRCUIT_OPEN)
+        ), mock.patch.object(
+            AnalyzerAll, 'get_simulations_result', side_effect=NetworkError(NetworkErrorType.CIRCUIT_OPEN)
+        ):
+            result = AnalyzerAll().analyze(l7_client, None)
+
+        self.assertEqual(result.interrupted, ['simulations', 'versions'])
+        self.assertEqual(result.versions, None)
+        self.assertEqual(result.ciphers, [])
+        self.assertIn('1. simulations\n2. versions\n', result.as_markdown())
+
+        with mock.patch.object(
+            AnalyzerAll, 'get_versions_result', side_effect=NetworkError(NetworkErrorType.NO_RESPONSE)
+        ), self.assertRaises(NetworkError):
+            AnalyzerAll().analyze(l7_client, None)
+
+    @staticmethod
+    def _get_result_circuit_open():
+        l7_client = L7ClientTlsBase.from_scheme('tls', 'localhost', 443, ip='127.0.0.1')
+        versions_result = AnalyzerResultVersions(
+            AnalyzerTargetTls.from_l7_client(l7_client, None), [TlsProtocolVersion(TlsVersion.TLS1_2)], None
+        )
+        CircuitBreaker().threshold = 1
+        CircuitBreaker().record_failure(l7_client.ip)
+        try:
+            with mock.patch.object(
+                AnalyzerAll, 'get_versions_result', return_value={AnalyzerVersions.get_name(): versions_result}
+            ), mock.patch.object(
+                AnalyzerAll, 'get_pubkeyreq_result', return_value={AnalyzerPublicKeyRequest.get_name(): None}
+            ):
+                return AnalyzerAll().analyze(l7_client, None)
+        finally:
+            CircuitBreaker().threshold = None
+            CircuitBreaker().reset()
+
+    def test_interrupted_extensions(self):
+        result = self._get_result_circuit_open()
+        self.assertIn(AnalyzerExtensions.get_name(), result.interrupted)
+        self.assertEqual(result.extensions, None)
+
+    def test_interrupted_simulations(self):
+        result = self._get_result_circuit_open()
+        self.assertIn(AnalyzerSimulations.get_name(), result.interrupted)
+        self.assertEqual(result.simulations, None)
+
     def test_real(self):
         result = self.get_result('dh1024.badssl.com', 443)
         self.assertEqual(result.dhparams.groups, [])
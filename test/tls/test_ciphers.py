@@ -13,6 +13,7 @@ from cryptoparser.tls.subprotocol import TlsAlertDescription
 from cryptoparser.tls.ciphersuite import TlsCipherSuite, SslCipherKind
 from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
+from cryptolyzer.common.concurrency import EliminationEngine
 from cryptolyzer.common.exception import SecurityError, SecurityErrorType
 from cryptolyzer.tls.ciphers import AnalyzerCipherSuites
 from cryptolyzer.tls.client import L7ClientTlsBase
@@ -91,6 +92,36 @@ def _wrapped_next_accepted_cipher_suites_response_error(
     )
 
 
+SERVER_PREFERRED_CIPHER_SUITES = [
+    TlsCipherSuite.TLS_RSA_WITH_AES_128_CBC_SHA,
+    TlsCipherSuite.TLS_ECDHE_RSA_WITH_AES_256_CBC_SHA,
+    TlsCipherSuite.TLS_RSA_WITH_AES_256_CBC_SHA,
+    TlsCipherSuite.TLS_DHE_RSA_WITH_AES_128_CBC_SHA,
+]
+
+
+def _next_accepted_cipher_suites_server_preference(  # pylint: disable=unused-argument
+        l7_client, protocol_version, remaining_cipher_suites, accepted_cipher_suites):
+    for cipher_suite in SERVER_PREFERRED_CIPHER_SUITES:
+        if cipher_suite in remaining_cipher_suites:
+            remaining_cipher_suites.remove(cipher_suite)
+            accepted_cipher_suites.append(cipher_suite)
+            return
+
+    raise TlsAlert(TlsAlertDescription.HANDSHAKE_FAILURE)
+
+
+def _next_accepted_cipher_suites_client_preference(  # pylint: disable=unused-argument
+        l7_client, protocol_version, remaining_cipher_suites, accepted_cipher_suites):
+    for cipher_suite in remaining_cipher_suites:
+        if cipher_suite in SERVER_PREFERRED_CIPHER_SUITES:
+            remaining_cipher_suites.remove(cipher_suite)
+            accepted_cipher_suites.append(cipher_suite)
+            return
+
+    raise TlsAlert(TlsAlertDescription.HANDSHAKE_FAILURE)
+
+
 class TestTlsCiphers(TestTlsCases.TestTlsBase):
     @staticmethod
     def get_result(host, port, protocol_version=TlsProtocolVersion(TlsVersion.TLS1), timeout=None, ip=None):
@@ -172,6 +203,51 @@ class TestTlsCiphers(TestTlsCases.TestTlsBase):
         result = self.get_result('rc4.badssl.com', 443)
         self.assertEqual(len(result.cipher_suites), 1)
 
+    @mock.patch.object(
+        AnalyzerCipherSuites, '_next_accepted_cipher_suites',
+        side_effect=_next_accepted_cipher_suites_server_preference
+    )
+    def test_preference_order(self, mocked_next_accepted_cipher_suites):
+        try:
+            EliminationEngine().partition_count = 3
+            result = self.get_result('localhost', 443)
+            self.assertEqual(result.cipher_suite_preference, True)
+            self.assertEqual(set(result.cipher_suites), set(SERVER_PREFERRED_CIPHER_SUITES))
+
+            EliminationEngine().preference_order = True
+            mocked_next_accepted_cipher_suites.reset_mock()
+            result = self.get_result('localhost', 443)
+            self.assertEqual(result.cipher_suite_preference, True)
+            self.assertEqual(result.cipher_suites, SERVER_PREFERRED_CIPHER_SUITES)
+            self.assertLessEqual(mocked_next_accepted_cipher_suites.call_count, 12)
+
+            with mock.patch.object(AnalyzerCipherSuites, '_get_chosen_cipher_suite', return_value=None):
+                result = self.get_result('localhost', 443)
+            self.assertEqual(result.cipher_suite_preference, True)
+            self.assertEqual(set(result.cipher_suites), set(SERVER_PREFERRED_CIPHER_SUITES))
+            self.assertNotEqual(result.cipher_suites, SERVER_PREFERRED_CIPHER_SUITES)
+        finally:
+            EliminationEngine().partition_count = EliminationEngine.DEFAULT_PARTITION_COUNT
+            EliminationEngine().preference_order = False
+
+    @mock.patch.object(
+        AnalyzerCipherSuites, '_next_accepted_cipher_suites',
+        side_effect=_next_accepted_cipher_suites_client_preference
+    )
+    def test_no_preference_order(self, _):
+        result = self.get_result('localhost', 443)
+        self.assertEqual(result.cipher_suite_preference, False)
+        cipher_suites = result.cipher_suites
+        self.assertEqual(set(cipher_suites), set(SERVER_PREFERRED_CIPHER_SUITES))
+
+        try:
+            EliminationEngine().partition_count = 3
+            result = self.get_result('localhost', 443)
+            self.assertEqual(result.cipher_suite_preference, False)
+            self.assertEqual(result.cipher_suites, cipher_suites)
+        finally:
+            EliminationEngine().partition_count = EliminationEngine.DEFAULT_PARTITION_COUNT
+
     def test_long_cipher_suite_list_intolerance(self):
         self.assertFalse(self.get_result('8.8.8.8', 443).long_cipher_suite_list_intolerance)
 
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from cryptodatahub.common.algorithm import Authentication, BlockCipher, KeyExchange
+
+from cryptoparser.tls.ciphersuite import TlsCipherSuite
+from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
+
+from cryptolyzer.tls.ciphersuite import get_cipher_suites, merge_cipher_suites
+
+
+class TestCipherSuiteCatalogue(unittest.TestCase):
+    def test_all(self):
+        self.assertEqual(get_cipher_suites(), tuple(TlsCipherSuite))
+
+    def test_criteria(self):
+        self.assertEqual(
+            get_cipher_suites(min_version=TlsProtocolVersion(TlsVersion.TLS1_2)),
+            tuple(
+                cipher_suite
+                for cipher_suite in TlsCipherSuite
+                if TlsProtocolVersion(cipher_suite.value.initial_version) >= TlsProtocolVersion(TlsVersion.TLS1_2)
+            )
+        )
+        self.assertEqual(
+            get_cipher_suites(key_exchanges=[KeyExchange.RSA], authentications=[Authentication.RSA], export_grade=True),
+            tuple(
+                cipher_suite
+                for cipher_suite in TlsCipherSuite
+                if (cipher_suite.value.key_exchange == KeyExchange.RSA and
+                    cipher_suite.value.authentication == Authentication.RSA and
+                    cipher_suite.value.export_grade)
+            )
+        )
+        self.assertEqual(
+            get_cipher_suites(bulk_ciphers=[None]),
+            tuple(cipher_suite for cipher_suite in TlsCipherSuite if cipher_suite.value.bulk_cipher is None)
+        )
+        self.assertEqual(get_cipher_suites(bulk_ciphers=[]), ())
+
+    def test_merge(self):
+        rc4_cipher_suites = get_cipher_suites(bulk_ciphers=[BlockCipher.RC4_128])
+        null_cipher_suites = get_cipher_suites(bulk_ciphers=[None])
+        self.assertEqual(
+            merge_cipher_suites(null_cipher_suites, rc4_cipher_suites),
+            tuple(
+                cipher_suite
+                for cipher_suite in TlsCipherSuite
+                if cipher_suite.value.bulk_cipher in (None, BlockCipher.RC4_128)
+            )
+        )
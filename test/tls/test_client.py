@@ -20,6 +20,7 @@ from cryptoparser.common.exception import NotEnoughData, InvalidType
 from cryptoparser.tls.ciphersuite import SslCipherKind
 from cryptoparser.tls.ldap import LDAPMessageParsableBase, LDAPExtendedResponseStartTLS, LDAPResultCode
 from cryptoparser.tls.mysql import MySQLCapability, MySQLRecord, MySQLCharacterSet, MySQLHandshakeV10, MySQLVersion
+from cryptoparser.tls.extension import TlsExtensionType, TlsNamedCurve, TlsSignatureAndHashAlgorithmVector
 from cryptoparser.tls.rdp import RDPNegotiationResponse
 
 from cryptoparser.tls.record import ParsableBase, TlsRecord, SslRecord
@@ -33,6 +34,7 @@ from cryptoparser.tls.subprotocol import (
     TlsAlertLevel,
     TlsAlertMessage,
     TlsChangeCipherSpecMessage,
+    TlsCipherSuiteVector,
     TlsContentType,
     TlsHandshakeType,
 )
@@ -40,18 +42,25 @@ from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
 from cryptolyzer.tls.client import (
     ClientIMAP,
+    ClientSMTP,
     L7ClientTls,
     L7ClientTlsBase,
+    SslClientHandshake,
     SslError,
     SslHandshakeClientHelloAnyAlgorithm,
     TlsAlert,
+    TlsClientHelloTemplateCache,
     TlsHandshakeClientHelloAnyAlgorithm,
+    TlsHandshakeClientHelloAuthenticationRSA,
     TlsHandshakeClientHelloBlockCipherModeCBC,
     TlsHandshakeClientHelloBulkCipherBlockSize64,
     TlsHandshakeClientHelloBulkCipherNull,
     TlsHandshakeClientHelloKeyExchangeAnonymousDH,
+    TlsHandshakeClientHelloKeyExchangeECDHx,
     TlsHandshakeClientHelloStreamCipherRC4,
+    TlsRecordFramer,
 )
+from cryptolyzer.common.concurrency import ConnectionLimiter
 from cryptolyzer.common.exception import (
     NetworkError,
     NetworkErrorType,
@@ -65,7 +74,7 @@ from cryptolyzer.tls.server import (
     TlsServerConfiguration,
     TlsServerHandshake,
 )
-from cryptolyzer.common.transfer import L4ClientTCP
+from cryptolyzer.common.transfer import L4ClientTCP, ReceiveBuffer
 from cryptolyzer.tls.versions import AnalyzerVersions
 
 from .classes import (
@@ -130,6 +139,112 @@ class L7ServerSslPlainTextResponse(SslServerHandshake):
         raise StopIteration()
 
 
+class TestTlsRecordFramer(unittest.TestCase):
+    class RecordTransfer(object):
+        def __init__(self, data):
+            self._buffer = ReceiveBuffer()
+            self._buffer.extend(data)
+
+        @property
+        def buffer_view(self):
+            return self._buffer.view
+
+        def flush_buffer(self, byte_num=None):
+            self._buffer.consume(byte_num)
+
+    @staticmethod
+    def _get_record_bytes(content_type, fragment):
+        return TlsRecord(fragment, TlsProtocolVersion(TlsVersion.TLS1_2), content_type).compose()
+
+    def test_message_in_multiple_records(self):
+        server_hello_done = b'\x0e\x00\x00\x00'
+        transfer = self.RecordTransfer(
+            self._get_record_bytes(TlsContentType.HANDSHAKE, server_hello_done[:1]) +
+            self._get_record_bytes(TlsContentType.HANDSHAKE, server_hello_done[1:]) +
+            self._get_record_bytes(TlsContentType.ALERT, b'\x02\x28')[:3]
+        )
+        record_framer = TlsRecordFramer()
+
+        self.assertEqual(record_framer.pop_record(transfer), TlsContentType.HANDSHAKE)
+        self.assertEqual(list(record_framer.pop_messages()), [])
+        self.assertTrue(record_framer.has_pending_data)
+
+        self.assertEqual(record_framer.pop_record(transfer), TlsContentType.HANDSHAKE)
+        messages = list(record_framer.pop_messages())
+        self.assertEqual([message.get_handshake_type() for message in messages], [TlsHandshakeType.SERVER_HELLO_DONE])
+        self.assertFalse(record_framer.has_pending_data)
+
+        with self.assertRaises(NotEnoughData) as context_manager:
+            record_framer.pop_record(transfer)
+        self.assertEqual(context_manager.exception.bytes_needed, 2)
+
+        transfer = self.RecordTransfer(self._get_record_bytes(TlsContentType.ALERT, b'\x02\x28'))
+        self.assertEqual(record_framer.pop_record(transfer), TlsContentType.ALERT)
+        self.assertEqual(list(record_framer.pop_messages()), [
+            TlsAlertMessage(TlsAlertLevel.FATAL, TlsAlertDescription.HANDSHAKE_FAILURE)
+        ])
+        self.assertEqual(len(transfer.buffer_view), 0)
+
+    def test_error_interleaved_content_types(self):
+        transfer = self.RecordTransfer(
+            self._get_record_bytes(TlsContentType.HANDSHAKE, b'\x0e\x00') +
+            self._get_record_bytes(TlsContentType.ALERT, b'\x02\x28')
+        )
+        record_framer = TlsRecordFramer()
+        record_framer.pop_record(transfer)
+        self.assertEqual(list(record_framer.pop_messages()), [])
+        with self.assertRaises(InvalidType):
+            record_framer.pop_record(transfer)
+
+
+class TestTlsClientHelloTemplate(unittest.TestCase):
+    _PROTOCOL_VERSION = TlsProtocolVersion(TlsVersion.TLS1_2)
+
+    def setUp(self):
+        TlsClientHelloTemplateCache().clear()
+
+    def _assert_record_bytes(self, hello_message):
+        self.assertEqual(
+            TlsClientHelloTemplateCache().compose_record(hello_message, self._PROTOCOL_VERSION),
+            TlsRecord(hello_message.compose(), self._PROTOCOL_VERSION, TlsContentType.HANDSHAKE).compose()
+        )
+
+    def test_patched_fields(self):
+        client_hello = TlsHandshakeClientHelloKeyExchangeECDHx(self._PROTOCOL_VERSION, 'example.com')
+        self._assert_record_bytes(client_hello)
+        template = TlsClientHelloTemplateCache().get(client_hello)
+
+        client_hello = TlsHandshakeClientHelloKeyExchangeECDHx(
+            self._PROTOCOL_VERSION, 'other.example.com', named_curves=[TlsNamedCurve.SECP256R1]
+        )
+        client_hello.cipher_suites = TlsCipherSuiteVector(list(client_hello.cipher_suites)[:1])
+        client_hello.fallback_scsv = True
+        self._assert_record_bytes(client_hello)
+        self.assertIs(TlsClientHelloTemplateCache().get(client_hello), template)
+
+    def test_changed_extension(self):
+        client_hello = TlsHandshakeClientHelloAuthenticationRSA(self._PROTOCOL_VERSION, 'example.com')
+        template = TlsClientHelloTemplateCache().get(client_hello)
+
+        extension = client_hello.extensions.get_item_by_type(TlsExtensionType.SIGNATURE_ALGORITHMS)
+        extension.hash_and_signature_algorithms = TlsSignatureAndHashAlgorithmVector(
+            extension.hash_and_signature_algorithms[:1]
+        )
+        self._assert_record_bytes(client_hello)
+        self.assertIsNot(TlsClientHelloTemplateCache().get(client_hello), template)
+
+        del client_hello.extensions[0]
+        self._assert_record_bytes(client_hello)
+
+    def test_changed_protocol_version(self):
+        client_hello = TlsHandshakeClientHelloAuthenticationRSA(self._PROTOCOL_VERSION, 'example.com')
+        template = TlsClientHelloTemplateCache().get(client_hello)
+
+        client_hello = TlsHandshakeClientHelloAuthenticationRSA(TlsProtocolVersion(TlsVersion.TLS1), 'example.com')
+        self._assert_record_bytes(client_hello)
+        self.assertIsNot(TlsClientHelloTemplateCache().get(client_hello), template)
+
+
 class TestTlsAlert(unittest.TestCase):
     def test_repr_and_str(self):
         alert = TlsAlert(TlsAlertDescription.HANDSHAKE_FAILURE)
@@ -438,6 +553,39 @@ class TestClientSMTP(TestL7ClientBase):
         self.assertEqual(l7_client.greeting, ['220-localhost ESMTP', '220 second line'])
         self.assertEqual(result.versions, [])
 
+    def _assert_connection_released(self, exception_class):
+        threaded_server = L7ServerTlsTest(
+            L7ServerTlsMockResponse('localhost', 0, timeout=0.5),
+        )
+        threaded_server.start()
+        l7_client = L7ClientTlsBase.from_scheme('smtp', 'localhost', threaded_server.l7_server.l4_transfer.bind_port)
+
+        ConnectionLimiter().max_connections_per_ip = 1
+        try:
+            with self.assertRaises(exception_class):
+                l7_client.init_connection()
+            self.assertTrue(ConnectionLimiter().try_acquire(l7_client.ip))
+            ConnectionLimiter().release(l7_client.ip)
+        finally:
+            ConnectionLimiter().max_connections_per_ip = ConnectionLimiter.DEFAULT_MAX_CONNECTIONS_PER_IP
+
+    @mock.patch.object(TlsServerMockResponse, '_get_mock_responses', return_value=(
+        b''.join([
+            b'220 localhost ESMTP Server\r\n',
+            b'250-server at your service\r\n',
+            b'250-\xff\r\n',
+        ]),
+    ))
+    def test_error_non_ascii_capabilities(self, _):
+        self._assert_connection_released(SecurityError)
+
+    @mock.patch.object(TlsServerMockResponse, '_get_mock_responses', return_value=(
+        b'220 localhost ESMTP Server\r\n',
+    ))
+    @mock.patch.object(ClientSMTP, '_get_capabilities', side_effect=StopIteration)
+    def test_error_unexpected_exception(self, _, __):
+        self._assert_connection_released(StopIteration)
+
     def test_smtp_client(self):
         l7_client, result = self.get_result('smtp', 'smtp.gmail.com', None)
         self.assertEqual(len(l7_client.greeting), 1)
@@ -1060,6 +1208,24 @@ class TestSslClientHandshake(unittest.TestCase):
             L7ClientTls('badssl.com', 443).do_ssl_handshake(SslHandshakeClientHello(list(SslCipherKind)))
         self.assertEqual(context_manager.exception.error, NetworkErrorType.NO_CONNECTION)
 
+    def test_server_messages_not_aliasing_receive_buffer(self):
+        certificate = b'certificate'
+        l4_transfer = L4ClientTCP('localhost', 443, ip='127.0.0.1')
+        l4_transfer._buffer.extend(  # pylint: disable=protected-access
+            SslRecord(SslHandshakeServerHello(certificate, list(SslCipherKind))).compose()
+        )
+        l7_client = L7ClientTls('localhost', 443, ip='127.0.0.1')
+        l7_client.l4_transfer = l4_transfer
+
+        ssl_client = SslClientHandshake()
+        with mock.patch.object(L4ClientTCP, 'send'):
+            l7_client.process_steps(ssl_client.get_handshake_steps(
+                l7_client, SslHandshakeClientHello(list(SslCipherKind))
+            ))
+
+        l4_transfer._buffer.extend(b'\x00' * 64)  # pylint: disable=protected-access
+        self.assertEqual(ssl_client.server_messages[SslMessageType.SERVER_HELLO].certificate, certificate)
+
     @mock.patch.object(L4ClientTCP, 'receive', return_value=b'')
     @mock.patch.object(
         SslRecord, 'parse_exact_size', side_effect=[
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+
+import unittest
+
+from cryptoparser.tls.ciphersuite import SslCipherKind
+from cryptoparser.tls.subprotocol import SslMessageType, TlsHandshakeType
+from cryptoparser.tls.version import TlsProtocolVersion, TlsVersion
+
+from cryptolyzer.common.exception import NetworkError, NetworkErrorType
+from cryptolyzer.common.transfer import L4ServerTCP
+from cryptolyzer.tls.client import (
+    L7ClientTls,
+    L7ClientTlsBase,
+    SslHandshakeClientHelloAnyAlgorithm,
+    TlsHandshakeClientHelloAnyAlgorithm,
+)
+from cryptolyzer.tls.server import L7ServerTls, TlsServerConfiguration
+
+from .classes import L7ServerTlsTest
+
+try:
+    import asyncio
+
+    from cryptolyzer.common.transfer_async import L4ClientTCPAsync
+    from cryptolyzer.tls.client_async import L7ClientTlsAsync
+except (ImportError, SyntaxError):
+    asyncio = None
+
+
+@unittest.skipIf(asyncio is None, 'asyncio transport requires Python 3.5 or later')
+class TestL7ClientTlsAsync(unittest.TestCase):
+    @staticmethod
+    def create_server(configuration=None):
+        threaded_server = L7ServerTlsTest(L7ServerTls('localhost', 0, timeout=2, configuration=configuration))
+        threaded_server.wait_for_server_listen()
+        return threaded_server
+
+    @staticmethod
+    def create_client(l7_server):
+        return L7ClientTlsAsync(L7ClientTls(l7_server.address, l7_server.l4_transfer.bind_port, ip=l7_server.ip))
+
+    @staticmethod
+    def run_async(*coroutines):
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(asyncio.gather(*map(loop.create_task, coroutines)))
+        finally:
+            loop.close()
+
+        return results[0] if len(results) == 1 else results
+
+    def test_error_starttls(self):
+        with self.assertRaisesRegex(ValueError, 'smtp'):
+            L7ClientTlsAsync(L7ClientTlsBase.from_scheme('smtp', 'localhost', ip='127.0.0.1'))
+
+    def test_error_unresolved_ip(self):
+        with self.assertRaisesRegex(ValueError, 'ip address'):
+            L4ClientTCPAsync('localhost', 443)
+
+    def test_error_no_connection(self):
+        l4_server = L4ServerTCP('localhost', 0)
+        l4_server.init_connection()
+        port = l4_server.bind_port
+        l4_server.close()
+        del l4_server
+
+        l7_client = L7ClientTlsAsync(L7ClientTls('localhost', port, ip='127.0.0.1'))
+        client_hello = TlsHandshakeClientHelloAnyAlgorithm([TlsProtocolVersion(TlsVersion.TLS1_2), ], 'localhost')
+        with self.assertRaises(NetworkError) as context_manager:
+            self.run_async(l7_client.do_tls_handshake(client_hello))
+        self.assertEqual(context_manager.exception.error, NetworkErrorType.NO_CONNECTION)
+
+    def test_tls_handshake(self):
+        threaded_server = self.create_server()
+        l7_client = self.create_client(threaded_server.l7_server)
+        client_hello = TlsHandshakeClientHelloAnyAlgorithm([TlsProtocolVersion(TlsVersion.TLS1_2), ], 'localhost')
+        server_messages = self.run_async(l7_client.do_tls_handshake(client_hello))
+        self.assertEqual(list(server_messages.keys()), [TlsHandshakeType.SERVER_HELLO])
+        self.assertEqual(l7_client.l4_transfer, None)
+
+        threaded_server.join()
+
+    def test_ssl_handshake(self):
+        threaded_server = self.create_server(TlsServerConfiguration(fallback_to_ssl=True))
+        l7_client = self.create_client(threaded_server.l7_server)
+        server_messages = self.run_async(l7_client.do_ssl_handshake(SslHandshakeClientHelloAnyAlgorithm()))
+        self.assertEqual(server_messages[SslMessageType.SERVER_HELLO].cipher_kinds, list(SslCipherKind))
+
+        threaded_server.join()
+
+    def test_concurrent_handshakes(self):
+        threaded_servers = [self.create_server() for _ in range(3)]
+        l7_clients = [self.create_client(threaded_server.l7_server) for threaded_server in threaded_servers]
+        client_hello = TlsHandshakeClientHelloAnyAlgorithm([TlsProtocolVersion(TlsVersion.TLS1_2), ], 'localhost')
+
+        for server_messages in self.run_async(*[l7_client.do_tls_handshake(client_hello) for l7_client in l7_clients]):
+            self.assertEqual(list(server_messages.keys()), [TlsHandshakeType.SERVER_HELLO])
+
+        for threaded_server in threaded_servers:
+            threaded_server.join()
@@ -8,13 +8,15 @@ except ImportError:
 from cryptoparser.tls.extension import TlsExtensionsBase, TlsNamedCurve
 from cryptoparser.tls.version import TlsVersion, TlsProtocolVersion
 
+from cryptolyzer.common.concurrency import EliminationEngine
 from cryptolyzer.common.dhparam import (
+    DHParameter,
     DHPublicKey,
     DHPublicNumbers,
     WellKnownDHParams,
 )
 
-from cryptolyzer.tls.client import L7ClientTlsBase
+from cryptolyzer.tls.client import L7ClientTlsBase, TlsHandshakeClientHelloKeyExchangeDHE
 from cryptolyzer.tls.dhparams import AnalyzerDHParams
 
 from .classes import TestTlsCases, L7ServerTlsTest, L7ServerTlsPlainTextResponse
@@ -173,6 +175,55 @@ class TestTlsDHParams(TestTlsCases.TestTlsBase):
             ]
         )
 
+    @staticmethod
+    def _get_dhparam_tls_1_x(supported_groups):
+        def get_dhparam_tls_1_x(analyzable, protocol_version, named_groups):  # pylint: disable=unused-argument
+            get_dhparam_tls_1_x.offered_groups.append(list(named_groups))
+            if named_groups:
+                named_groups = [named_group for named_group in named_groups if named_group in supported_groups]
+                if not named_groups:
+                    raise StopIteration
+                well_known = WellKnownDHParams['RFC7919_{}_BIT_FINITE_FIELD_DIFFIE_HELLMAN_GROUP'.format(
+                    named_groups[0].value.named_group.value.size
+                )]
+            else:
+                well_known = WellKnownDHParams.RFC7919_2048_BIT_FINITE_FIELD_DIFFIE_HELLMAN_GROUP
+
+            return DHParameter(well_known.value.dh_param_numbers, well_known.value.key_size)
+
+        get_dhparam_tls_1_x.offered_groups = []
+        return get_dhparam_tls_1_x
+
+    def test_tls_1_2_all_groups_supported(self):
+        client_hello = TlsHandshakeClientHelloKeyExchangeDHE(TlsProtocolVersion(TlsVersion.TLS1_2), 'localhost')
+        supported_groups = list(TlsNamedCurve)
+        with mock.patch.object(
+                AnalyzerDHParams, '_get_dhparam_tls_1_x', side_effect=self._get_dhparam_tls_1_x(supported_groups)
+        ):
+            dhparam, named_groups = AnalyzerDHParams._analyze_tls_1_x(  # pylint: disable=protected-access
+                mock.Mock(), client_hello
+            )
+
+        # the parameter is used without the supported groups extension, so groups are not negotiated
+        self.assertEqual(named_groups, [])
+        self.assertEqual(dhparam.well_known, WellKnownDHParams.RFC7919_2048_BIT_FINITE_FIELD_DIFFIE_HELLMAN_GROUP)
+
+    def test_tls_1_2_partitions_not_reconciled(self):
+        client_hello = TlsHandshakeClientHelloKeyExchangeDHE(TlsProtocolVersion(TlsVersion.TLS1_2), 'localhost')
+        get_dhparam_tls_1_x = self._get_dhparam_tls_1_x([TlsNamedCurve.FFDHE3072])
+        EliminationEngine().partition_count = 2
+        try:
+            with mock.patch.object(AnalyzerDHParams, '_get_dhparam_tls_1_x', side_effect=get_dhparam_tls_1_x):
+                dhparam, named_groups = AnalyzerDHParams._analyze_tls_1_x(  # pylint: disable=protected-access
+                    mock.Mock(), client_hello
+                )
+        finally:
+            EliminationEngine().partition_count = EliminationEngine.DEFAULT_PARTITION_COUNT
+
+        self.assertEqual(named_groups, [TlsNamedCurve.FFDHE3072])
+        self.assertEqual(dhparam, None)
+        self.assertEqual(len(get_dhparam_tls_1_x.offered_groups), 3)
+
     def test_tls_1_3(self):
         result = self.get_result('www.cloudflare.com', 443, TlsProtocolVersion(TlsVersion.TLS1_3))
         self.assertEqual(result.groups, [])
@@ -410,10 +410,7 @@ class TestL7ServerTlsSieve(TestL7ServerBase):
         l4_client.init_connection()
 
         while True:
-            l4_client.receive_line()
-            line = l4_client.buffer
-            l4_client.flush_buffer()
-
+            line = l4_client.read_line()
             if line.startswith(b'OK'):
                 break
 